@@ -0,0 +1,297 @@
+import os
+import json
+import time
+import importlib
+import importlib.util
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple, Type, Union
+
+from logaru_logger.the_logger import logger
+from logaru_logger.metrics import record_metrics
+from odyash_general_functions.odyash_general_functions import get_directory
+from forqan_academy_scraper.pdf_blob_store import get_file_sha256
+from forqan_academy_scraper.pdf_downloads import get_revision_pdfs_to_download
+
+
+# The separator written between the pages of an extracted text file (i.e., a form feed, like `pdftotext`)
+PAGE_SEPARATOR = '\f'
+
+
+def _import_pdf_module(module_name: str, package_name: str) -> Any:
+    """
+    Import the PDF library of a backend, raising a helpful error if it isn't installed.
+    """
+    try:
+        return importlib.import_module(module_name)
+    except ImportError as e:
+        raise ImportError(f"Extracting the text of PDFs requires {package_name}, install it using `pip install {package_name}`") from e
+
+
+class _PyMuPdfBackend:
+    """
+    Extracts the text of PDFs using PyMuPDF (which handles the Arabic revision PDFs best, and is the fastest).
+    """
+
+    @staticmethod
+    def get_page_count(pdf_path: str) -> int:
+        fitz = _import_pdf_module('fitz', 'PyMuPDF')
+        with fitz.open(pdf_path) as document:
+            return document.page_count
+
+    @staticmethod
+    def iter_pages_text(pdf_path: str, first_page: int, last_page: int) -> Iterator[str]:
+        fitz = _import_pdf_module('fitz', 'PyMuPDF')
+        with fitz.open(pdf_path) as document:
+            for page_num in range(first_page, last_page):
+                yield document[page_num].get_text()
+
+
+class _PyPdfBackend:
+    """
+    Extracts the text of PDFs using pypdf (pure Python, so it's slower, but it's easier to install).
+    """
+
+    @staticmethod
+    def get_page_count(pdf_path: str) -> int:
+        pypdf = _import_pdf_module('pypdf', 'pypdf')
+        return len(pypdf.PdfReader(pdf_path).pages)
+
+    @staticmethod
+    def iter_pages_text(pdf_path: str, first_page: int, last_page: int) -> Iterator[str]:
+        pypdf = _import_pdf_module('pypdf', 'pypdf')
+        reader = pypdf.PdfReader(pdf_path)
+        for page_num in range(first_page, last_page):
+            yield reader.pages[page_num].extract_text()
+
+
+# The PDF text extraction backends (in order of preference), keyed by their names
+PDF_TEXT_BACKENDS: Dict[str, Type] = {
+    'pymupdf': _PyMuPdfBackend,
+    'pypdf': _PyPdfBackend,
+}
+_BACKENDS_MODULES = {'pymupdf': 'fitz', 'pypdf': 'pypdf'}
+
+
+def get_pdf_text_backend(backend: Union[str, Type, None] = None) -> Type:
+    """
+    Get the backend used for extracting the text of PDFs.
+
+    A backend is a class with the static methods `get_page_count(pdf_path)` and `iter_pages_text(pdf_path, first_page, last_page)`.
+    Since it is passed to the worker processes, a custom backend must be defined at the top level of an importable module.
+
+    Args:
+        backend (Union[str, Type], optional): A backend class, or the name of one of `PDF_TEXT_BACKENDS`.
+            Defaults to the 'PDF_TEXT_BACKEND' environment variable, or the first backend whose library is installed.
+
+    Returns:
+        Type: The backend class.
+
+    Raises:
+        ValueError: If the backend name is invalid.
+        ImportError: If no backend was given and none of the backends' libraries is installed.
+    """
+    if backend is None:
+        backend = os.getenv('PDF_TEXT_BACKEND')
+    if backend is None:
+        for backend_name, module_name in _BACKENDS_MODULES.items():
+            if importlib.util.find_spec(module_name) is not None:
+                return PDF_TEXT_BACKENDS[backend_name]
+        raise ImportError("Extracting the text of PDFs requires PyMuPDF or pypdf, install one of them using `pip install PyMuPDF`")
+    if isinstance(backend, str):
+        if backend not in PDF_TEXT_BACKENDS:
+            raise ValueError(f"Invalid PDF text backend: {backend}. Supported backends are: {', '.join(PDF_TEXT_BACKENDS)}")
+        return PDF_TEXT_BACKENDS[backend]
+    return backend
+
+
+def _extract_pages_text(backend: Type, pdf_path: str, first_page: int, last_page: int) -> List[Dict[str, Any]]:
+    """
+    Extract the text of the pages `[first_page, last_page)` of a PDF (runs in a worker process).
+
+    Returns:
+        List[Dict[str, Any]]: The number (starting from 1), the text, and the extraction time (in seconds) of each page.
+    """
+    pages_records = []
+    pages_text = backend.iter_pages_text(pdf_path, first_page, last_page)
+    for page_num in range(first_page, last_page):
+        start_time = time.perf_counter()
+        page_text = next(pages_text)
+        pages_records.append({'page': page_num + 1, 'text': page_text, 'seconds': round(time.perf_counter() - start_time, 6)})
+    return pages_records
+
+
+class PdfTextCache:
+    """
+    The extracted pages of each PDF, keyed by the SHA-256 hash of the PDF's content (so an unchanged PDF is never extracted again,
+    even if it is renamed or linked from several modules).
+
+    - `<cache_dir>/<first 2 chars of the hash>/<hash>.jsonl` has a line per page (its number, text, and extraction time).
+    - While a PDF is being extracted, its pages are appended (in the order they are extracted) to a `.part` file,
+        which is renamed once all the pages are extracted, so an interrupted extraction is never mistaken for a complete one.
+    """
+
+    def __init__(self, cache_dir: str) -> None:
+        self.cache_dir = cache_dir
+
+    def get_path(self, sha256: str) -> str:
+        return os.path.join(self.cache_dir, sha256[:2], f"{sha256}.jsonl")
+
+    def has(self, sha256: str) -> bool:
+        return os.path.exists(self.get_path(sha256))
+
+    def open_part(self, sha256: str) -> BinaryIO:
+        os.makedirs(os.path.dirname(self.get_path(sha256)), exist_ok=True)
+        return open(f"{self.get_path(sha256)}.part", "wb")
+
+    def complete(self, sha256: str) -> None:
+        os.replace(f"{self.get_path(sha256)}.part", self.get_path(sha256))
+
+    def discard(self, sha256: str) -> None:
+        if os.path.exists(f"{self.get_path(sha256)}.part"):
+            os.remove(f"{self.get_path(sha256)}.part")
+
+    def load_pages(self, sha256: str) -> List[Dict[str, Any]]:
+        """
+        Load the records of a PDF's pages (sorted by their page number).
+        """
+        with open(self.get_path(sha256), "r", encoding="utf-8") as file:
+            return sorted((json.loads(line) for line in file), key=lambda page_record: page_record['page'])
+
+
+def _write_text_files(pages_records: List[Dict[str, Any]], text_paths: List[str]) -> None:
+    text = PAGE_SEPARATOR.join(page_record['text'] for page_record in pages_records)
+    for text_path in text_paths:
+        os.makedirs(os.path.dirname(text_path), exist_ok=True)
+        with open(f"{text_path}.tmp", "w", encoding="utf-8") as file:
+            file.write(text)
+        os.replace(f"{text_path}.tmp", text_path)
+
+
+def get_revision_pdfs_to_extract(forqan_lessons_info: Dict) -> List[Tuple[str, str]]:
+    """
+    Get the path of each revision PDF (check `pdf_downloads.get_revision_pdfs_to_download()`), and the path where its text will be saved.
+
+    The texts are saved in a subdirectory 'revisions_pdfs_text/<module_name>' within the directory specified by the 'FINAL_OUTPUTS_DIR' environment variable.
+
+    Args:
+        forqan_lessons_info (Dict): A nested dictionary containing 'pdf_url' and 'pdf_name' keys among others.
+
+    Returns:
+        List[Tuple[str, str]]: The PDF path and the text file path of each PDF.
+    """
+    pdfs_to_extract = []
+    for _, pdf_path in get_revision_pdfs_to_download(forqan_lessons_info):
+        module_dir_name = os.path.basename(os.path.dirname(pdf_path))
+        text_dir_name = get_directory(os.path.join("revisions_pdfs_text", module_dir_name), intermediate_output=False)
+        pdf_name = os.path.splitext(os.path.basename(pdf_path))[0]
+        pdfs_to_extract.append((pdf_path, os.path.join(text_dir_name, f"{pdf_name}.txt")))
+    return pdfs_to_extract
+
+
+@record_metrics
+def extract_pdfs_text(pdfs_to_extract: List[Tuple[str, str]],
+                    backend: Union[str, Type, None] = None,
+                    max_workers: Optional[int] = None,
+                    pages_per_task: Optional[int] = None,
+                    cache_dir: Optional[str] = None) -> Dict[str, int]:
+    """
+    Extract the text of PDFs across a process pool, page by page, then save each PDF's text to its own file.
+
+    - Each PDF is split into tasks of `pages_per_task` pages, so the pages of a long PDF are extracted by several processes.
+    - The pages are streamed to the PDF's cache file as soon as their task is done (i.e., the texts of all the PDFs aren't kept in memory),
+        and the PDF's text file is written once all its pages are extracted (with `PAGE_SEPARATOR` between the pages).
+    - The results are cached by the PDF's content hash (check `PdfTextCache`), so an unchanged PDF is never extracted again.
+    - The extraction time of each page is recorded in the cache file, and each PDF's total (and slowest page) is logged.
+    - A PDF which fails to be extracted (e.g., if it's corrupted) is logged and counted, without stopping the other PDFs.
+
+    Args:
+        pdfs_to_extract (List[Tuple[str, str]]): The PDF path and the text file path of each PDF (check `get_revision_pdfs_to_extract()`).
+        backend (Union[str, Type], optional): The extraction backend (check `get_pdf_text_backend()`). Defaults to None.
+        max_workers (int, optional): The number of worker processes (1 extracts the PDFs in the calling process).
+            Defaults to the 'PDF_EXTRACTION_WORKERS' environment variable, or the number of CPUs.
+        pages_per_task (int, optional): The number of pages extracted by each task.
+            Defaults to the 'PDF_EXTRACTION_PAGES_PER_TASK' environment variable, or 8.
+        cache_dir (str, optional): The directory of the cache. Defaults to 'revisions_pdfs_text/.cache' within the 'FINAL_OUTPUTS_DIR' directory.
+
+    Returns:
+        Dict[str, int]: The number of PDFs which were 'extracted', 'cached' (i.e., loaded from the cache), 'missing', or 'failed'.
+    """
+    backend = get_pdf_text_backend(backend)
+    if max_workers is None:
+        max_workers = int(os.getenv('PDF_EXTRACTION_WORKERS', str(os.cpu_count() or 1)))
+    if pages_per_task is None:
+        pages_per_task = int(os.getenv('PDF_EXTRACTION_PAGES_PER_TASK', '8'))
+    if cache_dir is None:
+        cache_dir = get_directory(os.path.join("revisions_pdfs_text", ".cache"), intermediate_output=False)
+    cache = PdfTextCache(cache_dir)
+
+    outcomes_counts = {'extracted': 0, 'cached': 0, 'missing': 0, 'failed': 0}
+    # the text paths of each distinct PDF (e.g., the same PDF can be linked from several modules)
+    text_paths_per_hash: Dict[str, List[str]] = {}
+    pdf_path_per_hash: Dict[str, str] = {}
+    for pdf_path, text_path in pdfs_to_extract:
+        if not os.path.exists(pdf_path):
+            logger.warning(f"This pdf wasn't downloaded, so its text can't be extracted: {pdf_path}")
+            outcomes_counts['missing'] += 1
+            continue
+        sha256 = get_file_sha256(pdf_path)
+        text_paths_per_hash.setdefault(sha256, []).append(text_path)
+        pdf_path_per_hash.setdefault(sha256, pdf_path)
+
+    executor: Executor = ProcessPoolExecutor(max_workers) if max_workers > 1 else ThreadPoolExecutor(1)
+    with executor:
+        # the number of tasks which aren't done yet, and the open cache file, of each PDF being extracted
+        pending_tasks_counts: Dict[str, int] = {}
+        part_files: Dict[str, BinaryIO] = {}
+        futures: Dict[Future, str] = {}
+        for sha256, pdf_path in pdf_path_per_hash.items():
+            if cache.has(sha256):
+                _write_text_files(cache.load_pages(sha256), text_paths_per_hash[sha256])
+                outcomes_counts['cached'] += 1
+                continue
+            try:
+                page_count = backend.get_page_count(pdf_path)
+            except ImportError:
+                # i.e., the backend's library isn't installed, which isn't a problem of this PDF
+                raise
+            except Exception as e:
+                logger.error(f"Failed to open this pdf: {pdf_path} ({e})")
+                outcomes_counts['failed'] += 1
+                continue
+            part_files[sha256] = cache.open_part(sha256)
+            pending_tasks_counts[sha256] = 0
+            # EXPLANATION NOTE: a PDF without pages still gets a (empty) task, so that its (empty) text file is written
+            for first_page in range(0, max(page_count, 1), pages_per_task):
+                last_page = min(first_page + pages_per_task, page_count)
+                futures[executor.submit(_extract_pages_text, backend, pdf_path, first_page, last_page)] = sha256
+                pending_tasks_counts[sha256] += 1
+
+        for future in as_completed(futures):
+            sha256 = futures.pop(future)
+            if sha256 not in part_files:
+                # one of the PDF's other tasks failed
+                continue
+            try:
+                pages_records = future.result()
+            except Exception as e:
+                logger.error(f"Failed to extract the text of this pdf: {pdf_path_per_hash[sha256]} ({e})")
+                part_files.pop(sha256).close()
+                cache.discard(sha256)
+                outcomes_counts['failed'] += 1
+                continue
+
+            part_files[sha256].write(b''.join((json.dumps(page_record, ensure_ascii=False) + '\n').encode('utf-8')
+                                            for page_record in pages_records))
+            pending_tasks_counts[sha256] -= 1
+            if pending_tasks_counts[sha256] == 0:
+                part_files.pop(sha256).close()
+                cache.complete(sha256)
+                pages_records = cache.load_pages(sha256)
+                _write_text_files(pages_records, text_paths_per_hash[sha256])
+                outcomes_counts['extracted'] += 1
+                pages_seconds = [page_record['seconds'] for page_record in pages_records]
+                logger.info(f"Extracted the text of {pdf_path_per_hash[sha256]}: {len(pages_records)} pages in {sum(pages_seconds):.3f} s "
+                            f"(slowest page: {max(pages_seconds, default=0):.3f} s)")
+
+    logger.info(f"Revision PDFs text: {outcomes_counts}")
+    return outcomes_counts
@@ -0,0 +1,54 @@
+from typing import Dict
+
+from forqan_academy_scraper import pipeline
+from forqan_academy_scraper.pipeline import PipelineRunner, SkipStage, register_stage
+from forqan_academy_explainer import pdf_text_extraction as pte
+from forqan_academy_explainer import transcription as ftr
+from forqan_academy_explainer.search_index import SearchIndex
+
+
+# EXPLANATION NOTE: the explainer's stages are registered (when this module is imported) from here, rather than listed in the scraper's pipeline,
+#   so that the scraper doesn't depend on the explainer
+
+
+def _run_revision_pdfs_text(runner: PipelineRunner, forqan_lessons_info: Dict[str, Dict], _: Dict[str, int]) -> Dict[str, int]:
+    # the outcomes of the `revision_pdfs` stage aren't needed, only the PDFs it downloaded
+    try:
+        return pte.extract_pdfs_text(pte.get_revision_pdfs_to_extract(forqan_lessons_info))
+    except ImportError as e:
+        # i.e., neither PyMuPDF nor pypdf is installed (check the `explainer` extra of setup.cfg)
+        raise SkipStage(str(e)) from e
+
+
+def _run_subtitles(runner: PipelineRunner, forqan_lessons_info: Dict[str, Dict]) -> Dict[str, int]:
+    # the lessons whose .srt files exist are skipped, so this stage resumes from the lessons which weren't transcribed
+    try:
+        return ftr.transcribe_lessons(ftr.get_lessons_to_transcribe(forqan_lessons_info))
+    except ImportError as e:
+        # i.e., faster-whisper or yt-dlp isn't installed (check the `explainer` extra of setup.cfg)
+        # EXPLANATION NOTE: the stage is skipped rather than using the stub backend,
+        #   since the stub's placeholder .srt files would be mistaken for transcribed lessons by the later runs
+        raise SkipStage(str(e)) from e
+
+
+def _run_search_index(runner: PipelineRunner, forqan_lessons_info: Dict[str, Dict]) -> Dict[str, Dict[str, int]]:
+    # EXPLANATION NOTE: the PDFs' text and the subtitles which exist are indexed too,
+    #   so this stage doesn't need the (slow) stages producing them, but it should be re-run after them
+    with SearchIndex() as search_index:
+        return search_index.index_all(forqan_lessons_info)
+
+
+register_stage("revision_pdfs_text", ["lessons_info", "revision_pdfs"], _run_revision_pdfs_text)
+register_stage("subtitles", ["lessons_info"], _run_subtitles)
+register_stage("search_index", ["lessons_info"], _run_search_index)
+
+
+def main() -> None:
+    """
+    Command line entry point of the pipeline runner, including the explainer's stages (check `python pipeline_stages.py --help`).
+    """
+    pipeline.main()
+
+
+if __name__ == "__main__":
+    main()
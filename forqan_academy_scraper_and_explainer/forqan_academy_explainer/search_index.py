@@ -0,0 +1,310 @@
+import os
+import re
+import time
+import sqlite3
+import hashlib
+import argparse
+from typing import Any, Dict, Iterable, List, Optional
+
+from logaru_logger.the_logger import logger
+from odyash_general_functions.odyash_general_functions import get_directory
+from forqan_academy_scraper.pdf_downloads import get_revision_pdfs_to_download
+from forqan_academy_explainer import pdf_text_extraction as pte
+from forqan_academy_explainer import transcription as ftr
+
+
+# The kinds of indexed documents (other kinds can be indexed using `SearchIndex.index_document()`)
+DOCUMENT_KINDS = ('lesson', 'revision_pdf', 'subtitles')
+
+# the Arabic diacritics (tashkeel), Quranic annotation marks, and the tatweel (kashida)
+_ARABIC_DIACRITICS_RULE = re.compile(r'[\u0610-\u061A\u064B-\u065F\u0670\u06D6-\u06ED\u0640]')
+# the variants which are often used interchangeably in Arabic text, mapped to a single letter
+_ARABIC_LETTERS_VARIANTS = str.maketrans({
+    'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ٱ': 'ا',
+    'ى': 'ي', 'ئ': 'ي',
+    'ؤ': 'و',
+    'ة': 'ه',
+})
+_TERM_RULE = re.compile(r'\w+')
+# the lines of an .srt file which aren't text (i.e., the segments' numbers and timestamps)
+_SRT_NON_TEXT_LINE_RULE = re.compile(r'^(\d+|\d{2}:\d{2}:\d{2},\d{3} --> \d{2}:\d{2}:\d{2},\d{3})$', re.MULTILINE)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    doc_key TEXT UNIQUE NOT NULL,
+    kind TEXT NOT NULL,
+    module_name TEXT,
+    lesson_name TEXT,
+    url TEXT,
+    source_stamp TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS documents_kind ON documents (kind);
+CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(title, body, tokenize = 'unicode61 remove_diacritics 2');
+"""
+
+
+def normalize_arabic(text: str) -> str:
+    """
+    Normalize Arabic text for searching: remove the diacritics and the tatweel, unify the alef (أ إ آ ٱ -> ا), ya (ى ئ -> ي),
+    waw (ؤ -> و) and ta marbuta (ة -> ه) variants, and lowercase the non-Arabic letters.
+    """
+    return _ARABIC_DIACRITICS_RULE.sub('', text).translate(_ARABIC_LETTERS_VARIANTS).lower()
+
+
+def _get_text_hash(*texts: Optional[str]) -> str:
+    return hashlib.sha256('\0'.join(text or '' for text in texts).encode('utf-8')).hexdigest()
+
+
+def _get_file_stamp(file_path: str) -> str:
+    file_stat = os.stat(file_path)
+    return f"{file_stat.st_mtime_ns}:{file_stat.st_size}"
+
+
+def _read_text(file_path: str) -> str:
+    with open(file_path, 'r', encoding='utf-8') as file:
+        return file.read()
+
+
+def _read_srt_text(srt_path: str) -> str:
+    with open(srt_path, 'r', encoding='utf-8') as file:
+        return ' '.join(_SRT_NON_TEXT_LINE_RULE.sub('', file.read()).split())
+
+
+class SearchIndex:
+    """
+    An on-disk full-text index (SQLite FTS5) of the lessons' descriptions, the revision PDFs' text, and the lessons' subtitles.
+
+    - The texts are normalized before they are indexed (and so are the queries, check `normalize_arabic()`),
+        so a query matches regardless of the diacritics and the letters' variants.
+    - FTS5 keeps an inverted index (term -> documents), so a query only reads the entries of its terms,
+        instead of scanning the whole corpus, and the results are ranked using BM25 (where the lesson's name weighs more than the body).
+    - The index is updated incrementally: a document whose source didn't change (i.e., the same text hash, or the same file
+        modification time and size) isn't re-indexed, and the documents whose source was removed are deleted.
+
+    Example:
+        search_index = SearchIndex()
+        search_index.index_lessons_info(forqan_lessons_info)
+        search_index.search("غزوة الخندق")
+    """
+
+    def __init__(self, db_path: Optional[str] = None) -> None:
+        """
+        Args:
+            db_path (str, optional): The path of the SQLite database.
+                Defaults to 'search_index.sqlite3' within the directory specified by the 'FINAL_OUTPUTS_DIR' environment variable.
+        """
+        if db_path is None:
+            db_path = os.path.join(get_directory(None, intermediate_output=False), 'search_index.sqlite3')
+        self.db_path = db_path
+        self._connection = sqlite3.connect(db_path)
+        self._connection.execute('PRAGMA journal_mode = WAL')
+        self._connection.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def __enter__(self) -> 'SearchIndex':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _get_source_stamp(self, doc_key: str) -> Optional[str]:
+        row = self._connection.execute('SELECT source_stamp FROM documents WHERE doc_key = ?', (doc_key,)).fetchone()
+        return row[0] if row else None
+
+    def _delete_document(self, doc_key: str) -> None:
+        row = self._connection.execute('SELECT id FROM documents WHERE doc_key = ?', (doc_key,)).fetchone()
+        if row:
+            self._connection.execute('DELETE FROM documents_fts WHERE rowid = ?', row)
+            self._connection.execute('DELETE FROM documents WHERE id = ?', row)
+
+    def index_document(self,
+                    doc_key: str,
+                    kind: str,
+                    title: str,
+                    body: str,
+                    module_name: Optional[str] = None,
+                    lesson_name: Optional[str] = None,
+                    url: Optional[str] = None,
+                    source_stamp: Optional[str] = None) -> bool:
+        """
+        Add (or update) a document, unless its source didn't change since it was indexed.
+
+        Args:
+            doc_key (str): The unique key of the document (e.g., '<kind>:<url>').
+            kind (str): The kind of the document (e.g., one of `DOCUMENT_KINDS`).
+            title (str): The title (weighs more than the body when ranking).
+            body (str): The text.
+            module_name (str, optional): The name of the document's module.
+            lesson_name (str, optional): The name of the document's lesson.
+            url (str, optional): The URL of the document's lesson (or PDF).
+            source_stamp (str, optional): Identifies the version of the document's source. Defaults to the hash of the document.
+
+        Returns:
+            bool: True if the document was (re-)indexed, False if it didn't change.
+        """
+        with self._connection:
+            return self._index_document(doc_key, kind, title, body, module_name, lesson_name, url, source_stamp)
+
+    def _index_document(self,
+                        doc_key: str,
+                        kind: str,
+                        title: str,
+                        body: str,
+                        module_name: Optional[str] = None,
+                        lesson_name: Optional[str] = None,
+                        url: Optional[str] = None,
+                        source_stamp: Optional[str] = None) -> bool:
+        # IMPLEMENTATION NOTE: doesn't commit, so that a batch of documents is indexed in a single transaction
+        if source_stamp is None:
+            source_stamp = _get_text_hash(kind, title, body, module_name, lesson_name, url)
+        if self._get_source_stamp(doc_key) == source_stamp:
+            return False
+
+        self._delete_document(doc_key)
+        cursor = self._connection.execute(
+            'INSERT INTO documents (doc_key, kind, module_name, lesson_name, url, source_stamp) VALUES (?, ?, ?, ?, ?, ?)',
+            (doc_key, kind, module_name, lesson_name, url, source_stamp))
+        self._connection.execute('INSERT INTO documents_fts (rowid, title, body) VALUES (?, ?, ?)',
+                                (cursor.lastrowid, normalize_arabic(title), normalize_arabic(body)))
+        return True
+
+    def _remove_stale_documents(self, kind: str, doc_keys: Iterable[str]) -> int:
+        """
+        Delete the documents of a kind which aren't in `doc_keys` (i.e., whose source was removed).
+        """
+        doc_keys = set(doc_keys)
+        stale_doc_keys = [doc_key for (doc_key,) in self._connection.execute('SELECT doc_key FROM documents WHERE kind = ?', (kind,))
+                        if doc_key not in doc_keys]
+        for doc_key in stale_doc_keys:
+            self._delete_document(doc_key)
+        return len(stale_doc_keys)
+
+    def _index_documents(self, kind: str, documents: Iterable[Dict[str, Any]]) -> Dict[str, int]:
+        counts = {'indexed': 0, 'unchanged': 0, 'removed': 0}
+        doc_keys = []
+        with self._connection:
+            for document in documents:
+                doc_keys.append(document['doc_key'])
+                counts['indexed' if self._index_document(kind=kind, **document) else 'unchanged'] += 1
+            counts['removed'] = self._remove_stale_documents(kind, doc_keys)
+        logger.info(f"Search index ({kind}): {counts}")
+        return counts
+
+    def index_lessons_info(self, forqan_lessons_info: Dict) -> Dict[str, int]:
+        """
+        Index the name and the description of each lesson in the nested dictionary 'forqan_lessons_info'.
+
+        Returns:
+            Dict[str, int]: The number of documents which were 'indexed', 'unchanged', or 'removed'.
+        """
+        def _iter_documents():
+            for module_info in forqan_lessons_info.values():
+                for lesson in module_info.get('lessons', []):
+                    if lesson.get('video_description'):
+                        yield {'doc_key': f"lesson:{lesson['url']}", 'title': lesson['name'], 'body': lesson['video_description'],
+                            'module_name': module_info.get('name'), 'lesson_name': lesson['name'], 'url': lesson['url']}
+
+        return self._index_documents('lesson', _iter_documents())
+
+    def index_revision_pdfs_text(self, forqan_lessons_info: Dict) -> Dict[str, int]:
+        """
+        Index the extracted text of each revision PDF (check `pdf_text_extraction.extract_pdfs_text()`).
+        PDFs whose text wasn't extracted yet are skipped.
+        """
+        def _iter_documents():
+            pdfs_to_download = get_revision_pdfs_to_download(forqan_lessons_info)
+            for (pdf_url, _), (pdf_path, text_path) in zip(pdfs_to_download, pte.get_revision_pdfs_to_extract(forqan_lessons_info)):
+                if not os.path.exists(text_path):
+                    continue
+                source_stamp = _get_file_stamp(text_path)
+                doc_key = f"revision_pdf:{pdf_path}"
+                pdf_name = os.path.splitext(os.path.basename(pdf_path))[0]
+                # IMPLEMENTATION NOTE: the file is only read if it changed since it was indexed
+                body = '' if self._get_source_stamp(doc_key) == source_stamp else _read_text(text_path)
+                yield {'doc_key': doc_key, 'title': pdf_name, 'body': body, 'module_name': os.path.basename(os.path.dirname(pdf_path)),
+                    'lesson_name': pdf_name, 'url': pdf_url, 'source_stamp': source_stamp}
+
+        return self._index_documents('revision_pdf', _iter_documents())
+
+    def index_subtitles(self, forqan_lessons_info: Dict) -> Dict[str, int]:
+        """
+        Index the subtitles of each lesson (check `transcription.transcribe_lessons()`). Lessons which weren't transcribed yet are skipped.
+        """
+        def _iter_documents():
+            for video_url, srt_path in ftr.get_lessons_to_transcribe(forqan_lessons_info):
+                if not os.path.exists(srt_path):
+                    continue
+                source_stamp = _get_file_stamp(srt_path)
+                doc_key = f"subtitles:{srt_path}"
+                lesson_name = os.path.splitext(os.path.basename(srt_path))[0]
+                body = '' if self._get_source_stamp(doc_key) == source_stamp else _read_srt_text(srt_path)
+                yield {'doc_key': doc_key, 'title': lesson_name, 'body': body, 'module_name': os.path.basename(os.path.dirname(srt_path)),
+                    'lesson_name': lesson_name, 'url': video_url, 'source_stamp': source_stamp}
+
+        return self._index_documents('subtitles', _iter_documents())
+
+    def index_all(self, forqan_lessons_info: Dict) -> Dict[str, Dict[str, int]]:
+        """
+        Index the lessons' descriptions, then the revision PDFs' text and the subtitles (those which exist).
+        """
+        return {
+            'lesson': self.index_lessons_info(forqan_lessons_info),
+            'revision_pdf': self.index_revision_pdfs_text(forqan_lessons_info),
+            'subtitles': self.index_subtitles(forqan_lessons_info),
+        }
+
+    def search(self, query: str, limit: int = 10, kinds: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Find the documents matching any of the query's terms, ranked by BM25 (best first).
+
+        Args:
+            query (str): The query (normalized the same way as the documents).
+            limit (int, optional): The maximum number of results. Defaults to 10.
+            kinds (List[str], optional): Only return the documents of these kinds. Defaults to all kinds.
+
+        Returns:
+            List[Dict[str, Any]]: The kind, module name, lesson name, URL, score (the lower, the better) and snippet of each result.
+        """
+        terms = _TERM_RULE.findall(normalize_arabic(query))
+        if not terms:
+            return []
+        # EXPLANATION NOTE: each term is quoted, so that FTS5 doesn't interpret it as an operator (e.g., `OR`, `NOT`, `NEAR`)
+        match_query = ' OR '.join(f'"{term}"' for term in terms)
+        sql = ('SELECT d.kind, d.module_name, d.lesson_name, d.url, bm25(documents_fts, 2.0, 1.0) AS score, '
+            "snippet(documents_fts, 1, '[', ']', '...', 12) "
+            'FROM documents_fts JOIN documents d ON d.id = documents_fts.rowid WHERE documents_fts MATCH ?')
+        parameters: List[Any] = [match_query]
+        if kinds:
+            sql += f" AND d.kind IN ({', '.join('?' * len(kinds))})"
+            parameters.extend(kinds)
+        sql += ' ORDER BY score LIMIT ?'
+        parameters.append(limit)
+
+        start_time = time.perf_counter()
+        rows = self._connection.execute(sql, parameters).fetchall()
+        logger.debug(f"search({query!r}): {len(rows)} results in {(time.perf_counter() - start_time) * 1000:.2f} ms")
+        return [{'kind': kind, 'module_name': module_name, 'lesson_name': lesson_name, 'url': url, 'score': score, 'snippet': snippet}
+                for kind, module_name, lesson_name, url, score, snippet in rows]
+
+
+def main() -> None:
+    """
+    Command line entry point for searching the index (check `python search_index.py --help`).
+    """
+    parser = argparse.ArgumentParser(description="Search the lessons' descriptions, the revision PDFs' text and the subtitles")
+    parser.add_argument("query", help="the words to search for")
+    parser.add_argument("--limit", type=int, default=10, help="the maximum number of results")
+    parser.add_argument("--kind", action="append", choices=DOCUMENT_KINDS, help="only search these kinds of documents")
+    parser.add_argument("--db-path", default=None, help="the path of the index's SQLite database")
+    args = parser.parse_args()
+
+    with SearchIndex(args.db_path) as search_index:
+        for result in search_index.search(args.query, args.limit, args.kind):
+            print(f"[{result['kind']}] {result['module_name']} / {result['lesson_name']} ({result['url']})\n    {result['snippet']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+import os
+import html
+import shutil
+import tempfile
+import importlib
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple, Type, Union
+
+from logaru_logger.the_logger import logger
+from logaru_logger.metrics import record_metrics
+from odyash_general_functions.odyash_general_functions import ordered_bounded_map, get_directory
+from forqan_academy_scraper import extraction_rules as er
+
+
+# A transcribed segment of a video: its start and end (in seconds), and its text
+Segment = Tuple[float, float, str]
+
+
+def _import_transcription_module(module_name: str, package_name: str) -> Any:
+    """
+    Import the library of a transcription backend, raising a helpful error if it isn't installed.
+    """
+    try:
+        return importlib.import_module(module_name)
+    except ImportError as e:
+        raise ImportError(f"This transcription backend requires {package_name}, install it using `pip install {package_name}`") from e
+
+
+class TranscriptionBackend(ABC):
+    """
+    The interface of the speech-to-text backends used by `transcribe_lessons()`.
+
+    A backend only has to implement `transcribe()`. Backends which are faster on batches (e.g., a model running on a GPU)
+    can also override `transcribe_batch()`. If more than one worker is used, the same backend is called from several threads.
+    """
+
+    @abstractmethod
+    def transcribe(self, video_url: str) -> List[Segment]:
+        """
+        Transcribe a video into its segments (check `Segment`).
+        """
+
+    def transcribe_batch(self, videos_urls: List[str]) -> List[List[Segment]]:
+        return [self.transcribe(video_url) for video_url in videos_urls]
+
+
+class StubTranscriptionBackend(TranscriptionBackend):
+    """
+    Returns a single placeholder segment per video, without downloading it (e.g., for dry runs of the pipeline, and for tests).
+    """
+
+    def transcribe(self, video_url: str) -> List[Segment]:
+        return [(0.0, 1.0, f"[untranscribed] {video_url}")]
+
+
+class FasterWhisperBackend(TranscriptionBackend):
+    """
+    Downloads each video's audio using yt-dlp, then transcribes it locally using a faster-whisper model.
+
+    Notes:
+    - The model is loaded once (in `__init__()`), and shared by all the workers.
+    """
+
+    def __init__(self, model_size: Optional[str] = None, language: str = 'ar') -> None:
+        """
+        Args:
+            model_size (str, optional): The size (or path) of the Whisper model.
+                Defaults to the 'WHISPER_MODEL_SIZE' environment variable, or 'small'.
+            language (str, optional): The language spoken in the videos. Defaults to 'ar'.
+        """
+        faster_whisper = _import_transcription_module('faster_whisper', 'faster-whisper')
+        self.yt_dlp = _import_transcription_module('yt_dlp', 'yt-dlp')
+        self.model = faster_whisper.WhisperModel(model_size or os.getenv('WHISPER_MODEL_SIZE', 'small'))
+        self.language = language
+
+    def _download_audio(self, video_url: str, dir_name: str) -> str:
+        options = {'format': 'bestaudio/best', 'outtmpl': os.path.join(dir_name, 'audio.%(ext)s'), 'quiet': True}
+        with self.yt_dlp.YoutubeDL(options) as ydl:
+            return ydl.prepare_filename(ydl.extract_info(video_url, download=True))
+
+    def transcribe(self, video_url: str) -> List[Segment]:
+        with tempfile.TemporaryDirectory(prefix='forqan_audio_') as dir_name:
+            segments, _ = self.model.transcribe(self._download_audio(video_url, dir_name), language=self.language)
+            return [(segment.start, segment.end, segment.text.strip()) for segment in segments]
+
+
+# The transcription backends, keyed by their names
+TRANSCRIPTION_BACKENDS: Dict[str, Type[TranscriptionBackend]] = {
+    'stub': StubTranscriptionBackend,
+    'faster_whisper': FasterWhisperBackend,
+}
+
+
+def get_transcription_backend(backend: Union[str, TranscriptionBackend, None] = None) -> TranscriptionBackend:
+    """
+    Get the backend used for transcribing the videos.
+
+    Args:
+        backend (Union[str, TranscriptionBackend], optional): A backend, or the name of one of `TRANSCRIPTION_BACKENDS`.
+            Defaults to the 'TRANSCRIPTION_BACKEND' environment variable, or 'faster_whisper' if it isn't set.
+
+    Returns:
+        TranscriptionBackend: The backend.
+
+    Raises:
+        ValueError: If the backend name is invalid.
+        ImportError: If the libraries of the backend aren't installed (e.g., faster-whisper and yt-dlp for 'faster_whisper').
+    """
+    if isinstance(backend, TranscriptionBackend):
+        return backend
+    if backend is None:
+        backend = os.getenv('TRANSCRIPTION_BACKEND', 'faster_whisper')
+    if backend not in TRANSCRIPTION_BACKENDS:
+        raise ValueError(f"Invalid transcription backend: {backend}. Supported backends are: {', '.join(TRANSCRIPTION_BACKENDS)}")
+    return TRANSCRIPTION_BACKENDS[backend]()
+
+
+def _format_srt_timestamp(seconds: float) -> str:
+    milliseconds = int(round(seconds * 1000))
+    hours, milliseconds = divmod(milliseconds, 3_600_000)
+    minutes, milliseconds = divmod(milliseconds, 60_000)
+    seconds, milliseconds = divmod(milliseconds, 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d},{milliseconds:03d}"
+
+
+def format_srt(segments: List[Segment]) -> str:
+    """
+    Format transcribed segments as the content of an .srt file.
+    """
+    return ''.join(f"{i}\n{_format_srt_timestamp(start)} --> {_format_srt_timestamp(end)}\n{text}\n\n"
+                    for i, (start, end, text) in enumerate(segments, start=1))
+
+
+def get_lessons_to_transcribe(forqan_lessons_info: Dict) -> List[Tuple[str, str]]:
+    """
+    Get the video URL and the path (where its subtitles will be saved) of each lesson with a video found in the nested dictionary 'forqan_lessons_info'.
+
+    The subtitles are saved in a subdirectory 'subtitles/<module_name>' within the directory specified by the 'FINAL_OUTPUTS_DIR' environment variable.
+    A lesson listed more than once (i.e., the same name and video) is only returned once, while lessons of the same module whose names
+    are the same (after removing the characters which are invalid in file names) but whose videos differ get the lesson's number added to the file name.
+
+    Args:
+        forqan_lessons_info (Dict): A nested dictionary containing 'video_url' and 'name' keys among others.
+
+    Returns:
+        List[Tuple[str, str]]: The video URL and the .srt file path of each lesson.
+    """
+    lessons_to_transcribe = {}
+    for module_info in forqan_lessons_info.values():
+        module_name = module_info.get("name", "unknown_module")
+        dir_name = get_directory(os.path.join("subtitles", module_name), intermediate_output=False)
+
+        for lesson_num, lesson in enumerate(module_info.get("lessons", []), start=1):
+            if lesson.get("video_url"):
+                srt_name = er.INVALID_FILE_NAME_CHARS_RULE.sub('', html.unescape(lesson["name"]))
+                srt_path = os.path.join(dir_name, f"{srt_name}.srt")
+                if lessons_to_transcribe.get(srt_path, lesson["video_url"]) != lesson["video_url"]:
+                    srt_path = os.path.join(dir_name, f"{srt_name} ({lesson_num:02d}).srt")
+                    logger.warning(f"Another lesson of {module_name} has the same name as lesson {lesson_num} ({srt_name}), "
+                                    f"its subtitles will be saved to: {srt_path}")
+                lessons_to_transcribe.setdefault(srt_path, lesson["video_url"])
+
+    return [(video_url, srt_path) for srt_path, video_url in lessons_to_transcribe.items()]
+
+
+def _write_srt_files(segments: List[Segment], srt_paths: List[str]) -> None:
+    srt_content = format_srt(segments)
+    for srt_path in srt_paths:
+        os.makedirs(os.path.dirname(srt_path), exist_ok=True)
+        with open(f"{srt_path}.tmp", "w", encoding="utf-8") as file:
+            file.write(srt_content)
+        os.replace(f"{srt_path}.tmp", srt_path)
+
+
+@record_metrics
+def transcribe_lessons(lessons_to_transcribe: List[Tuple[str, str]],
+                        backend: Union[str, TranscriptionBackend, None] = None,
+                        max_workers: Optional[int] = None,
+                        batch_size: Optional[int] = None) -> Dict[str, int]:
+    """
+    Transcribe the videos of the lessons into .srt files, using a bounded pool of workers.
+
+    - Each distinct video URL is transcribed once, even if it is linked from several lessons (its .srt file is copied to the others).
+    - A lesson whose .srt file exists is skipped, so re-running this function resumes from the lessons which weren't transcribed.
+    - The videos are sent to the backend in batches of `batch_size`, and each batch's .srt files are written (i.e., checkpointed)
+        as soon as the batch is transcribed.
+    - If a batch fails, its videos are retried one by one, so a single bad video doesn't fail the others.
+
+    Args:
+        lessons_to_transcribe (List[Tuple[str, str]]): The video URL and the .srt file path of each lesson (check `get_lessons_to_transcribe()`).
+        backend (Union[str, TranscriptionBackend], optional): The speech-to-text backend (check `get_transcription_backend()`). Defaults to None.
+        max_workers (int, optional): The maximum number of batches transcribed at the same time.
+            Defaults to the 'TRANSCRIPTION_WORKERS' environment variable, or 1 (since a local model usually uses the whole machine).
+        batch_size (int, optional): The number of videos per batch. Defaults to the 'TRANSCRIPTION_BATCH_SIZE' environment variable, or 4.
+
+    Returns:
+        Dict[str, int]: The number of video URLs which were 'skipped' (i.e., already transcribed), 'transcribed', or 'failed'.
+    """
+    if max_workers is None:
+        max_workers = int(os.getenv('TRANSCRIPTION_WORKERS', '1'))
+    if batch_size is None:
+        batch_size = int(os.getenv('TRANSCRIPTION_BATCH_SIZE', '4'))
+
+    srt_paths_per_url: Dict[str, List[str]] = {}
+    for video_url, srt_path in lessons_to_transcribe:
+        srt_paths_per_url.setdefault(video_url, []).append(srt_path)
+
+    outcomes_counts = {'skipped': 0, 'transcribed': 0, 'failed': 0}
+    videos_urls = []
+    for video_url, srt_paths in srt_paths_per_url.items():
+        existing_srt_paths = [srt_path for srt_path in srt_paths if os.path.exists(srt_path)]
+        if not existing_srt_paths:
+            videos_urls.append(video_url)
+            continue
+        for srt_path in srt_paths:
+            if srt_path not in existing_srt_paths:
+                os.makedirs(os.path.dirname(srt_path), exist_ok=True)
+                shutil.copyfile(existing_srt_paths[0], srt_path)
+        outcomes_counts['skipped'] += 1
+
+    if not videos_urls:
+        logger.info(f"Lessons transcription: {outcomes_counts}")
+        return outcomes_counts
+    # IMPLEMENTATION NOTE: the backend is only created if there are videos to transcribe, since loading a model is slow
+    backend = get_transcription_backend(backend)
+
+    def _transcribe_batch(batch_videos_urls: List[str]) -> List[str]:
+        try:
+            segments_per_video = backend.transcribe_batch(batch_videos_urls)
+        except Exception as e:
+            logger.warning(f"Failed to transcribe a batch of {len(batch_videos_urls)} videos ({e}), transcribing them one by one")
+            segments_per_video = []
+            for video_url in batch_videos_urls:
+                try:
+                    segments_per_video.append(backend.transcribe(video_url))
+                except Exception as e:
+                    logger.error(f"Failed to transcribe this video: {video_url} ({e})")
+                    segments_per_video.append(None)
+
+        outcomes = []
+        for video_url, segments in zip(batch_videos_urls, segments_per_video):
+            if segments is None:
+                outcomes.append('failed')
+                continue
+            _write_srt_files(segments, srt_paths_per_url[video_url])
+            logger.info(f"Transcribed: {video_url} ({len(segments)} segments)")
+            outcomes.append('transcribed')
+        return outcomes
+
+    batches = [videos_urls[i:i + batch_size] for i in range(0, len(videos_urls), batch_size)]
+    for outcomes in ordered_bounded_map(_transcribe_batch, batches, max_workers):
+        for outcome in outcomes:
+            outcomes_counts[outcome] += 1
+    logger.info(f"Lessons transcription: {outcomes_counts}")
+
+    return outcomes_counts
@@ -0,0 +1,143 @@
+import os
+import re
+import timeit
+from typing import Dict, Iterable, List, Optional, Union
+
+
+# The default URL of the website (check `get_forqan_base_url()`)
+FORQAN_BASE_URL = 'https://forqanacademy.com'
+
+
+def get_forqan_base_url() -> str:
+    """
+    Get the URL of the website, which can be changed by setting the 'FORQAN_BASE_URL' environment variable
+    (e.g., to crawl a local stand-in server in the benchmarks).
+    """
+    return os.getenv('FORQAN_BASE_URL', FORQAN_BASE_URL).rstrip('/')
+
+
+class ExtractionRule:
+    """
+    A precompiled regex used by the scraper's extractors, optionally restricted to a region of the page.
+
+    The region is the text between the first `region_start` marker (inclusive) and the first `region_end` marker after it (exclusive).
+    If a marker isn't found, the region extends to the start/end of the page, so restricting a rule never loses matches
+    as long as the markers are correct (e.g., a `<title>` is always before `</head>`).
+    """
+
+    def __init__(self,
+                name: str,
+                pattern: str,
+                flags: int = 0,
+                region_start: Optional[str] = None,
+                region_end: Optional[str] = None) -> None:
+        self.name = name
+        self.pattern = re.compile(pattern, flags)
+        self.region_start = region_start
+        self.region_end = region_end
+
+    def __repr__(self) -> str:
+        return f"ExtractionRule(name={self.name!r}, pattern={self.pattern.pattern!r})"
+
+    def get_region(self, text: str) -> str:
+        """
+        Get the part of the text where this rule is applied.
+        """
+        start = 0
+        if self.region_start is not None:
+            start = max(text.find(self.region_start), 0)
+        end = len(text)
+        if self.region_end is not None:
+            end = text.find(self.region_end, start)
+            if end == -1:
+                end = len(text)
+        if start == 0 and end == len(text):
+            return text
+        return text[start:end]
+
+    def search(self, text: str) -> Optional[re.Match]:
+        return self.pattern.search(self.get_region(text))
+
+    def findall(self, text: str) -> List[Union[str, tuple]]:
+        return self.pattern.findall(self.get_region(text))
+
+    def sub(self, replacement: str, text: str) -> str:
+        # IMPLEMENTATION NOTE: substitutions are applied on the whole text, since the other parts must be kept
+        return self.pattern.sub(replacement, text)
+
+
+# The registry of all the extraction rules, keyed by the rule's name
+EXTRACTION_RULES: Dict[str, ExtractionRule] = {}
+
+
+def _register_rule(*args, **kwargs) -> ExtractionRule:
+    rule = ExtractionRule(*args, **kwargs)
+    EXTRACTION_RULES[rule.name] = rule
+    return rule
+
+
+# login page: the nonce which has to be sent with the login form
+WPNONCE_RULE = _register_rule('wpnonce', r'id="_wpnonce".*?value="([^"]*)"', region_start='<form')
+
+# login response page: 'a' tags with class 'ld-item-name' (i.e., the modules' links)
+MODULE_URL_RULE = _register_rule('module_url', r'<a href="(.*?)" class="ld-item-name">', region_start='<body')
+
+# module page: the module's name is the first part of the page's title
+MODULE_TITLE_RULE = _register_rule('module_title', r'<title>(.*?)&#8211;', region_end='</head>')
+MODULE_LESSONS_COUNTER_RULE = _register_rule('module_lessons_counter', r'\(\d+\)')
+
+# module page: each lesson's URL and name
+# IMPLEMENTATION NOTE: the URL is matched with `[^"]*` (i.e., it can't go past the end of the `href` attribute), 
+#   so the base URL doesn't have to be hardcoded (unlike `.*?/topic`, which continued to match in the html until it found a url with `/topic` in it)
+# IMPLEMENTATION NOTE: re.DOTALL is used to match newlines as well when using the dot (.) metacharacter
+LESSON_LINK_RULE = _register_rule('lesson_link',
+                                r'<a class="ld-table-list-item-preview.*?" href="([^"]*/topic/[^"]*)">.*?<span class="ld-topic-title">(.*?)</span>',
+                                re.DOTALL,
+                                region_start='<body')
+
+# lesson page: the messages shown instead of a lesson which isn't available yet
+# (i.e., "please go back and complete ..." or "available in ..."), combined so that the page is scanned once
+# EXPLANATION NOTE: the whole page is scanned (like the original `in` checks), since the message may also be in the <head> (e.g., in a <meta> description)
+LESSON_NOT_AVAILABLE_RULE = _register_rule('lesson_not_available', r'يرجى العودة وإكمال|متوفر في')
+
+# file names: the characters which aren't allowed in Windows file names
+INVALID_FILE_NAME_CHARS_RULE = _register_rule('invalid_file_name_chars', r'[\\/:*?"<>|]')
+
+
+def get_extraction_rule(name: str) -> ExtractionRule:
+    """
+    Get a registered extraction rule by its name.
+
+    Raises:
+        KeyError: If no rule is registered with this name.
+    """
+    if name not in EXTRACTION_RULES:
+        raise KeyError(f"No extraction rule named {name}. Registered rules are: {', '.join(EXTRACTION_RULES)}")
+    return EXTRACTION_RULES[name]
+
+
+def benchmark_extraction_rules(texts: Iterable[str],
+                            rules_names: Optional[Iterable[str]] = None,
+                            repeat: int = 5) -> Dict[str, float]:
+    """
+    Measure how long each extraction rule takes to scan the given texts (e.g., saved module/lesson pages).
+
+    Args:
+        texts (Iterable[str]): The texts to scan.
+        rules_names (Iterable[str], optional): The names of the rules to benchmark. Defaults to all registered rules.
+        repeat (int, optional): The number of times the texts are scanned (the best time is kept). Defaults to 5.
+
+    Returns:
+        Dict[str, float]: The best time (in microseconds) of scanning a single text with `findall()`, keyed by the rule's name.
+    """
+    texts = list(texts)
+    if rules_names is None:
+        rules_names = list(EXTRACTION_RULES)
+
+    results = {}
+    for rule_name in rules_names:
+        rule = get_extraction_rule(rule_name)
+        timer = timeit.Timer(lambda: [rule.findall(text) for text in texts])
+        best_time = min(timer.repeat(repeat=repeat, number=1))
+        results[rule_name] = best_time / max(len(texts), 1) * 1e6
+    return results
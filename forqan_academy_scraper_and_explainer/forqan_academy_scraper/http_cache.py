@@ -0,0 +1,235 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from typing import Any, Dict, Optional
+
+from requests import PreparedRequest, Response
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from pyprojroot import here
+
+from logaru_logger.the_logger import logger
+
+
+def get_http_cache_dir(cache_dir: Optional[str] = None) -> str:
+    """
+    Get the directory where the cached HTTP responses are stored.
+
+    Args:
+        cache_dir (str, optional): The cache directory (relative to the project root).
+            Defaults to the 'HTTP_CACHE_DIR' environment variable, or 'data_files/http_cache' if it isn't set.
+
+    Returns:
+        str: The absolute path of the cache directory.
+    """
+    if cache_dir is None:
+        cache_dir = os.getenv('HTTP_CACHE_DIR', os.path.join('data_files', 'http_cache'))
+    return os.path.normpath(os.path.join(here(), cache_dir))
+
+
+class CachingHTTPAdapter(HTTPAdapter):
+    """
+    An HTTP adapter that stores response bodies on disk (keyed by URL and user) and revalidates them with conditional requests.
+
+    - Only successful `GET` responses having an `ETag` and/or a `Last-Modified` header are stored.
+    - When a URL is cached, the request is sent with `If-None-Match`/`If-Modified-Since` headers,
+        and a `304 Not Modified` response is turned into the cached `200` response (with `response.from_cache` set to True).
+    - Entries older than `ttl_seconds` are evicted (and re-downloaded),
+        and the least recently used entries are evicted whenever the cache grows beyond `max_size_bytes`.
+
+    Notes:
+    - Since the pages of the website differ per user, the entries are also keyed by the adapter's `namespace` (e.g., the logged-in username)
+        and by whether the request sends cookies (i.e., a logged-out request never revalidates against a logged-in body),
+        and an entry is only used if the request headers listed in its response's `Vary` header didn't change.
+    - Each entry is stored as two files: `<sha256 of key>.body` and `<sha256 of key>.json` (metadata).
+        The modification time of the `.body` file is used as the last access time of the entry.
+    - Range requests and streamed responses (i.e., `stream=True`) are never stored,
+        but streamed requests are still revalidated against existing entries.
+    """
+
+    def __init__(self,
+                cache_dir: Optional[str] = None,
+                ttl_seconds: Optional[float] = None,
+                max_size_bytes: Optional[int] = None,
+                namespace: Optional[str] = None,
+                **kwargs: Any) -> None:
+        """
+        Args:
+            cache_dir (str, optional): The cache directory (check `get_http_cache_dir()`).
+            ttl_seconds (float, optional): The maximum age of an entry.
+                Defaults to the 'HTTP_CACHE_TTL_SECONDS' environment variable (or 7 days).
+            max_size_bytes (int, optional): The maximum total size of the stored bodies.
+                Defaults to the 'HTTP_CACHE_MAX_MB' environment variable (or 1024 MB).
+            namespace (str, optional): Separates the entries of the different users sharing the cache directory (e.g., the logged-in username).
+                Defaults to '' (i.e., the anonymous user).
+            **kwargs: Passed to `requests.adapters.HTTPAdapter` (e.g., `pool_maxsize`).
+        """
+        super().__init__(**kwargs)
+        self.cache_dir = get_http_cache_dir(cache_dir)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        if ttl_seconds is None:
+            ttl_seconds = float(os.getenv('HTTP_CACHE_TTL_SECONDS', str(7 * 24 * 60 * 60)))
+        if max_size_bytes is None:
+            max_size_bytes = int(float(os.getenv('HTTP_CACHE_MAX_MB', '1024')) * 1024 * 1024)
+        self.ttl_seconds = ttl_seconds
+        self.max_size_bytes = max_size_bytes
+        self.namespace = namespace or ''
+        self._lock = threading.Lock()
+        self._total_size = sum(os.path.getsize(os.path.join(self.cache_dir, file_name))
+                                for file_name in os.listdir(self.cache_dir) if file_name.endswith('.body'))
+
+    def _get_entry_path_without_extension(self, request: PreparedRequest) -> str:
+        entry_key = '\n'.join((self.namespace, 'with cookies' if 'Cookie' in request.headers else 'without cookies', request.url))
+        return os.path.join(self.cache_dir, hashlib.sha256(entry_key.encode('utf-8')).hexdigest())
+
+    def _delete_entry(self, entry_path_without_extension: str) -> None:
+        with self._lock:
+            for extension in ('body', 'json'):
+                file_path = f'{entry_path_without_extension}.{extension}'
+                try:
+                    if extension == 'body':
+                        self._total_size -= os.path.getsize(file_path)
+                    os.remove(file_path)
+                except FileNotFoundError:
+                    pass
+
+    def _load_entry(self, request: PreparedRequest) -> Optional[Dict[str, Any]]:
+        """
+        Load the metadata of a cached request, or return None if it isn't cached (or if it has expired, or if its `Vary` headers changed).
+        """
+        url = request.url
+        entry_path_without_extension = self._get_entry_path_without_extension(request)
+        try:
+            with open(f'{entry_path_without_extension}.json', 'r', encoding='utf-8') as file:
+                entry = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+        if entry.get('url') != url or not os.path.exists(f'{entry_path_without_extension}.body'):
+            return None
+        if any(request.headers.get(header) != value for header, value in entry.get('vary', {}).items()):
+            logger.debug(f"HTTP cache entry varies: {url}")
+            return None
+        if time.time() - entry['stored_at'] > self.ttl_seconds:
+            logger.debug(f"HTTP cache entry expired: {url}")
+            self._delete_entry(entry_path_without_extension)
+            return None
+
+        entry['body_path'] = f'{entry_path_without_extension}.body'
+        return entry
+
+    def _store_entry(self, request: PreparedRequest, response: Response) -> None:
+        """
+        Store the body and the validators (i.e., `ETag` and `Last-Modified`) of a response, then evict entries if needed.
+        """
+        vary_headers = [header.strip() for header in response.headers.get('Vary', '').split(',') if header.strip()]
+        if '*' in vary_headers:
+            return
+        entry_path_without_extension = self._get_entry_path_without_extension(request)
+        body = response.content
+        entry = {
+            'url': request.url,
+            'vary': {header: request.headers.get(header) for header in vary_headers},
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'headers': dict(response.headers),
+            'stored_at': time.time(),
+            'size': len(body),
+        }
+        self._delete_entry(entry_path_without_extension)
+
+        # IMPLEMENTATION NOTE: writing to a temporary file then renaming it,
+        #   so that concurrent readers never see a partially written body
+        tmp_suffix = f'.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(f'{entry_path_without_extension}.body{tmp_suffix}', 'wb') as file:
+            file.write(body)
+        with open(f'{entry_path_without_extension}.json{tmp_suffix}', 'w', encoding='utf-8') as file:
+            json.dump(entry, file, ensure_ascii=False)
+        os.replace(f'{entry_path_without_extension}.body{tmp_suffix}', f'{entry_path_without_extension}.body')
+        os.replace(f'{entry_path_without_extension}.json{tmp_suffix}', f'{entry_path_without_extension}.json')
+
+        with self._lock:
+            self._total_size += len(body)
+        self.evict()
+
+    def evict(self) -> None:
+        """
+        Evict the expired entries, then the least recently used entries until the cache fits in `max_size_bytes`.
+        """
+        with self._lock:
+            if self._total_size <= self.max_size_bytes:
+                return
+
+        bodies_paths = [os.path.join(self.cache_dir, file_name)
+                        for file_name in os.listdir(self.cache_dir) if file_name.endswith('.body')]
+        bodies_stats = []
+        for body_path in bodies_paths:
+            try:
+                bodies_stats.append((os.path.getmtime(body_path), body_path))
+            except FileNotFoundError:
+                pass
+
+        # least recently used first
+        for _, body_path in sorted(bodies_stats):
+            with self._lock:
+                if self._total_size <= self.max_size_bytes:
+                    break
+            logger.debug(f"Evicting HTTP cache entry: {body_path}")
+            self._delete_entry(body_path[:-len('.body')])
+
+    def _build_cached_response(self, request: PreparedRequest, entry: Dict[str, Any], not_modified_response: Response) -> Response:
+        """
+        Build a `200` response from a cached entry, after the server answered with `304 Not Modified`.
+        """
+        with open(entry['body_path'], 'rb') as file:
+            body = file.read()
+        # marking the entry as recently used
+        os.utime(entry['body_path'])
+
+        response = Response()
+        response.status_code = 200
+        response.reason = 'OK'
+        response.headers = CaseInsensitiveDict(entry['headers'])
+        # the 304 response may carry updated headers (e.g., a new `Date` or `Set-Cookie`)
+        response.headers.update(not_modified_response.headers)
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        response.elapsed = not_modified_response.elapsed
+        # IMPLEMENTATION NOTE: keeping the raw 304 response so that `requests.Session` still extracts its cookies
+        response.raw = not_modified_response.raw
+        response._content = body
+        response._content_consumed = True
+        response.from_cache = True
+        return response
+
+    def send(self, request: PreparedRequest, stream: bool = False, **kwargs: Any) -> Response:
+        if request.method != 'GET' or 'Range' in request.headers:
+            return super().send(request, stream=stream, **kwargs)
+
+        url = request.url
+        entry = self._load_entry(request)
+        if entry is not None:
+            if entry.get('etag'):
+                request.headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                request.headers['If-Modified-Since'] = entry['last_modified']
+
+        response = super().send(request, stream=stream, **kwargs)
+        response.from_cache = False
+
+        if response.status_code == 304 and entry is not None:
+            # releasing the connection back to the pool
+            response.content
+            logger.debug(f"HTTP cache hit (304): {url}")
+            return self._build_cached_response(request, entry, response)
+
+        if (response.status_code == 200 and not stream
+                and (response.headers.get('ETag') or response.headers.get('Last-Modified'))):
+            self._store_entry(request, response)
+
+        return response
@@ -0,0 +1,190 @@
+import os
+import json
+import hashlib
+from typing import Dict, List, Optional, Tuple, Any
+
+from requests import Session
+from pyprojroot import here
+
+from logaru_logger.the_logger import logger
+from odyash_general_functions.odyash_general_functions import save_data, ordered_bounded_map
+from forqan_academy_scraper.scraper import extract_lesson_info, get_max_in_flight
+
+
+def get_forqan_lessons_info_path(file_path: Optional[str] = None) -> str:
+    """
+    Get the path of the `forqan_lessons_info.json` file which is updated by the incremental crawl
+    (and saved by the full crawls, check `scraper.save_forqan_lessons_info()`).
+
+    Args:
+        file_path (str, optional): The path of the JSON file (relative to the project root).
+            Defaults to `forqan_lessons_info.json` inside the directory of the 'FINAL_OUTPUTS_DIR' environment variable.
+
+    Returns:
+        str: The absolute path of the JSON file.
+    """
+    if file_path is None:
+        file_path = os.path.join(os.getenv("FINAL_OUTPUTS_DIR"), "forqan_lessons_info.json")
+    return os.path.normpath(os.path.join(here(), file_path))
+
+
+def load_previous_forqan_lessons_info(file_path: Optional[str] = None) -> Dict[str, Dict]:
+    """
+    Loads the `forqan_lessons_info` dictionary saved by a previous crawl.
+
+    Args:
+        file_path (str, optional): The path of the JSON file (check `get_forqan_lessons_info_path()`).
+
+    Returns:
+        Dict[str, Dict]: The previous `forqan_lessons_info`, or an empty dictionary if no previous crawl was saved.
+    """
+    file_path = get_forqan_lessons_info_path(file_path)
+    if not os.path.exists(file_path):
+        logger.info(f"No previous forqan_lessons_info found in {file_path}, all lessons will be fetched")
+        return {}
+
+    with open(file_path, "r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+def _get_page_hash(html_string: str) -> str:
+    """
+    Get the SHA-256 hash of a page's HTML, which is stored in each lesson as 'page_hash' to detect changed pages.
+    """
+    return hashlib.sha256(html_string.encode("utf-8")).hexdigest()
+
+
+def diff_forqan_lessons(previous_forqan_lessons_info: Dict[str, Dict],
+                        lessons_names_and_urls_per_module: List[List[Tuple[str, str]]]) -> Dict[str, List[str]]:
+    """
+    Compares the lessons of a previous crawl with the lessons currently listed in the module pages.
+
+    The lessons are matched by URL (since the names of revision lessons are modified when they are stored).
+
+    Args:
+        previous_forqan_lessons_info (Dict[str, Dict]): The `forqan_lessons_info` of the previous crawl.
+        lessons_names_and_urls_per_module (List[List[Tuple[str, str]]]): The freshly fetched lessons of each module
+            (as returned by `get_lessons_name_and_urls_using_regex()`).
+
+    Returns:
+        Dict[str, List[str]]: The URLs of the lessons grouped into:
+        - 'new': lessons which weren't in the previous crawl.
+        - 'not_available': lessons which weren't available in the previous crawl.
+        - 'known': lessons which were available in the previous crawl.
+        - 'removed': lessons of the previous crawl which aren't listed anymore.
+    """
+    previous_lessons = {lesson["url"]: lesson
+                        for module_info in previous_forqan_lessons_info.values()
+                        for lesson in module_info.get("lessons", [])}
+    current_lessons_urls = [lesson_url
+                            for cur_module_lessons in lessons_names_and_urls_per_module
+                            for _, lesson_url in cur_module_lessons]
+
+    lessons_diff = {"new": [], "not_available": [], "known": [], "removed": []}
+    for lesson_url in current_lessons_urls:
+        if lesson_url not in previous_lessons:
+            lessons_diff["new"].append(lesson_url)
+        elif previous_lessons[lesson_url].get("not_available"):
+            lessons_diff["not_available"].append(lesson_url)
+        else:
+            lessons_diff["known"].append(lesson_url)
+    current_lessons_urls = set(current_lessons_urls)
+    lessons_diff["removed"] = [lesson_url for lesson_url in previous_lessons if lesson_url not in current_lessons_urls]
+
+    return lessons_diff
+
+
+def update_forqan_lessons_info(modules_name_and_html: List[Tuple[str, str]],
+                            forqan_modules_urls: List[str],
+                            lessons_names_and_urls_per_module: List[List[Tuple[str, str]]],
+                            session: Session,
+                            file_path: Optional[str] = None,
+                            recheck_known_lessons: Optional[bool] = None,
+                            max_in_flight: Optional[int] = None
+                            ) -> Dict[str, Dict]:
+    """
+    Incremental version of `get_video_urls_descriptions_and_pdf_metadata()`, which only fetches the lessons that may have changed since the previous crawl.
+
+    - Loads the previous `forqan_lessons_info` (check `load_previous_forqan_lessons_info()`),
+        then compares it with the freshly fetched lessons of each module (check `diff_forqan_lessons()`).
+    - Fetches (then parses) only the new lessons and the lessons which weren't available in the previous crawl.
+    - If `recheck_known_lessons` is True, the previously available lessons are fetched as well (so their changed pages are caught),
+        but they are only re-parsed if their page hash changed.
+    - Merges the results with the previous lessons (in the order of the fresh module lists), then saves them back to `file_path`.
+
+    Args:
+        modules_name_and_html (List[Tuple[str, str]]): A list of tuples containing module names and their HTML content.
+        forqan_modules_urls (List[str]): A list of URLs for each module.
+        lessons_names_and_urls_per_module (List[List[Tuple[str, str]]]): A nested list where each sublist contains tuples of lesson names and URLs for a module.
+        session (Session): The (logged-in) session used for fetching the lesson pages.
+        file_path (str, optional): The path of the JSON file to update (check `get_forqan_lessons_info_path()`).
+        recheck_known_lessons (bool, optional): Whether to re-fetch the previously available lessons (e.g., for a weekly full check,
+            which is cheaper when the session uses the HTTP cache, since an unchanged page is then revalidated by a `304 Not Modified` response).
+            Defaults to the 'INCREMENTAL_RECHECK_KNOWN_LESSONS' environment variable (disabled unless it is set to '1'),
+            so that a daily run only fetches a handful of lesson pages.
+        max_in_flight (int, optional): The maximum number of lesson pages fetched at the same time (check `get_max_in_flight()`).
+
+    Returns:
+        Dict[str, Dict]: The merged `forqan_lessons_info` (with a 'page_hash' for each fetched lesson).
+    """
+    if recheck_known_lessons is None:
+        recheck_known_lessons = os.getenv("INCREMENTAL_RECHECK_KNOWN_LESSONS", "0") == "1"
+
+    previous_forqan_lessons_info = load_previous_forqan_lessons_info(file_path)
+    previous_lessons = {lesson["url"]: lesson
+                        for module_info in previous_forqan_lessons_info.values()
+                        for lesson in module_info.get("lessons", [])}
+    lessons_diff = diff_forqan_lessons(previous_forqan_lessons_info, lessons_names_and_urls_per_module)
+    logger.info(f"Incremental crawl: {len(lessons_diff['new'])} new lessons, "
+                f"{len(lessons_diff['not_available'])} previously unavailable lessons, "
+                f"{len(lessons_diff['known'])} known lessons (rechecked: {recheck_known_lessons}), "
+                f"{len(lessons_diff['removed'])} removed lessons")
+
+    urls_to_fetch = set(lessons_diff["new"]) | set(lessons_diff["not_available"])
+    if recheck_known_lessons:
+        urls_to_fetch |= set(lessons_diff["known"])
+
+    # (lesson name, lesson url) of the lessons to fetch, in the order they are listed in the module pages
+    lessons_to_fetch = [(lesson_name, lesson_url)
+                        for cur_module_lessons in lessons_names_and_urls_per_module
+                        for lesson_name, lesson_url in cur_module_lessons
+                        if lesson_url in urls_to_fetch]
+
+    def _fetch_lesson_info(lesson: Tuple[str, str]) -> Dict[str, Any]:
+        lesson_name, lesson_url = lesson
+        logger.debug(f"lesson_url: {lesson_url}")
+        lesson_html_string = session.get(lesson_url).text
+        page_hash = _get_page_hash(lesson_html_string)
+
+        previous_lesson = previous_lessons.get(lesson_url)
+        if previous_lesson is not None and previous_lesson.get("page_hash") == page_hash:
+            logger.debug(f"lesson page didn't change: {lesson_url}")
+            return previous_lesson
+        return {**extract_lesson_info(lesson_name, lesson_url, lesson_html_string), "page_hash": page_hash}
+
+    fetched_lessons = {lesson_url: lesson_info
+                        for (_, lesson_url), lesson_info in zip(lessons_to_fetch,
+                                                                ordered_bounded_map(_fetch_lesson_info,
+                                                                                    lessons_to_fetch,
+                                                                                    get_max_in_flight(max_in_flight)))}
+
+    # merging the fetched lessons with the previous ones
+    forqan_lessons_info = {}
+    for i, ((module_name, _), module_url) in enumerate(zip(modules_name_and_html, forqan_modules_urls)):
+        module_num = f"{i+1:02d}"
+        forqan_lessons_info[f"module_{module_num}"] = {
+            "name": module_name,
+            "url": module_url,
+            "lessons": [fetched_lessons.get(lesson_url, previous_lessons.get(lesson_url))
+                        for _, lesson_url in lessons_names_and_urls_per_module[i]]
+        }
+
+    # saving the merged lessons info (then an intermediate copy for debugging purposes)
+    file_path = get_forqan_lessons_info_path(file_path)
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    with open(file_path, "w", encoding="utf-8") as file:
+        json.dump(forqan_lessons_info, file, ensure_ascii=False, indent=2)
+    logger.info(f"Incremental crawl: fetched {len(fetched_lessons)} lessons, merged lessons info saved to {file_path}")
+    save_data(forqan_lessons_info, "forqan_lessons_info", file_extension="json")
+
+    return forqan_lessons_info
@@ -0,0 +1,214 @@
+import os
+import functools
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterator, Optional
+
+
+# The only parts of a lesson page which are needed by `scraper.extract_lesson_info()`
+LESSON_MATERIALS_DIV_CLASS = 'ld-tab-content ld-visible lesson-materials-btns'
+REVISION_PDF_ANCHOR_CLASS = 'ui button fluid primary btn text-link'
+
+# - 'html.parser': BeautifulSoup's pure-Python parser, building the whole tree (i.e., the original behavior).
+# - 'strainer': same parser, but only the iframes, the lesson materials div and the revision-PDF anchors are built.
+# - 'lxml': lxml's C parser, queried directly (i.e., without building a BeautifulSoup tree). Requires `lxml` to be installed.
+LESSON_PARSER_BACKENDS = ('html.parser', 'strainer', 'lxml')
+
+
+def _normalize_class(class_value: Optional[str]) -> Optional[str]:
+    """
+    Normalize the whitespace of a raw `class` attribute, so that it can be compared to a whole class string
+    (the same way BeautifulSoup compares `class_='a b'` to the class values of a tag).
+    """
+    if class_value is None:
+        return None
+    return ' '.join(class_value.split())
+
+
+def _is_lesson_relevant_tag(name: str, attrs: Optional[Dict[str, str]]) -> bool:
+    """
+    Check whether a (top-level) tag of a lesson page is needed, based on its name and raw attributes.
+    """
+    if name == 'iframe':
+        return True
+    class_value = _normalize_class((attrs or {}).get('class'))
+    if name == 'div':
+        return class_value == LESSON_MATERIALS_DIV_CLASS
+    if name == 'a':
+        return class_value == REVISION_PDF_ANCHOR_CLASS
+    return False
+
+
+@functools.lru_cache(maxsize=None)
+def _get_lesson_page_strainer_class() -> type:
+    """
+    Get the class of the strainer which only lets BeautifulSoup build the relevant tags of a lesson page
+    (defined on first use, so that bs4 is only imported if a BeautifulSoup backend is used).
+    """
+    try:
+        # bs4 >= 4.13
+        from bs4.filter import ElementFilter
+    except ImportError:
+        # bs4 < 4.13: a function passed as the `name` of a SoupStrainer is called with the tag's name and attributes
+        from bs4 import SoupStrainer
+
+        class _LessonPageStrainer(SoupStrainer):
+            def __init__(self) -> None:
+                super().__init__(_is_lesson_relevant_tag)
+
+        return _LessonPageStrainer
+
+    class _LessonPageStrainer(ElementFilter):
+        """
+        Only lets BeautifulSoup build the relevant tags (with their subtrees) of a lesson page.
+        """
+        def allow_tag_creation(self, nsprefix: Optional[str], name: str, attrs: Optional[Dict[str, str]]) -> bool:
+            return _is_lesson_relevant_tag(name, attrs)
+
+        def allow_string_creation(self, string: str) -> bool:
+            return False
+
+    return _LessonPageStrainer
+
+
+def _get_lesson_page_strainer() -> Any:
+    return _get_lesson_page_strainer_class()()
+
+
+class LessonPage(ABC):
+    """
+    The parsed parts of a lesson page which the scraper needs.
+
+    Use `parse_lesson_page()` to create it with the selected backend.
+    """
+
+    @abstractmethod
+    def get_video_url(self) -> Optional[str]:
+        """
+        Get the `src` of the first iframe of the page (i.e., the lesson's video), or None if there is no iframe.
+        """
+
+    @abstractmethod
+    def get_materials_text(self) -> Optional[str]:
+        """
+        Get the text of the lesson materials div, where each text node is stripped and separated by an empty line
+        (i.e., `div_tag.get_text(separator='\\n\\n', strip=True)`), or None if there is no such div.
+        """
+
+    @abstractmethod
+    def get_pdf_url(self) -> Optional[str]:
+        """
+        Get the `href` of the revision-PDF anchor, or None if there is no such anchor.
+        """
+
+    @abstractmethod
+    def get_debug_html(self) -> str:
+        """
+        Get the (parsed) HTML of the page for debugging purposes.
+        """
+
+
+class _SoupLessonPage(LessonPage):
+    def __init__(self, lesson_html_string: str, strained: bool) -> None:
+        from bs4 import BeautifulSoup
+
+        parse_only = _get_lesson_page_strainer() if strained else None
+        self.soup = BeautifulSoup(lesson_html_string, 'html.parser', parse_only=parse_only)
+
+    def get_video_url(self) -> Optional[str]:
+        iframe_tag = self.soup.find('iframe')
+        return iframe_tag.get('src') if iframe_tag is not None else None
+
+    def get_materials_text(self) -> Optional[str]:
+        div_tag = self.soup.find('div', class_=LESSON_MATERIALS_DIV_CLASS)
+        return div_tag.get_text(separator='\n\n', strip=True) if div_tag is not None else None
+
+    def get_pdf_url(self) -> Optional[str]:
+        a_tag = self.soup.find('a', class_=REVISION_PDF_ANCHOR_CLASS)
+        return a_tag.get('href') if a_tag is not None else None
+
+    def get_debug_html(self) -> str:
+        return self.soup.prettify()
+
+
+class _LxmlLessonPage(LessonPage):
+    # the strings of these tags are excluded by BeautifulSoup's `get_text()` as well
+    _NON_TEXT_TAGS = ('script', 'style', 'template')
+
+    def __init__(self, lesson_html_string: str) -> None:
+        try:
+            import lxml.html
+        except ImportError as e:
+            raise ImportError("The 'lxml' lesson parser backend requires lxml, install it using `pip install lxml`") from e
+        self._lxml_html = lxml.html
+        self.root = lxml.html.document_fromstring(lesson_html_string)
+
+    def _find_by_class(self, tag_name: str, class_value: str):
+        for element in self.root.iter(tag_name):
+            if _normalize_class(element.get('class')) == class_value:
+                return element
+        return None
+
+    def _iter_strings(self, element, is_root: bool = True) -> Iterator[str]:
+        # IMPLEMENTATION NOTE: comments (and processing instructions) have a function as their `tag`
+        if isinstance(element.tag, str) and element.tag not in self._NON_TEXT_TAGS:
+            if element.text:
+                yield element.text
+            for child in element:
+                yield from self._iter_strings(child, is_root=False)
+        if not is_root and element.tail:
+            yield element.tail
+
+    def get_video_url(self) -> Optional[str]:
+        iframe_element = next(self.root.iter('iframe'), None)
+        return iframe_element.get('src') if iframe_element is not None else None
+
+    def get_materials_text(self) -> Optional[str]:
+        div_element = self._find_by_class('div', LESSON_MATERIALS_DIV_CLASS)
+        if div_element is None:
+            return None
+        return '\n\n'.join(string.strip() for string in self._iter_strings(div_element) if string.strip())
+
+    def get_pdf_url(self) -> Optional[str]:
+        a_element = self._find_by_class('a', REVISION_PDF_ANCHOR_CLASS)
+        return a_element.get('href') if a_element is not None else None
+
+    def get_debug_html(self) -> str:
+        return self._lxml_html.tostring(self.root, encoding='unicode', pretty_print=True)
+
+
+def get_lesson_parser_backend(backend: Optional[str] = None) -> str:
+    """
+    Get the parser backend used for lesson pages.
+
+    Args:
+        backend (str, optional): One of `LESSON_PARSER_BACKENDS`.
+            Defaults to the 'LESSON_PARSER_BACKEND' environment variable, or 'strainer' if it isn't set.
+
+    Returns:
+        str: The parser backend.
+
+    Raises:
+        ValueError: If the backend is invalid.
+    """
+    if backend is None:
+        backend = os.getenv('LESSON_PARSER_BACKEND', 'strainer')
+    if backend not in LESSON_PARSER_BACKENDS:
+        raise ValueError(f"Invalid lesson parser backend: {backend}. Supported backends are: {', '.join(LESSON_PARSER_BACKENDS)}")
+    return backend
+
+
+def parse_lesson_page(lesson_html_string: str, backend: Optional[str] = None) -> LessonPage:
+    """
+    Parse a lesson page using the selected backend (check `get_lesson_parser_backend()`).
+
+    Args:
+        lesson_html_string (str): The HTML of the lesson page.
+        backend (str, optional): The parser backend. Defaults to None.
+
+    Returns:
+        LessonPage: The parsed lesson page.
+    """
+    backend = get_lesson_parser_backend(backend)
+    if backend == 'lxml':
+        return _LxmlLessonPage(lesson_html_string)
+    return _SoupLessonPage(lesson_html_string, strained=(backend == 'strainer'))
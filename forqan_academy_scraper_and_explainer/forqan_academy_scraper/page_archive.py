@@ -0,0 +1,411 @@
+import os
+import time
+import zlib
+import sqlite3
+import hashlib
+import importlib
+import importlib.util
+import threading
+from collections import Counter
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urljoin
+
+from requests import Response
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from pyprojroot import here
+
+from logaru_logger.the_logger import logger
+from odyash_general_functions.run_manifest import get_run_id
+
+
+# The compression codecs of the archived bodies ('zstd' requires the `zstandard` package)
+PAGE_ARCHIVE_CODECS = ('zlib', 'zstd')
+# The maximum size of the shared compression dictionary of each codec
+# EXPLANATION NOTE: zlib can only refer back to the last 32 KB, so a larger dictionary would be useless
+_DICTIONARY_MAX_SIZES = {'zlib': 32 * 1024, 'zstd': 112 * 1024}
+
+# The maximum number of archived redirects followed by `ReplaySession` (the same as `requests`)
+_MAX_REDIRECTS = 30
+# The columns of the captures returned by `PageArchive.get_capture()` and `PageArchive.iter_captures()`
+_CAPTURE_COLUMNS = ('url', 'method', 'crawl_id', 'fetched_at', 'status_code', 'content_type', 'sha256', 'location')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS bodies (
+    sha256 TEXT PRIMARY KEY,
+    offset INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    raw_size INTEGER NOT NULL,
+    codec TEXT NOT NULL,
+    dictionary_id INTEGER
+);
+CREATE TABLE IF NOT EXISTS captures (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL,
+    method TEXT NOT NULL,
+    crawl_id TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    status_code INTEGER NOT NULL,
+    content_type TEXT,
+    sha256 TEXT NOT NULL REFERENCES bodies (sha256),
+    location TEXT
+);
+CREATE INDEX IF NOT EXISTS captures_url ON captures (url, method, fetched_at);
+CREATE INDEX IF NOT EXISTS captures_crawl ON captures (crawl_id, fetched_at);
+CREATE TABLE IF NOT EXISTS dictionaries (
+    id INTEGER PRIMARY KEY,
+    codec TEXT NOT NULL,
+    data BLOB NOT NULL
+);
+"""
+
+
+def get_page_archive_dir(archive_dir: Optional[str] = None) -> str:
+    """
+    Get the directory where the fetched pages are archived.
+
+    Args:
+        archive_dir (str, optional): The archive directory (relative to the project root).
+            Defaults to the 'PAGE_ARCHIVE_DIR' environment variable, or 'data_files/page_archive' if it isn't set.
+
+    Returns:
+        str: The absolute path of the archive directory.
+    """
+    if archive_dir is None:
+        archive_dir = os.getenv('PAGE_ARCHIVE_DIR', os.path.join('data_files', 'page_archive'))
+    return os.path.normpath(os.path.join(here(), archive_dir))
+
+
+def _get_default_codec() -> str:
+    codec = os.getenv('PAGE_ARCHIVE_CODEC')
+    if codec is None:
+        codec = 'zstd' if importlib.util.find_spec('zstandard') is not None else 'zlib'
+    if codec not in PAGE_ARCHIVE_CODECS:
+        raise ValueError(f"Invalid page archive codec: {codec}. Supported codecs are: {', '.join(PAGE_ARCHIVE_CODECS)}")
+    return codec
+
+
+def build_shared_dictionary(samples: List[bytes], max_size: int) -> bytes:
+    """
+    Build a compression dictionary from the lines shared by most of the sample pages (i.e., the site's boilerplate).
+
+    The most common lines are placed at the end of the dictionary, since the compressors refer to the end of the dictionary more cheaply.
+
+    Args:
+        samples (List[bytes]): The bodies of the sample pages.
+        max_size (int): The maximum size of the dictionary (in bytes).
+
+    Returns:
+        bytes: The dictionary.
+    """
+    lines_counts = Counter(line for sample in samples for line in set(sample.splitlines(keepends=True)) if line.strip())
+    min_count = max(2, len(samples) // 2)
+    shared_lines = [line for line, count in sorted(lines_counts.items(), key=lambda item: item[1]) if count >= min_count]
+    return b''.join(shared_lines)[-max_size:]
+
+
+class PageArchive:
+    """
+    A compact, WARC-like archive of the fetched pages, so that the extractors can be re-run offline over the whole catalogue
+    (check `ReplaySession` and `replay_forqan_lessons_info()`).
+
+    - Each capture (URL, method, crawl ID, fetch time, status code, and content type) is indexed in `<archive_dir>/index.sqlite3`.
+    - Each distinct body is stored once (keyed by its SHA-256 hash), so the unchanged pages of later crawls only add an index row.
+    - The bodies are appended to `<archive_dir>/bodies.dat`, compressed using a dictionary shared by all the pages
+        (built from the boilerplate of the first `dictionary_samples` pages, check `build_shared_dictionary()`),
+        since the LearnDash pages are mostly identical markup around a small amount of content.
+
+    Notes:
+    - The archive is thread safe, but it should only be written by one process at a time.
+    - The crawl ID defaults to the ID of the run (check `run_manifest.get_run_id()`).
+    - The archive keeps every archived page (the authenticated ones included) until its directory is deleted,
+        so `scraper.login()` only archives the pages if the 'USE_PAGE_ARCHIVE' environment variable is set to '1'.
+    """
+
+    def __init__(self,
+                archive_dir: Optional[str] = None,
+                codec: Optional[str] = None,
+                dictionary_samples: Optional[int] = None,
+                crawl_id: Optional[str] = None) -> None:
+        """
+        Args:
+            archive_dir (str, optional): The archive directory (check `get_page_archive_dir()`).
+            codec (str, optional): One of `PAGE_ARCHIVE_CODECS`. Defaults to the 'PAGE_ARCHIVE_CODEC' environment variable,
+                or 'zstd' if `zstandard` is installed (and 'zlib' otherwise).
+            dictionary_samples (int, optional): The number of pages the shared dictionary is built from.
+                Defaults to the 'PAGE_ARCHIVE_DICTIONARY_SAMPLES' environment variable, or 32.
+            crawl_id (str, optional): The ID of the captures added by this instance. Defaults to `run_manifest.get_run_id()`.
+        """
+        self.archive_dir = get_page_archive_dir(archive_dir)
+        os.makedirs(self.archive_dir, exist_ok=True)
+        self.codec = codec or _get_default_codec()
+        self.dictionary_samples = dictionary_samples if dictionary_samples is not None \
+            else int(os.getenv('PAGE_ARCHIVE_DICTIONARY_SAMPLES', '32'))
+        self.crawl_id = crawl_id or get_run_id()
+        self._dictionary_min_samples = self.dictionary_samples
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(os.path.join(self.archive_dir, 'index.sqlite3'), check_same_thread=False)
+        self._connection.execute('PRAGMA journal_mode = WAL')
+        self._connection.executescript(_SCHEMA)
+        # the archives created before the redirects were archived have no `location` column
+        if 'location' not in [column[1] for column in self._connection.execute('PRAGMA table_info(captures)')]:
+            self._connection.execute('ALTER TABLE captures ADD COLUMN location TEXT')
+        self._bodies_file = open(os.path.join(self.archive_dir, 'bodies.dat'), 'a+b')
+        self._dictionaries: Dict[int, Tuple[str, bytes]] = {
+            dictionary_id: (codec, data) for dictionary_id, codec, data in self._connection.execute('SELECT id, codec, data FROM dictionaries')}
+
+    def close(self) -> None:
+        with self._lock:
+            self._bodies_file.close()
+            self._connection.close()
+
+    def __enter__(self) -> 'PageArchive':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _get_dictionary_id(self) -> Optional[int]:
+        """
+        Get the ID of the shared dictionary of the codec, building it once enough pages were archived (or None until then).
+        """
+        # IMPLEMENTATION NOTE: should be called while holding `self._lock`
+        for dictionary_id, (codec, _) in self._dictionaries.items():
+            if codec == self.codec:
+                return dictionary_id
+        samples_rows = self._connection.execute("SELECT sha256 FROM bodies WHERE dictionary_id IS NULL LIMIT ?",
+                                                (self._dictionary_min_samples,)).fetchall()
+        if self._dictionary_min_samples <= 0 or len(samples_rows) < self._dictionary_min_samples:
+            return None
+
+        samples = [self._read_body(sha256) for (sha256,) in samples_rows]
+        dictionary = build_shared_dictionary(samples, _DICTIONARY_MAX_SIZES[self.codec])
+        if not dictionary:
+            # i.e., the pages have nothing in common (yet), so trying again once there are twice as many pages
+            self._dictionary_min_samples *= 2
+            return None
+        with self._connection:
+            dictionary_id = self._connection.execute('INSERT INTO dictionaries (codec, data) VALUES (?, ?)', (self.codec, dictionary)).lastrowid
+        self._dictionaries[dictionary_id] = (self.codec, dictionary)
+        logger.info(f"Built the page archive's {self.codec} dictionary ({len(dictionary)} bytes) from {len(samples)} pages")
+        return dictionary_id
+
+    def _compress(self, body: bytes, dictionary_id: Optional[int]) -> bytes:
+        dictionary = self._dictionaries[dictionary_id][1] if dictionary_id is not None else None
+        if self.codec == 'zstd':
+            zstandard = importlib.import_module('zstandard')
+            dict_data = zstandard.ZstdCompressionDict(dictionary, dict_type=zstandard.DICT_TYPE_RAWCONTENT) if dictionary else None
+            return zstandard.ZstdCompressor(level=10, dict_data=dict_data).compress(body)
+        compressor = zlib.compressobj(9, zdict=dictionary) if dictionary else zlib.compressobj(9)
+        return compressor.compress(body) + compressor.flush()
+
+    def _decompress(self, compressed_body: bytes, codec: str, dictionary_id: Optional[int]) -> bytes:
+        dictionary = self._dictionaries[dictionary_id][1] if dictionary_id is not None else None
+        if codec == 'zstd':
+            zstandard = importlib.import_module('zstandard')
+            dict_data = zstandard.ZstdCompressionDict(dictionary, dict_type=zstandard.DICT_TYPE_RAWCONTENT) if dictionary else None
+            return zstandard.ZstdDecompressor(dict_data=dict_data).decompress(compressed_body)
+        decompressor = zlib.decompressobj(zdict=dictionary) if dictionary else zlib.decompressobj()
+        return decompressor.decompress(compressed_body) + decompressor.flush()
+
+    def _read_body(self, sha256: str) -> bytes:
+        row = self._connection.execute('SELECT offset, length, codec, dictionary_id FROM bodies WHERE sha256 = ?', (sha256,)).fetchone()
+        if row is None:
+            raise KeyError(f"No archived body has the hash {sha256}")
+        offset, length, codec, dictionary_id = row
+        self._bodies_file.flush()
+        # IMPLEMENTATION NOTE: `os.pread` doesn't move the file's position (i.e., the appends aren't affected),
+        #   but it's missing on Windows
+        if hasattr(os, 'pread'):
+            compressed_body = os.pread(self._bodies_file.fileno(), length, offset)
+        else:
+            self._bodies_file.seek(offset)
+            compressed_body = self._bodies_file.read(length)
+        return self._decompress(compressed_body, codec, dictionary_id)
+
+    def add(self,
+            url: str,
+            body: bytes,
+            method: str = 'GET',
+            status_code: int = 200,
+            content_type: Optional[str] = None,
+            fetched_at: Optional[float] = None,
+            location: Optional[str] = None) -> str:
+        """
+        Archive a fetched page (its body is only stored if no other capture has the same body).
+
+        A redirect is archived with its `Location` header (e.g., the login `POST` redirecting to the page listing the modules),
+        so that `ReplaySession` follows it like `requests` does.
+
+        Returns:
+            str: The SHA-256 hash of the body.
+        """
+        sha256 = hashlib.sha256(body).hexdigest()
+        with self._lock:
+            if self._connection.execute('SELECT 1 FROM bodies WHERE sha256 = ?', (sha256,)).fetchone() is None:
+                dictionary_id = self._get_dictionary_id()
+                compressed_body = self._compress(body, dictionary_id)
+                self._bodies_file.seek(0, os.SEEK_END)
+                offset = self._bodies_file.tell()
+                self._bodies_file.write(compressed_body)
+                # the body is written before it's indexed, so the index never points at missing data
+                self._bodies_file.flush()
+                self._connection.execute('INSERT INTO bodies (sha256, offset, length, raw_size, codec, dictionary_id) VALUES (?, ?, ?, ?, ?, ?)',
+                                        (sha256, offset, len(compressed_body), len(body), self.codec, dictionary_id))
+            self._connection.execute('INSERT INTO captures (url, method, crawl_id, fetched_at, status_code, content_type, sha256, location) '
+                                    'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                                    (url, method.upper(), self.crawl_id, fetched_at or time.time(), status_code, content_type, sha256, location))
+            self._connection.commit()
+        return sha256
+
+    def response_hook(self, response: Response, *args: Any, stream: bool = False, **kwargs: Any) -> None:
+        """
+        A `requests` response hook which archives the successful HTML responses and the redirects
+        (e.g., `session.hooks['response'].append(archive.response_hook)`).
+
+        Streamed responses (e.g., the PDF downloads) aren't archived, since reading their body here would consume it.
+        """
+        # EXPLANATION NOTE: the hook is called for each response of a redirect chain (before `response.history` is set),
+        #   so a redirect is archived under its own request (e.g., `POST /login/`), then the page it redirects to under the redirected request
+        content_type = response.headers.get('Content-Type', '')
+        if stream:
+            return
+        try:
+            if response.is_redirect:
+                self.add(response.url, b'', response.request.method, response.status_code, content_type or None,
+                        location=response.headers['Location'])
+            elif response.status_code == 200 and content_type.startswith('text/html'):
+                self.add(response.url, response.content, response.request.method, response.status_code, content_type)
+        except Exception as e:
+            # the archive is only a by-product of the crawl, so it never fails it
+            logger.error(f"Failed to archive this page: {response.url} ({e})")
+
+    def get_capture(self, url: str, method: str = 'GET', crawl_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Get the latest capture of a URL (in the given crawl, if any), or None if it wasn't archived.
+        """
+        sql = 'SELECT url, method, crawl_id, fetched_at, status_code, content_type, sha256, location FROM captures WHERE url = ? AND method = ?'
+        parameters: List[Any] = [url, method.upper()]
+        if crawl_id is not None:
+            sql += ' AND crawl_id = ?'
+            parameters.append(crawl_id)
+        with self._lock:
+            row = self._connection.execute(sql + ' ORDER BY fetched_at DESC LIMIT 1', parameters).fetchone()
+        if row is None:
+            return None
+        return dict(zip(_CAPTURE_COLUMNS, row))
+
+    def get_body(self, sha256: str) -> bytes:
+        with self._lock:
+            return self._read_body(sha256)
+
+    def iter_captures(self, crawl_id: Optional[str] = None) -> Iterator[Tuple[Dict[str, Any], bytes]]:
+        """
+        Iterate over the latest capture of each URL (in the given crawl, if any) along with its body, in the order they were fetched.
+        """
+        sql = ('SELECT url, method, crawl_id, MAX(fetched_at), status_code, content_type, sha256, location FROM captures '
+            + ('WHERE crawl_id = ? ' if crawl_id is not None else '') + 'GROUP BY url, method ORDER BY MAX(fetched_at)')
+        with self._lock:
+            rows = self._connection.execute(sql, [crawl_id] if crawl_id is not None else []).fetchall()
+        for row in rows:
+            capture = dict(zip(_CAPTURE_COLUMNS, row))
+            yield capture, self.get_body(capture['sha256'])
+
+    def get_crawls(self) -> List[Dict[str, Any]]:
+        """
+        Get the ID, the start and end times, and the number of captures of each crawl (oldest first).
+        """
+        with self._lock:
+            rows = self._connection.execute('SELECT crawl_id, MIN(fetched_at), MAX(fetched_at), COUNT(*) FROM captures '
+                                            'GROUP BY crawl_id ORDER BY MIN(fetched_at)').fetchall()
+        return [{'crawl_id': crawl_id, 'started_at': started_at, 'ended_at': ended_at, 'captures': captures}
+                for crawl_id, started_at, ended_at, captures in rows]
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Get the number of captures and distinct bodies, and the raw and stored (i.e., compressed) sizes of the bodies.
+        """
+        with self._lock:
+            captures, = self._connection.execute('SELECT COUNT(*) FROM captures').fetchone()
+            bodies, raw_size, stored_size = self._connection.execute('SELECT COUNT(*), SUM(raw_size), SUM(length) FROM bodies').fetchone()
+        return {'captures': captures, 'bodies': bodies, 'raw_size': raw_size or 0, 'stored_size': stored_size or 0}
+
+
+@lru_cache(maxsize=None)
+def get_page_archive(archive_dir: Optional[str] = None) -> PageArchive:
+    """
+    Get the archive of a directory (check `get_page_archive_dir()`), shared by all the sessions of the process.
+    """
+    return PageArchive(archive_dir)
+
+
+class ReplaySession:
+    """
+    A stand-in for the logged-in session, which answers `get()` (and `post()`) with the archived pages instead of fetching them,
+    so that the scraper's extractors can be re-run offline (check `replay_forqan_lessons_info()`).
+
+    The archived redirects are followed like `requests` does (i.e., a redirected `POST` becomes a `GET`, except for 307 and 308).
+    """
+
+    def __init__(self, archive: PageArchive, crawl_id: Optional[str] = None) -> None:
+        self.archive = archive
+        self.crawl_id = crawl_id
+
+    def request(self, method: str, url: str, *args: Any, **kwargs: Any) -> Response:
+        capture = self.archive.get_capture(url, method, self.crawl_id)
+        for _ in range(_MAX_REDIRECTS):
+            if capture is None or capture['location'] is None:
+                break
+            if capture['status_code'] not in (307, 308):
+                method = 'GET'
+            url = urljoin(url, capture['location'])
+            capture = self.archive.get_capture(url, method, self.crawl_id)
+        if capture is None:
+            raise KeyError(f"This page wasn't archived: {method.upper()} {url}")
+
+        response = Response()
+        response.status_code = capture['status_code']
+        response.headers = CaseInsensitiveDict({'Content-Type': capture['content_type'] or 'text/html'})
+        response.encoding = get_encoding_from_headers(response.headers) or 'utf-8'
+        response.url = url
+        response._content = self.archive.get_body(capture['sha256'])
+        response._content_consumed = True
+        return response
+
+    def get(self, url: str, **kwargs: Any) -> Response:
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs: Any) -> Response:
+        return self.request('POST', url, **kwargs)
+
+
+def replay_forqan_lessons_info(archive: Optional[PageArchive] = None,
+                            crawl_id: Optional[str] = None,
+                            max_in_flight: Optional[int] = None) -> Dict[str, Dict]:
+    """
+    Re-run the scraper's extractors over the archived pages of a crawl (e.g., after changing an extraction rule),
+    without fetching anything.
+
+    Args:
+        archive (PageArchive, optional): The archive. Defaults to `get_page_archive()`.
+        crawl_id (str, optional): Only use the pages of this crawl (check `PageArchive.get_crawls()`). Defaults to the latest capture of each page.
+        max_in_flight (int, optional): The number of threads parsing the pages. Defaults to the 'MAX_IN_FLIGHT_REQUESTS' environment variable.
+
+    Returns:
+        Dict[str, Dict]: The same dictionary as `scraper.crawl_forqan_lessons_info()`.
+
+    Raises:
+        KeyError: If a page needed by the extractors wasn't archived.
+    """
+    # IMPLEMENTATION NOTE: imported here, since `scraper` imports this module (for the response hook, when the archive is used)
+    from forqan_academy_scraper import scraper as fsc
+    from forqan_academy_scraper import extraction_rules as er
+
+    if archive is None:
+        archive = get_page_archive()
+    session = ReplaySession(archive, crawl_id)
+    login_response_html_string = session.post(f'{er.get_forqan_base_url()}/login/').text
+    forqan_modules_urls = fsc.get_forqan_modules_urls_using_regex(login_response_html_string)
+    return fsc.crawl_forqan_lessons_info(forqan_modules_urls, session, max_in_flight)
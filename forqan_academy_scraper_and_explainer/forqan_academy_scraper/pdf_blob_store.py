@@ -0,0 +1,261 @@
+import os
+import json
+import shutil
+import hashlib
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from requests import Session
+
+from logaru_logger.the_logger import logger
+from odyash_general_functions.odyash_general_functions import ordered_bounded_map, get_directory
+from forqan_academy_scraper.pdf_downloads import DOWNLOAD_CHUNK_SIZE, download_file, is_already_downloaded
+
+
+def get_file_sha256(file_path: str) -> str:
+    """
+    Get the SHA-256 hash of a file's content (read in chunks).
+    """
+    sha256 = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(DOWNLOAD_CHUNK_SIZE), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+class PdfBlobStore:
+    """
+    A content-addressed store where each distinct PDF is kept once, named by the SHA-256 hash of its content.
+
+    - The blobs are stored in `<root_dir>/<first 2 chars of the hash>/<hash>.pdf`.
+    - The per-module files (e.g., `revisions_pdfs/<module_name>/<pdf_name>.pdf`) are hardlinks to the blobs
+        (or copies, if the file system doesn't support hardlinks).
+    - `manifest.json` maps each downloaded URL to the hash of its content (so a known URL is never downloaded again, across runs),
+        and each linked file path to the hash of its blob (and, if the file is a copy, to its size and modification time,
+        so an unchanged copy isn't copied again by the next runs).
+    - The changes to the manifest are appended to `manifest.journal.jsonl` (a line per change), and are only merged into `manifest.json`
+        when the store is loaded again (or `compact()` is called), so a run over N PDFs doesn't rewrite the whole manifest N times.
+
+    Notes:
+    - Since the URL to hash lookups are memoized, a PDF which changes on the server while keeping the same URL isn't re-downloaded.
+        Call `forget_url()` (or delete the manifest) to force it.
+    """
+
+    def __init__(self, root_dir: Optional[str] = None) -> None:
+        """
+        Args:
+            root_dir (str, optional): The directory of the store (relative to the directory of the 'FINAL_OUTPUTS_DIR' environment variable).
+                Defaults to 'revisions_pdfs/.blobs'.
+        """
+        if root_dir is None:
+            root_dir = os.path.join("revisions_pdfs", ".blobs")
+        self.root_dir = get_directory(root_dir, intermediate_output=False)
+        self.incoming_dir = os.path.join(self.root_dir, "incoming")
+        os.makedirs(self.incoming_dir, exist_ok=True)
+        self.manifest_path = os.path.join(self.root_dir, "manifest.json")
+        self.journal_path = os.path.join(self.root_dir, "manifest.journal.jsonl")
+        self._lock = threading.Lock()
+        self._manifest = {"urls": {}, "links": {}, "copies": {}}
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, "r", encoding="utf-8") as file:
+                self._manifest.update(json.load(file))
+        if os.path.exists(self.journal_path):
+            self._replay_journal()
+            self.compact()
+
+    def _apply_change(self, change: Dict) -> None:
+        if change["op"] == "add_url":
+            self._manifest["urls"][change["url"]] = {"sha256": change["sha256"], "size": change["size"]}
+        elif change["op"] == "forget_url":
+            self._manifest["urls"].pop(change["url"], None)
+        elif change["op"] == "link":
+            self._manifest["links"][change["file_path"]] = change["sha256"]
+            if change.get("copy") is not None:
+                self._manifest["copies"][change["file_path"]] = change["copy"]
+            else:
+                self._manifest["copies"].pop(change["file_path"], None)
+
+    def _replay_journal(self) -> None:
+        with open(self.journal_path, "r", encoding="utf-8") as file:
+            for line in file:
+                try:
+                    self._apply_change(json.loads(line))
+                except json.JSONDecodeError:
+                    # the last line may have been partially written when the process was killed
+                    continue
+
+    def _record_change(self, change: Dict) -> None:
+        # IMPLEMENTATION NOTE: should be called while holding `self._lock`
+        self._apply_change(change)
+        with open(self.journal_path, "a", encoding="utf-8") as file:
+            file.write(json.dumps(change, ensure_ascii=False) + "\n")
+
+    def compact(self) -> None:
+        """
+        Merge the journal into `manifest.json` (written to a temporary file then renamed), then empty the journal.
+        """
+        with self._lock:
+            with open(f"{self.manifest_path}.tmp", "w", encoding="utf-8") as file:
+                json.dump(self._manifest, file, ensure_ascii=False, indent=2)
+            os.replace(f"{self.manifest_path}.tmp", self.manifest_path)
+            if os.path.exists(self.journal_path):
+                os.remove(self.journal_path)
+
+    def get_blob_path(self, sha256: str) -> str:
+        return os.path.join(self.root_dir, sha256[:2], f"{sha256}.pdf")
+
+    def get_url_hash(self, url: str) -> Optional[str]:
+        """
+        Get the hash of a previously downloaded URL, or None if it is unknown (or if its blob was deleted).
+        """
+        with self._lock:
+            url_entry = self._manifest["urls"].get(url)
+        if url_entry is None or not os.path.exists(self.get_blob_path(url_entry["sha256"])):
+            return None
+        return url_entry["sha256"]
+
+    def forget_url(self, url: str) -> None:
+        with self._lock:
+            if url in self._manifest["urls"]:
+                self._record_change({"op": "forget_url", "url": url})
+
+    def get_incoming_path(self, url: str) -> str:
+        """
+        Get the path where a URL is downloaded before being added to the store (stable per URL, so that downloads can be resumed).
+        """
+        return os.path.join(self.incoming_dir, f"{hashlib.sha256(url.encode('utf-8')).hexdigest()}.pdf")
+
+    def add_file(self, file_path: str, url: Optional[str] = None, keep_file: bool = False) -> str:
+        """
+        Add a file to the store (if its content isn't already stored), and remember the URL it was downloaded from.
+
+        Args:
+            file_path (str): The path of the file.
+            url (str, optional): The URL of the file. Defaults to None.
+            keep_file (bool, optional): If True, the blob is hardlinked to the file (e.g., for adopting an existing per-module file),
+                otherwise the file is moved into the store. Defaults to False.
+
+        Returns:
+            str: The SHA-256 hash of the file's content.
+        """
+        sha256 = get_file_sha256(file_path)
+        blob_path = self.get_blob_path(sha256)
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        with self._lock:
+            if os.path.exists(blob_path):
+                if not keep_file:
+                    os.remove(file_path)
+            elif keep_file:
+                self._link_or_copy(file_path, blob_path)
+            else:
+                os.replace(file_path, blob_path)
+
+            if url is not None:
+                self._record_change({"op": "add_url", "url": url, "sha256": sha256, "size": os.path.getsize(blob_path)})
+        return sha256
+
+    @staticmethod
+    def _link_or_copy(source_path: str, destination_path: str) -> bool:
+        """
+        Hardlink `source_path` to `destination_path`, or copy it if hardlinks aren't supported.
+
+        Returns:
+            bool: True if the file was hardlinked, False if it was copied.
+        """
+        tmp_path = f"{destination_path}.{threading.get_ident()}.tmp"
+        try:
+            os.link(source_path, tmp_path)
+            hardlinked = True
+        except OSError:
+            logger.debug(f"Hardlinks aren't supported, copying {source_path} instead")
+            shutil.copyfile(source_path, tmp_path)
+            hardlinked = False
+        os.replace(tmp_path, destination_path)
+        return hardlinked
+
+    @staticmethod
+    def _get_copy_stat(file_path: str) -> Dict[str, int]:
+        file_stat = os.stat(file_path)
+        return {"size": file_stat.st_size, "mtime_ns": file_stat.st_mtime_ns}
+
+    def link(self, sha256: str, file_path: str) -> None:
+        """
+        Make `file_path` point at the blob of the given hash (replacing `file_path` if it exists and has a different content).
+        """
+        blob_path = self.get_blob_path(sha256)
+        with self._lock:
+            linked_sha256 = self._manifest["links"].get(file_path)
+            recorded_copy_stat = self._manifest["copies"].get(file_path)
+
+        copy_stat = None
+        if os.path.exists(file_path) and os.path.samefile(blob_path, file_path):
+            pass
+        # EXPLANATION NOTE: without hardlinks, the file is a copy of the blob (so `samefile()` is always False),
+        #   and it's only copied again if it isn't the copy recorded in the manifest (e.g., if it was modified or deleted)
+        elif os.path.exists(file_path) and linked_sha256 == sha256 and recorded_copy_stat == self._get_copy_stat(file_path):
+            return
+        else:
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            if not self._link_or_copy(blob_path, file_path):
+                copy_stat = self._get_copy_stat(file_path)
+
+        with self._lock:
+            if self._manifest["links"].get(file_path) != sha256 or self._manifest["copies"].get(file_path) != copy_stat:
+                self._record_change({"op": "link", "file_path": file_path, "sha256": sha256, "copy": copy_stat})
+
+
+def download_pdfs_to_blob_store(pdfs_to_download: List[Tuple[str, str]],
+                                session: Session,
+                                blob_store: PdfBlobStore,
+                                max_in_flight: int = 1) -> Dict[str, int]:
+    """
+    Download PDFs into a content-addressed store (check `PdfBlobStore`), then link each per-module file path to its blob.
+
+    - Each distinct URL is handled once, even if it is linked from several lessons/modules.
+    - A URL which is already in the store's manifest isn't requested at all.
+    - An existing per-module file (e.g., downloaded before the store was used) is adopted into the store if it's complete.
+    - Otherwise, the URL is downloaded (streamed and resumable, check `pdf_downloads.download_file()`) then added to the store.
+
+    Args:
+        pdfs_to_download (List[Tuple[str, str]]): The URL and the file path of each PDF.
+        session (Session): The (pooled) session used for the requests.
+        blob_store (PdfBlobStore): The store where the PDFs are kept.
+        max_in_flight (int, optional): The maximum number of concurrent downloads. Defaults to 1.
+
+    Returns:
+        Dict[str, int]: The number of URLs per outcome: 'skipped' (already stored), 'downloaded', 'resumed', or 'failed'.
+    """
+    file_paths_per_url: Dict[str, List[str]] = {}
+    for pdf_url, file_path in pdfs_to_download:
+        file_paths_per_url.setdefault(pdf_url, []).append(file_path)
+
+    def _download_pdf(pdf_url: str) -> str:
+        file_paths = file_paths_per_url[pdf_url]
+        try:
+            sha256 = blob_store.get_url_hash(pdf_url)
+            outcome = 'skipped'
+            if sha256 is None:
+                existing_file_paths = [file_path for file_path in file_paths if is_already_downloaded(session, pdf_url, file_path)]
+                if existing_file_paths:
+                    sha256 = blob_store.add_file(existing_file_paths[0], pdf_url, keep_file=True)
+                else:
+                    incoming_path = blob_store.get_incoming_path(pdf_url)
+                    outcome = download_file(session, pdf_url, incoming_path)
+                    if outcome == 'failed':
+                        return outcome
+                    sha256 = blob_store.add_file(incoming_path, pdf_url)
+                    logger.info(f"Downloaded and stored: {pdf_url} ({sha256})")
+
+            for file_path in file_paths:
+                blob_store.link(sha256, file_path)
+            return outcome
+        except Exception as e:
+            logger.error(f"Failed to download this pdf: {pdf_url} ({e})")
+            return 'failed'
+
+    outcomes_counts = {'skipped': 0, 'downloaded': 0, 'resumed': 0, 'failed': 0}
+    for outcome in ordered_bounded_map(_download_pdf, list(file_paths_per_url), max_in_flight):
+        outcomes_counts[outcome] += 1
+    logger.info(f"Revision PDFs (blob store): {outcomes_counts}")
+
+    return outcomes_counts
@@ -0,0 +1,177 @@
+import os
+import base64
+import hashlib
+from typing import Dict, List, Optional, Tuple
+
+from requests import Session
+
+from logaru_logger.the_logger import logger
+from logaru_logger.metrics import record_metrics
+from odyash_general_functions.odyash_general_functions import ordered_bounded_map, get_directory
+
+
+# The size of the chunks written to disk while a PDF is streamed (1 MB by default)
+DOWNLOAD_CHUNK_SIZE = int(os.getenv('DOWNLOAD_CHUNK_SIZE', str(1024 * 1024)))
+
+
+def _get_file_md5(file_path: str) -> str:
+    md5 = hashlib.md5()
+    with open(file_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(DOWNLOAD_CHUNK_SIZE), b''):
+            md5.update(chunk)
+    return base64.b64encode(md5.digest()).decode('ascii')
+
+
+def is_already_downloaded(session: Session, url: str, file_path: str) -> bool:
+    """
+    Check whether a file was already downloaded, by comparing its size (and its MD5 checksum, if the server sends a
+    `Content-MD5` header) with the ones returned by a `HEAD` request.
+
+    If the server doesn't return the size, an existing file is assumed to be complete
+    (since files are only renamed to their final path after they are fully downloaded).
+    """
+    if not os.path.exists(file_path):
+        return False
+
+    try:
+        head_response = session.head(url, allow_redirects=True)
+    except Exception as e:
+        logger.warning(f"HEAD request failed for {url} ({e}), assuming that the existing file is complete")
+        return True
+    remote_size = head_response.headers.get('Content-Length')
+    if head_response.status_code != 200 or remote_size is None:
+        return True
+    if int(remote_size) != os.path.getsize(file_path):
+        return False
+
+    remote_md5 = head_response.headers.get('Content-MD5')
+    return remote_md5 is None or remote_md5 == _get_file_md5(file_path)
+
+
+def _get_content_range_start(content_range: Optional[str]) -> Optional[int]:
+    """
+    Get the first byte position of a `Content-Range` header (e.g., 'bytes 1000-2047/2048' -> 1000), or None if it can't be parsed.
+    """
+    if not content_range:
+        return None
+    unit, _, byte_range = content_range.strip().partition(' ')
+    start = byte_range.split('-', 1)[0]
+    if unit != 'bytes' or not start.isdigit():
+        return None
+    return int(start)
+
+
+@record_metrics
+def download_file(session: Session, url: str, file_path: str) -> str:
+    """
+    Download a file by streaming its body to disk in chunks, resuming a previous partial download if there is one.
+
+    - The body is written to `<file_path>.part`, which is renamed to `file_path` only once it is complete.
+    - If a `.part` file exists, the download continues from its size using an HTTP `Range` request
+        (or restarts from scratch if the server ignores the range, or if the `Content-Range` of its response doesn't start where the `.part` file ends).
+    - If `file_path` already exists with the same size/checksum as the remote file, nothing is downloaded.
+
+    Args:
+        session (Session): The session used for the requests.
+        url (str): The URL of the file.
+        file_path (str): The path where the file is saved.
+
+    Returns:
+        str: What happened to the file: 'skipped', 'downloaded', 'resumed', or 'failed'.
+    """
+    if is_already_downloaded(session, url, file_path):
+        logger.debug(f"Already downloaded, skipping: {file_path}")
+        return 'skipped'
+
+    part_file_path = f'{file_path}.part'
+    downloaded_size = os.path.getsize(part_file_path) if os.path.exists(part_file_path) else 0
+
+    # EXPLANATION NOTE: at most 2 attempts, since the second one (if any) doesn't send a `Range` header
+    while True:
+        headers = {'Range': f'bytes={downloaded_size}-'} if downloaded_size else {}
+        with session.get(url, headers=headers, stream=True) as response:
+            if response.status_code == 416 and downloaded_size:
+                # the range starts at the end of the file, i.e., the partial download was actually complete
+                os.replace(part_file_path, file_path)
+                return 'resumed'
+            if response.status_code not in (200, 206):
+                logger.error(f"Failed to download this file ({response.status_code}): {url}")
+                return 'failed'
+
+            is_resumed = response.status_code == 206 and downloaded_size > 0
+            content_range_start = _get_content_range_start(response.headers.get('Content-Range'))
+            if response.status_code == 206 and content_range_start != downloaded_size:
+                # appending this range to the `.part` file would corrupt it, so the download restarts from scratch
+                logger.warning(f"Requested the range starting at {downloaded_size}, but got: {response.headers.get('Content-Range')}, "
+                                f"restarting the download of: {url}")
+                if downloaded_size == 0:
+                    return 'failed'
+                os.remove(part_file_path)
+                downloaded_size = 0
+                continue
+
+            with open(part_file_path, 'ab' if is_resumed else 'wb') as file:
+                for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                    file.write(chunk)
+            break
+
+    os.replace(part_file_path, file_path)
+    return 'resumed' if is_resumed else 'downloaded'
+
+
+def get_revision_pdfs_to_download(forqan_lessons_info: Dict) -> List[Tuple[str, str]]:
+    """
+    Get the URL and the path (where it will be saved) of each revision PDF found in the nested dictionary 'forqan_lessons_info'.
+
+    The PDFs are saved in a subdirectory 'revisions_pdfs/<module_name>' within the directory specified by the 'FINAL_OUTPUTS_DIR' environment variable.
+    A path which appears more than once is only returned once, and the revision lessons without a PDF link (i.e., whose 'pdf_url' is None) are skipped.
+
+    Args:
+        forqan_lessons_info (Dict): A nested dictionary containing 'pdf_url' and 'pdf_name' keys among others.
+
+    Returns:
+        List[Tuple[str, str]]: The URL and the file path of each PDF.
+    """
+    pdfs_to_download = {}
+    for module_info in forqan_lessons_info.values():
+        module_name = module_info.get("name", "unknown_module")
+        dir_name = get_directory(os.path.join("revisions_pdfs", module_name), intermediate_output=False)
+
+        for lesson in module_info.get("lessons", []):
+            if lesson.get("pdf_url") and "pdf_name" in lesson:
+                file_path = os.path.join(dir_name, f'{lesson["pdf_name"]}.pdf')
+                pdfs_to_download.setdefault(file_path, lesson["pdf_url"])
+
+    return [(pdf_url, file_path) for file_path, pdf_url in pdfs_to_download.items()]
+
+
+def download_pdfs(pdfs_to_download: List[Tuple[str, str]], session: Session, max_in_flight: int = 1) -> Dict[str, int]:
+    """
+    Download PDFs concurrently (check `download_file()`), with at most `max_in_flight` downloads at the same time.
+
+    Args:
+        pdfs_to_download (List[Tuple[str, str]]): The URL and the file path of each PDF.
+        session (Session): The (pooled) session used for the requests.
+        max_in_flight (int, optional): The maximum number of concurrent downloads. Defaults to 1.
+
+    Returns:
+        Dict[str, int]: The number of PDFs per outcome (check `download_file()`).
+    """
+    def _download_pdf(pdf_to_download: Tuple[str, str]) -> str:
+        pdf_url, file_path = pdf_to_download
+        try:
+            outcome = download_file(session, pdf_url, file_path)
+        except Exception as e:
+            # the partial file (if any) is kept, so that the next run resumes it
+            logger.error(f"Failed to download this pdf: {pdf_url} ({e})")
+            return 'failed'
+        if outcome in ('downloaded', 'resumed'):
+            logger.info(f"Downloaded and saved: {os.path.basename(file_path)}")
+        return outcome
+
+    outcomes_counts = {'skipped': 0, 'downloaded': 0, 'resumed': 0, 'failed': 0}
+    for outcome in ordered_bounded_map(_download_pdf, pdfs_to_download, max_in_flight):
+        outcomes_counts[outcome] += 1
+    logger.info(f"Revision PDFs: {outcomes_counts}")
+
+    return outcomes_counts
@@ -0,0 +1,395 @@
+import os
+import json
+import shutil
+import argparse
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from requests import Session
+from pyprojroot import here
+
+from logaru_logger.the_logger import logger
+from odyash_general_functions.odyash_general_functions import ordered_bounded_map
+from odyash_general_functions.run_manifest import STAGE_ENV_VAR
+from forqan_academy_scraper import scraper as fsc
+
+
+# The stages of the pipeline (in order), where each stage is mapped to the stages whose outputs it needs.
+# The stages of the other packages (e.g., the explainer's stages) are added by `register_stage()`
+STAGES_INPUTS: Dict[str, List[str]] = {
+    "login": [],
+    "modules_urls": ["login"],
+    "modules_info": ["modules_urls"],
+    "lessons_urls": ["modules_info"],
+    "lessons_info": ["modules_info", "modules_urls", "lessons_urls"],
+    "revision_pdfs": ["lessons_info"],
+}
+STAGES: List[str] = list(STAGES_INPUTS)
+# The functions of the registered stages, keyed by the stage name
+_REGISTERED_STAGES_FUNCTIONS: Dict[str, Callable[..., Any]] = {}
+
+
+class SkipStage(Exception):
+    """
+    Raised by a stage function which can't run in this environment (e.g., if an optional library isn't installed),
+    so that the stage is skipped with a warning, without being checkpointed (i.e., it runs once the environment is fixed).
+    """
+
+
+def register_stage(stage_name: str, inputs: List[str], stage_function: Callable[..., Any]) -> None:
+    """
+    Add a stage to the end of the pipeline, so that the pipeline can be extended without the scraper depending on the extending package
+    (e.g., the explainer's stages are registered by `forqan_academy_explainer.pipeline_stages`).
+
+    Args:
+        stage_name (str): The name of the stage.
+        inputs (List[str]): The stages whose outputs the stage needs (they must already be in `STAGES`).
+        stage_function (Callable[..., Any]): Called with the `PipelineRunner` (e.g., to use its logged-in session), 
+            then the outputs of the `inputs` stages. Its output must be JSON serializable (to be checkpointed).
+            It can raise `SkipStage` to skip the stage.
+
+    Returns:
+        None
+
+    Raises:
+        ValueError: If the stage name is already used by another stage, or if one of its inputs isn't a stage.
+    """
+    if stage_name in STAGES_INPUTS and _REGISTERED_STAGES_FUNCTIONS.get(stage_name) is not stage_function:
+        raise ValueError(f"The stage name \"{stage_name}\" is already used by another stage")
+    invalid_inputs = [input_stage_name for input_stage_name in inputs if input_stage_name not in STAGES_INPUTS]
+    if invalid_inputs:
+        raise ValueError(f"Invalid inputs of stage \"{stage_name}\": {', '.join(invalid_inputs)}. Supported stages are: {', '.join(STAGES)}")
+
+    if stage_name not in STAGES_INPUTS:
+        STAGES.append(stage_name)
+    STAGES_INPUTS[stage_name] = list(inputs)
+    _REGISTERED_STAGES_FUNCTIONS[stage_name] = stage_function
+
+
+def get_dependent_stages(stage_name: str) -> List[str]:
+    """
+    Get the stages which need the output of the given stage, either directly or through other stages (in the order of `STAGES`).
+
+    Args:
+        stage_name (str): The name of the stage.
+
+    Returns:
+        List[str]: The names of the dependent stages.
+    """
+    dependent_stages = []
+    for cur_stage_name in STAGES:
+        if any(input_stage_name == stage_name or input_stage_name in dependent_stages for input_stage_name in STAGES_INPUTS[cur_stage_name]):
+            dependent_stages.append(cur_stage_name)
+    return dependent_stages
+
+
+def get_checkpoints_dir(checkpoints_dir: Optional[str] = None) -> str:
+    """
+    Get the directory where the outputs (i.e., checkpoints) of the pipeline stages are stored.
+
+    Args:
+        checkpoints_dir (str, optional): The checkpoints directory (relative to the project root).
+            Defaults to the 'PIPELINE_CHECKPOINTS_DIR' environment variable, or 'data_files/pipeline_checkpoints' if it isn't set.
+
+    Returns:
+        str: The absolute path of the checkpoints directory.
+    """
+    if checkpoints_dir is None:
+        checkpoints_dir = os.getenv('PIPELINE_CHECKPOINTS_DIR', os.path.join('data_files', 'pipeline_checkpoints'))
+    return os.path.normpath(os.path.join(here(), checkpoints_dir))
+
+
+class PipelineRunner:
+    """
+    Runs the scraping stages (`login` -> ... -> `revision_pdfs`) then the registered stages (check `register_stage()`),
+    while checkpointing the output of each stage to disk.
+
+    - A stage whose checkpoint exists isn't run again, its output is loaded from the checkpoint instead.
+        So, after a crash (or Ctrl-C), calling `run()` again resumes from the first stage which wasn't completed.
+    - The long `lessons_info` stage also checkpoints each lesson as soon as it is scraped (to a JSON Lines progress file),
+        so it resumes from the first lesson which wasn't scraped.
+    - If `incremental` is True, the `lessons_info` stage only fetches the lessons which are new (or weren't available) since the previous crawl
+        (check `incremental_crawl.update_forqan_lessons_info()`), e.g., for a daily `run(fresh=True)`.
+    - `run_stage()` runs a single stage using the checkpointed outputs of the stages before it,
+        and deletes the checkpoints of the stages depending on it (check `get_dependent_stages()`), so they are run again by `run()`.
+
+    Notes:
+    - The logged-in session can't be checkpointed, so it is created (i.e., `scraper.login()` is called)
+        only when a stage which needs the network is run.
+    - Checkpoints are written to a temporary file then renamed, so a crash never leaves a partially written checkpoint.
+
+    Example:
+        runner = PipelineRunner()
+        forqan_lessons_info = runner.run()["lessons_info"]
+        # later, re-running only the last stage from the checkpointed lessons info:
+        runner.run_stage("revision_pdfs")
+    """
+
+    def __init__(self,
+                checkpoints_dir: Optional[str] = None,
+                max_in_flight: Optional[int] = None,
+                incremental: bool = False,
+                recheck_known_lessons: Optional[bool] = None) -> None:
+        """
+        Args:
+            checkpoints_dir (str, optional): The checkpoints directory (check `get_checkpoints_dir()`).
+            max_in_flight (int, optional): The maximum number of pages fetched at the same time (check `scraper.get_max_in_flight()`).
+            incremental (bool, optional): Whether the `lessons_info` stage is an incremental crawl. Defaults to False.
+            recheck_known_lessons (bool, optional): Whether the incremental crawl re-fetches the previously available lessons
+                (check `incremental_crawl.update_forqan_lessons_info()`).
+        """
+        self.checkpoints_dir = get_checkpoints_dir(checkpoints_dir)
+        os.makedirs(self.checkpoints_dir, exist_ok=True)
+        self.max_in_flight = max_in_flight
+        self.incremental = incremental
+        self.recheck_known_lessons = recheck_known_lessons
+        self._session: Optional[Session] = None
+        self._stages_functions: Dict[str, Callable[..., Any]] = {
+            "login": self._run_login,
+            "modules_urls": fsc.get_forqan_modules_urls_using_regex,
+            "modules_info": self._run_modules_info,
+            "lessons_urls": fsc.get_lessons_name_and_urls_using_regex,
+            "lessons_info": self._run_lessons_info,
+            "revision_pdfs": self._run_revision_pdfs,
+        }
+
+    @property
+    def session(self) -> Session:
+        """
+        The logged-in session (logs in on first use).
+        """
+        if self._session is None:
+            self._session, _ = fsc.login()
+        return self._session
+
+    def _get_checkpoint_path(self, stage_name: str, file_extension: str = "json") -> str:
+        return os.path.join(self.checkpoints_dir, f"{stage_name}.{file_extension}")
+
+    def has_checkpoint(self, stage_name: str) -> bool:
+        """
+        Check whether a stage was completed (i.e., its output was checkpointed).
+        """
+        return os.path.exists(self._get_checkpoint_path(stage_name))
+
+    def save_checkpoint(self, stage_name: str, output: Any) -> None:
+        """
+        Save the output of a stage to its checkpoint file.
+        """
+        checkpoint_path = self._get_checkpoint_path(stage_name)
+        with open(f"{checkpoint_path}.tmp", "w", encoding="utf-8") as file:
+            json.dump(output, file, ensure_ascii=False, indent=2)
+        os.replace(f"{checkpoint_path}.tmp", checkpoint_path)
+        logger.info(f"Checkpoint of stage \"{stage_name}\" saved to {checkpoint_path}")
+
+    def load_checkpoint(self, stage_name: str) -> Any:
+        """
+        Load the output of a completed stage from its checkpoint file.
+
+        Raises:
+            FileNotFoundError: If the stage wasn't completed yet.
+        """
+        checkpoint_path = self._get_checkpoint_path(stage_name)
+        if not os.path.exists(checkpoint_path):
+            raise FileNotFoundError(f"Stage \"{stage_name}\" has no checkpoint in {self.checkpoints_dir}, run it (or the stages before it) first")
+        with open(checkpoint_path, "r", encoding="utf-8") as file:
+            output = json.load(file)
+
+        # JSON has no tuples, so converting the lists back to the tuples returned by the scraper's functions
+        if stage_name == "modules_info":
+            output = [tuple(module_info) for module_info in output]
+        elif stage_name == "lessons_urls":
+            output = [[tuple(lesson) for lesson in cur_module_lessons] for cur_module_lessons in output]
+        return output
+
+    def clear_checkpoints(self, stages: Optional[List[str]] = None) -> None:
+        """
+        Delete the checkpoints (and progress files) of the given stages, or of all stages if `stages` isn't given.
+        """
+        if stages is None:
+            shutil.rmtree(self.checkpoints_dir, ignore_errors=True)
+            os.makedirs(self.checkpoints_dir, exist_ok=True)
+            return
+        for stage_name in stages:
+            for file_extension in ("json", "progress.jsonl"):
+                if os.path.exists(self._get_checkpoint_path(stage_name, file_extension)):
+                    os.remove(self._get_checkpoint_path(stage_name, file_extension))
+
+    def _run_login(self) -> str:
+        self._session, login_response_html_string = fsc.login()
+        return login_response_html_string
+
+    def _run_modules_info(self, forqan_modules_urls: List[str]) -> List[Tuple[str, str]]:
+        return fsc.get_modules_info_using_regex(forqan_modules_urls, self.session, max_in_flight=self.max_in_flight)
+
+    def _load_lessons_progress(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Load the lessons scraped so far by the `lessons_info` stage, keyed by their URL.
+        """
+        progress_path = self._get_checkpoint_path("lessons_info", "progress.jsonl")
+        lessons_progress = {}
+        if not os.path.exists(progress_path):
+            return lessons_progress
+        with open(progress_path, "r", encoding="utf-8") as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # the last line may have been partially written when the process was killed
+                    continue
+                # EXPLANATION NOTE: the records are keyed by the lesson's URL (not its position in the list of lessons),
+                #   so that a lesson added to (or removed from) the site doesn't shift the saved records to other lessons
+                if "url" in record:
+                    lessons_progress[record["url"]] = record["lesson"]
+        return lessons_progress
+
+    def _run_lessons_info(self,
+                        modules_name_and_html: List[Tuple[str, str]],
+                        forqan_modules_urls: List[str],
+                        lessons_names_and_urls_per_module: List[List[Tuple[str, str]]]) -> Dict[str, Dict]:
+        """
+        Same as `scraper.get_video_urls_descriptions_and_pdf_metadata()`, but each scraped lesson is appended
+        to a progress file, and the lessons found in the progress file aren't fetched again.
+        """
+        if self.incremental:
+            # IMPLEMENTATION NOTE: imported here, since the incremental crawl is opt-in (check `test_import_time.py`)
+            from forqan_academy_scraper import incremental_crawl as fic
+            # the incremental crawl only fetches a handful of lessons, so it isn't checkpointed per lesson
+            return fic.update_forqan_lessons_info(modules_name_and_html, forqan_modules_urls, lessons_names_and_urls_per_module, self.session,
+                                                recheck_known_lessons=self.recheck_known_lessons, max_in_flight=self.max_in_flight)
+
+        forqan_lessons_info = {}
+        # (module key, lesson name, lesson url) of all lessons, in the order they should be stored
+        lessons = []
+        for i, ((module_name, _), module_url) in enumerate(zip(modules_name_and_html, forqan_modules_urls)):
+            module_key = f"module_{i+1:02d}"
+            forqan_lessons_info[module_key] = {"name": module_name, "url": module_url, "lessons": []}
+            lessons.extend((module_key, lesson_name, lesson_url) for lesson_name, lesson_url in lessons_names_and_urls_per_module[i])
+
+        lessons_progress = self._load_lessons_progress()
+        remaining_lessons = [lesson for lesson in lessons if lesson[2] not in lessons_progress]
+        logger.info(f"Stage \"lessons_info\": {len(lessons) - len(remaining_lessons)}/{len(lessons)} lessons were already scraped")
+
+        session = self.session if remaining_lessons else None
+        lessons_info = ordered_bounded_map(lambda lesson: fsc.get_lesson_info(lesson[1], lesson[2], session),
+                                            remaining_lessons,
+                                            fsc.get_max_in_flight(self.max_in_flight))
+        with open(self._get_checkpoint_path("lessons_info", "progress.jsonl"), "a", encoding="utf-8") as progress_file:
+            for (_, _, lesson_url), lesson_info in zip(remaining_lessons, lessons_info):
+                progress_file.write(json.dumps({"url": lesson_url, "lesson": lesson_info}, ensure_ascii=False) + "\n")
+                progress_file.flush()
+                os.fsync(progress_file.fileno())
+                lessons_progress[lesson_url] = lesson_info
+
+        for module_key, _, lesson_url in lessons:
+            forqan_lessons_info[module_key]["lessons"].append(lessons_progress[lesson_url])
+        fsc.save_forqan_lessons_info(forqan_lessons_info)
+        return forqan_lessons_info
+
+    def _run_revision_pdfs(self, forqan_lessons_info: Dict[str, Dict]) -> Dict[str, int]:
+        return fsc.download_revision_pdfs(forqan_lessons_info, self.session, max_in_flight=self.max_in_flight)
+
+    def run_stage(self, stage_name: str) -> Any:
+        """
+        Run a single stage (even if it was already completed) using the checkpointed outputs of the stages it needs, then checkpoint its output.
+        The checkpoints (and progress files) of the stages depending on it are deleted first, since they may not match its new output.
+
+        Args:
+            stage_name (str): The name of the stage (check `STAGES`).
+
+        Returns:
+            Any: The output of the stage, or None if the stage was skipped (check `SkipStage`).
+
+        Raises:
+            ValueError: If the stage name is invalid.
+            FileNotFoundError: If a stage needed by this stage wasn't completed yet.
+        """
+        if stage_name not in STAGES_INPUTS:
+            raise ValueError(f"Invalid stage name: {stage_name}. Supported stages are: {', '.join(STAGES)}")
+
+        inputs = [self.load_checkpoint(input_stage_name) for input_stage_name in STAGES_INPUTS[stage_name]]
+        # the outputs (and progress files) of the stages depending on this stage may not match its new output, so they are deleted
+        dependent_stages = get_dependent_stages(stage_name)
+        if any(self.has_checkpoint(dependent_stage_name) or os.path.exists(self._get_checkpoint_path(dependent_stage_name, "progress.jsonl"))
+               for dependent_stage_name in dependent_stages):
+            logger.info(f"Deleting the checkpoints of the stages depending on stage \"{stage_name}\": {', '.join(dependent_stages)}")
+            self.clear_checkpoints(dependent_stages)
+        logger.info(f"Running stage \"{stage_name}\"")
+        # the files saved by `save_data()` during the stage are recorded with its name in the run's manifest
+        previous_stage_name = os.environ.get(STAGE_ENV_VAR)
+        os.environ[STAGE_ENV_VAR] = stage_name
+        try:
+            if stage_name in self._stages_functions:
+                output = self._stages_functions[stage_name](*inputs)
+            else:
+                output = _REGISTERED_STAGES_FUNCTIONS[stage_name](self, *inputs)
+        except SkipStage as e:
+            logger.warning(f"Skipping stage \"{stage_name}\": {e}")
+            return None
+        finally:
+            if previous_stage_name is None:
+                os.environ.pop(STAGE_ENV_VAR, None)
+            else:
+                os.environ[STAGE_ENV_VAR] = previous_stage_name
+        self.save_checkpoint(stage_name, output)
+        progress_path = self._get_checkpoint_path(stage_name, "progress.jsonl")
+        if os.path.exists(progress_path):
+            # the progress file isn't needed anymore, since the whole stage was checkpointed
+            os.remove(progress_path)
+        return output
+
+    def get(self, stage_name: str) -> Any:
+        """
+        Get the output of a stage, either from its checkpoint or by running it (and the stages before it) if it wasn't completed.
+        """
+        if self.has_checkpoint(stage_name):
+            logger.info(f"Stage \"{stage_name}\" was already completed, loading its checkpoint")
+            return self.load_checkpoint(stage_name)
+        for input_stage_name in STAGES_INPUTS[stage_name]:
+            self.get(input_stage_name)
+        return self.run_stage(stage_name)
+
+    def run(self, until_stage: Optional[str] = None, fresh: bool = False) -> Dict[str, Any]:
+        """
+        Run (or resume) the pipeline until the given stage.
+
+        Args:
+            until_stage (str, optional): The last stage to run. Defaults to the last stage of the pipeline.
+            fresh (bool, optional): If True, the existing checkpoints are deleted first. Defaults to False.
+
+        Returns:
+            Dict[str, Any]: The output of each stage, keyed by the stage name.
+        """
+        # EXPLANATION NOTE: the last stage is looked up here (not as the default value of `until_stage`),
+        #   since the default value is evaluated once, before the other packages' stages are registered
+        if until_stage is None:
+            until_stage = STAGES[-1]
+        if fresh:
+            self.clear_checkpoints()
+        stages = STAGES[:STAGES.index(until_stage) + 1]
+        return {stage_name: self.get(stage_name) for stage_name in stages}
+
+
+def main() -> None:
+    """
+    Command line entry point of the pipeline runner (check `python pipeline.py --help`).
+    """
+    parser = argparse.ArgumentParser(description="Run (or resume) the Forqan Academy scraping pipeline")
+    parser.add_argument("--until", default=None, choices=STAGES, help="the last stage to run (defaults to the last stage)")
+    parser.add_argument("--stage", choices=STAGES, help="run only this stage, using the checkpointed outputs of the stages before it")
+    parser.add_argument("--fresh", action="store_true", help="delete the existing checkpoints first")
+    parser.add_argument("--checkpoints-dir", default=None, help="the checkpoints directory (relative to the project root)")
+    parser.add_argument("--max-in-flight", type=int, default=None, help="the maximum number of pages fetched at the same time")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only fetch the lessons which are new (or weren't available) since the previous crawl (e.g., with --fresh for a daily run)")
+    parser.add_argument("--recheck-known-lessons", action="store_true", default=None,
+                        help="with --incremental, also re-fetch the previously available lessons to catch their changed pages")
+    args = parser.parse_args()
+
+    runner = PipelineRunner(args.checkpoints_dir, args.max_in_flight, args.incremental, args.recheck_known_lessons)
+    if args.stage:
+        runner.run_stage(args.stage)
+    else:
+        runner.run(args.until, args.fresh)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+import os
+import time
+import random
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests import Response
+
+from logaru_logger.the_logger import logger
+
+
+# The responses (and methods) which are retried, since they are usually transient
+# EXPLANATION NOTE: non-idempotent requests (e.g., the login POST) are never retried, since they may have been processed
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+RETRY_METHODS = ('GET', 'HEAD', 'OPTIONS')
+# The exceptions which are retried (and which make the scheduler back off)
+RETRY_EXCEPTIONS = (requests.ConnectionError, requests.Timeout)
+
+
+def _get_float_env(name: str, default: str) -> float:
+    return float(os.getenv(name, default))
+
+
+class _HostState:
+    """
+    The rate limit (a token bucket) and the adaptive concurrency limit (AIMD) of a single host.
+    """
+
+    def __init__(self, requests_per_second: float, burst: float, max_concurrency: int) -> None:
+        self.requests_per_second = requests_per_second
+        self.burst = burst
+        self.tokens = burst
+        self.last_refill_time = time.monotonic()
+
+        self.max_concurrency = max_concurrency
+        self.concurrency_limit = float(max_concurrency)
+        self.in_flight = 0
+        self.last_backoff_time = 0.0
+        self.min_latency: Optional[float] = None
+        self.latency_ewma: Optional[float] = None
+
+        self.condition = threading.Condition()
+
+
+class RequestScheduler:
+    """
+    Schedules the HTTP requests of all the fetchers, to get the maximum throughput that a server tolerates.
+
+    For each host:
+    - A token bucket limits the request rate to `requests_per_second` (with bursts of up to `burst` requests).
+    - An adaptive concurrency limit (AIMD) caps the number of requests in flight: it grows by one request per
+        "round" of successful requests, and is halved (at most once per `backoff_cooldown` seconds) on 429/5xx responses,
+        connection errors/timeouts, or when the latency rises to `latency_backoff_factor` times the lowest seen latency.
+    - Failed idempotent requests (check `RETRY_STATUS_CODES` and `RETRY_EXCEPTIONS`) are retried up to `max_retries` times,
+        waiting for a jittered exponential backoff (or the `Retry-After` header, if the server sends one).
+    - Requests without an explicit timeout get `(connect_timeout, read_timeout)`.
+
+    All the settings default to environment variables (check `__init__()`).
+    """
+
+    def __init__(self,
+                requests_per_second: Optional[float] = None,
+                burst: Optional[float] = None,
+                max_concurrency: Optional[int] = None,
+                max_retries: Optional[int] = None,
+                backoff_base: Optional[float] = None,
+                backoff_max: Optional[float] = None,
+                connect_timeout: Optional[float] = None,
+                read_timeout: Optional[float] = None,
+                latency_backoff_factor: Optional[float] = None,
+                backoff_cooldown: Optional[float] = None) -> None:
+        """
+        Args:
+            requests_per_second (float, optional): The maximum request rate per host, or 0 for no limit.
+                Defaults to the 'REQUESTS_PER_SECOND' environment variable, or 10.
+            burst (float, optional): The size of the token bucket. Defaults to the 'REQUESTS_BURST' environment variable, or `requests_per_second`.
+            max_concurrency (int, optional): The highest concurrency limit per host.
+                Defaults to the 'MAX_IN_FLIGHT_REQUESTS' environment variable, or 8.
+            max_retries (int, optional): Defaults to the 'REQUEST_MAX_RETRIES' environment variable, or 3.
+            backoff_base (float, optional): The first retry waits up to this number of seconds (doubled on each retry).
+                Defaults to the 'REQUEST_BACKOFF_BASE' environment variable, or 0.5.
+            backoff_max (float, optional): The longest wait between retries (in seconds). Defaults to the 'REQUEST_BACKOFF_MAX' environment variable, or 30.
+            connect_timeout (float, optional): Defaults to the 'REQUEST_CONNECT_TIMEOUT' environment variable, or 10 seconds.
+            read_timeout (float, optional): Defaults to the 'REQUEST_READ_TIMEOUT' environment variable, or 60 seconds.
+            latency_backoff_factor (float, optional): Defaults to the 'REQUEST_LATENCY_BACKOFF_FACTOR' environment variable, or 4.
+            backoff_cooldown (float, optional): Defaults to the 'REQUEST_BACKOFF_COOLDOWN' environment variable, or 1 second.
+        """
+        self.requests_per_second = requests_per_second if requests_per_second is not None else _get_float_env('REQUESTS_PER_SECOND', '10')
+        self.burst = burst if burst is not None else _get_float_env('REQUESTS_BURST', str(max(self.requests_per_second, 1)))
+        self.max_concurrency = max(1, max_concurrency if max_concurrency is not None else int(os.getenv('MAX_IN_FLIGHT_REQUESTS', '8')))
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv('REQUEST_MAX_RETRIES', '3'))
+        self.backoff_base = backoff_base if backoff_base is not None else _get_float_env('REQUEST_BACKOFF_BASE', '0.5')
+        self.backoff_max = backoff_max if backoff_max is not None else _get_float_env('REQUEST_BACKOFF_MAX', '30')
+        self.timeout = (connect_timeout if connect_timeout is not None else _get_float_env('REQUEST_CONNECT_TIMEOUT', '10'),
+                        read_timeout if read_timeout is not None else _get_float_env('REQUEST_READ_TIMEOUT', '60'))
+        self.latency_backoff_factor = latency_backoff_factor if latency_backoff_factor is not None \
+            else _get_float_env('REQUEST_LATENCY_BACKOFF_FACTOR', '4')
+        self.backoff_cooldown = backoff_cooldown if backoff_cooldown is not None else _get_float_env('REQUEST_BACKOFF_COOLDOWN', '1')
+
+        self._hosts: Dict[str, _HostState] = {}
+        self._hosts_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {'requests': 0, 'retries': 0, 'backoffs': 0, 'throttled_seconds': 0.0}
+
+    def _get_host_state(self, url: str) -> _HostState:
+        host = urlsplit(url).netloc
+        with self._hosts_lock:
+            if host not in self._hosts:
+                self._hosts[host] = _HostState(self.requests_per_second, self.burst, self.max_concurrency)
+            return self._hosts[host]
+
+    def _add_stat(self, name: str, value: float = 1) -> None:
+        with self._stats_lock:
+            self._stats[name] += value
+
+    def _acquire_token(self, host_state: _HostState) -> None:
+        if host_state.requests_per_second <= 0:
+            return
+        while True:
+            with host_state.condition:
+                now = time.monotonic()
+                host_state.tokens = min(host_state.burst,
+                                        host_state.tokens + (now - host_state.last_refill_time) * host_state.requests_per_second)
+                host_state.last_refill_time = now
+                if host_state.tokens >= 1:
+                    host_state.tokens -= 1
+                    return
+                wait_time = (1 - host_state.tokens) / host_state.requests_per_second
+            self._add_stat('throttled_seconds', wait_time)
+            time.sleep(wait_time)
+
+    def _acquire_slot(self, host_state: _HostState) -> None:
+        with host_state.condition:
+            while host_state.in_flight >= int(host_state.concurrency_limit):
+                host_state.condition.wait()
+            host_state.in_flight += 1
+
+    def _release_slot(self, host_state: _HostState, latency: Optional[float], congested: bool) -> None:
+        with host_state.condition:
+            host_state.in_flight -= 1
+            if latency is not None and not congested:
+                host_state.min_latency = latency if host_state.min_latency is None else min(host_state.min_latency, latency)
+                host_state.latency_ewma = latency if host_state.latency_ewma is None else 0.8 * host_state.latency_ewma + 0.2 * latency
+                congested = host_state.latency_ewma > self.latency_backoff_factor * max(host_state.min_latency, 0.05)
+
+            now = time.monotonic()
+            if congested:
+                if now - host_state.last_backoff_time >= self.backoff_cooldown:
+                    host_state.last_backoff_time = now
+                    host_state.concurrency_limit = max(1.0, host_state.concurrency_limit / 2)
+                    # the latency baseline restarts, so that a lasting (but tolerated) slowdown doesn't keep the limit down
+                    host_state.latency_ewma = None
+                    self._add_stat('backoffs')
+                    logger.debug(f"Backing off: the concurrency limit is now {int(host_state.concurrency_limit)}")
+            else:
+                host_state.concurrency_limit = min(float(host_state.max_concurrency),
+                                                host_state.concurrency_limit + 1 / host_state.concurrency_limit)
+            host_state.condition.notify_all()
+
+    def _get_retry_wait_time(self, attempt: int, response: Optional[Response]) -> float:
+        if response is not None:
+            retry_after = response.headers.get('Retry-After')
+            if retry_after is not None and retry_after.isdigit():
+                return min(float(retry_after), self.backoff_max)
+        # full jitter, i.e., a random wait between 0 and the exponential backoff
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def request(self, send: Callable[..., Response], method: str, url: str, **kwargs: Any) -> Response:
+        """
+        Send a request through the scheduler (i.e., rate limited, with an adaptive concurrency limit, retries and timeouts).
+
+        Args:
+            send (Callable[..., Response]): The function sending the request (e.g., `requests.Session.request` bound to a session).
+            method (str): The HTTP method.
+            url (str): The URL.
+            **kwargs: The other arguments of `send`.
+
+        Returns:
+            Response: The response (the last one, if all the retries failed with a retried status code).
+
+        Raises:
+            requests.RequestException: If the last attempt failed with an exception.
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        host_state = self._get_host_state(url)
+        retries = self.max_retries if method.upper() in RETRY_METHODS else 0
+
+        for attempt in range(retries + 1):
+            self._acquire_token(host_state)
+            self._acquire_slot(host_state)
+            self._add_stat('requests')
+            start_time = time.perf_counter()
+            response, latency, congested = None, None, True
+            try:
+                response = send(method, url, **kwargs)
+                latency = time.perf_counter() - start_time
+                congested = response.status_code in RETRY_STATUS_CODES
+            except RETRY_EXCEPTIONS as e:
+                if attempt == retries:
+                    raise
+                logger.warning(f"{method} {url} failed ({type(e).__name__}: {e}), retrying ({attempt + 1}/{retries})")
+            finally:
+                self._release_slot(host_state, latency, congested)
+
+            if response is not None and (not congested or attempt == retries):
+                return response
+            if response is not None:
+                logger.warning(f"{method} {url} returned {response.status_code}, retrying ({attempt + 1}/{retries})")
+                response.close()
+            self._add_stat('retries')
+            time.sleep(self._get_retry_wait_time(attempt, response))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get the number of requests, retries and backoffs, the time spent waiting for the rate limit, and each host's concurrency limit.
+        """
+        with self._stats_lock:
+            stats = dict(self._stats)
+        with self._hosts_lock:
+            stats['concurrency_limits'] = {host: int(host_state.concurrency_limit) for host, host_state in self._hosts.items()}
+        return stats
+
+
+class ScheduledSession(requests.Session):
+    """
+    A `requests.Session` whose requests all go through a `RequestScheduler` (so every fetcher using the session is scheduled).
+
+    Notes:
+    - For streamed requests (`stream=True`), the concurrency slot is released once the headers are received,
+        i.e., reading the body isn't counted as in flight.
+    """
+
+    def __init__(self, scheduler: Optional[RequestScheduler] = None) -> None:
+        super().__init__()
+        self.scheduler = scheduler if scheduler is not None else RequestScheduler()
+
+    def request(self, method: str, url: str, *args: Any, **kwargs: Any) -> Response:
+        # IMPLEMENTATION NOTE: the positional arguments of `requests.Session.request` are turned into keyword arguments
+        #   (in their declared order), so that the scheduler can set the default timeout
+        kwargs.update(zip(_SESSION_REQUEST_ARGS_NAMES, args))
+        return self.scheduler.request(super().request, method, url, **kwargs)
+
+
+# the names of the arguments of `requests.Session.request` after `method` and `url`
+_SESSION_REQUEST_ARGS_NAMES: Tuple[str, ...] = ('params', 'data', 'headers', 'cookies', 'files', 'auth', 'timeout',
+                                                'allow_redirects', 'proxies', 'hooks', 'stream', 'verify', 'cert', 'json')
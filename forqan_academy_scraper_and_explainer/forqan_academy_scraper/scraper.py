@@ -1,13 +1,19 @@
 import os
 import functools
-from typing import Dict, List, Optional, Tuple, Union, Literal, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union, Literal, Any
 import html
-from bs4 import BeautifulSoup
-import requests
 from requests import Session, Response
-import re
+from requests.adapters import HTTPAdapter
 from logaru_logger.the_logger import logger, log_decorator
-from odyash_general_functions.odyash_general_functions import save_data
+from logaru_logger.metrics import record_metrics
+from odyash_general_functions.odyash_general_functions import save_data, ordered_bounded_map, stream_records_to_jsonl
+from forqan_academy_scraper.http_cache import CachingHTTPAdapter
+from forqan_academy_scraper.request_scheduler import RequestScheduler, ScheduledSession
+from forqan_academy_scraper.lesson_parsers import parse_lesson_page
+from forqan_academy_scraper import extraction_rules as er
+from forqan_academy_scraper.pdf_downloads import get_revision_pdfs_to_download, download_pdfs
+from forqan_academy_scraper.pdf_blob_store import PdfBlobStore, download_pdfs_to_blob_store
 
 # Define a partial function called log_partial_decorator,
 # since I'm too lazy to write the arguments each time in "@log_decorator(...)"
@@ -16,6 +22,60 @@ log_partial_decorator = functools.partial(log_decorator,
                                         level=(os.getenv('DEBUG', '1')=='1'))
 
 
+def get_max_in_flight(max_in_flight: Optional[int] = None) -> int:
+    """
+    Get the maximum number of HTTP requests that can be in flight at the same time.
+
+    If `max_in_flight` isn't given, it is read from the 'MAX_IN_FLIGHT_REQUESTS' environment variable (defaults to 8).
+    A value of 1 means that the pages are fetched sequentially.
+
+    Args:
+        max_in_flight (int, optional): The maximum number of concurrent requests. Defaults to None.
+
+    Returns:
+        int: The maximum number of concurrent requests (at least 1).
+    """
+    if max_in_flight is None:
+        max_in_flight = int(os.getenv('MAX_IN_FLIGHT_REQUESTS', '8'))
+    return max(1, max_in_flight)
+
+
+def _mount_pooled_adapter(sess: Session, 
+                        pool_maxsize: Optional[int] = None, 
+                        use_http_cache: Optional[bool] = None,
+                        http_cache_namespace: Optional[str] = None) -> None:
+    """
+    Mount an HTTP adapter whose connection pool is large enough for the concurrent fetchers.
+
+    The default adapter of `requests.Session` keeps at most 10 connections per host, 
+    so a bigger `max_in_flight` would keep discarding (then re-opening) connections.
+
+    If the HTTP cache is enabled, the mounted adapter also stores the responses on disk 
+    and revalidates them with conditional requests (check `http_cache.CachingHTTPAdapter`).
+
+    Args:
+        sess (Session): The session to mount the adapter on.
+        pool_maxsize (int, optional): The number of connections to keep per host. Defaults to `get_max_in_flight()`.
+        use_http_cache (bool, optional): Whether to use the on-disk HTTP cache. 
+            Defaults to the 'USE_HTTP_CACHE' environment variable (disabled unless it is set to '1'),
+            since the cache keeps the authenticated pages in `data_files/http_cache`.
+        http_cache_namespace (str, optional): Separates the cached pages of the different users (e.g., the logged-in username).
+
+    Returns:
+        None
+    """
+    if use_http_cache is None:
+        use_http_cache = os.getenv('USE_HTTP_CACHE', '0') == '1'
+
+    if use_http_cache:
+        adapter = CachingHTTPAdapter(pool_maxsize=get_max_in_flight(pool_maxsize), namespace=http_cache_namespace)
+        logger.debug(f"Using the HTTP cache stored in: {adapter.cache_dir}")
+    else:
+        adapter = HTTPAdapter(pool_maxsize=get_max_in_flight(pool_maxsize))
+    sess.mount('https://', adapter)
+    sess.mount('http://', adapter)
+
+
 def _get_post_request_constants() -> Tuple[Dict[str, str], Dict[str, str], Dict[str, str]]:
     """
     Get the headers, data, and cookies obtained from the cURL command.
@@ -45,9 +105,9 @@ def _get_post_request_constants() -> Tuple[Dict[str, str], Dict[str, str], Dict[
         'cache-control': 'no-cache',
         'pragma': 'no-cache',
         'content-type': 'application/x-www-form-urlencoded',
-        'origin': 'https://forqanacademy.com',
+        'origin': er.get_forqan_base_url(),
         'priority': 'u=0, i',
-        'referer': 'https://forqanacademy.com/login/',
+        'referer': f'{er.get_forqan_base_url()}/login/',
         'sec-ch-ua': '"Chromium";v="124", "Google Chrome";v="124", "Not-A.Brand";v="99"',
         'sec-ch-ua-mobile': '?0',
         'sec-ch-ua-platform': '"Windows"',
@@ -96,10 +156,10 @@ def _get_post_request_variables(payload: Dict[str, str], sess: Session) -> str:
     Raises:
         Exception: If the '_wpnonce' value cannot be found in the response.
     """
-    response = sess.get('https://forqanacademy.com/login/')
+    response = sess.get(f'{er.get_forqan_base_url()}/login/')
     save_data(response.text, "login_page_html")
         
-    match = re.search(r'id="_wpnonce".*?value="([^"]*)"', response.text)
+    match = er.WPNONCE_RULE.search(response.text)
     if not match:
         raise Exception('Could not find wpnonce')
     wpnonce = match.group(1)
@@ -110,7 +170,9 @@ def _get_post_request_variables(payload: Dict[str, str], sess: Session) -> str:
 
 @log_decorator()
 def login(username: str = None, 
-            password: str = None) -> Tuple[Session, Response]:
+            password: str = None,
+            use_http_cache: Optional[bool] = None,
+            use_page_archive: Optional[bool] = None) -> Tuple[Session, Response]:
     """
     Logs into the Forqan Academy website and returns a session and the response.
 
@@ -121,31 +183,45 @@ def login(username: str = None,
     Args:
         username (str): The username to log in with.
         password (str): The password to log in with.
+        use_http_cache (bool, optional): Whether the returned session caches the responses on disk (check `_mount_pooled_adapter()`).
+        use_page_archive (bool, optional): Whether the pages fetched by the returned session (the login pages included) are archived 
+            for replaying the extractors offline (check `page_archive.PageArchive`). 
+            Defaults to the 'USE_PAGE_ARCHIVE' environment variable (disabled unless it is set to '1'),
+            since the archive keeps every authenticated page (with no size limit) in `data_files/page_archive`.
 
     Returns:
         Tuple[Session, Response]: A tuple where the first element is a 
-        requests.Session object where the user is logged in, and the second 
+        `ScheduledSession` (i.e., a requests.Session object whose requests are scheduled) where the user is logged in, and the second 
         element is the Response object from the POST request to the login URL.
     """
 
     headers, data, cookies = _get_post_request_constants()
 
-    sess = requests.Session()
-        
-    wpnonce = _get_post_request_variables(data, sess)
-
     if username is None:
         username = os.getenv('MY_USERNAME')
     if password is None:
         password = os.getenv('MY_PASSWORD')
 
+    # all the requests of the session are rate limited, retried and timed out by the scheduler (check `RequestScheduler`)
+    sess = ScheduledSession()
+    # the cached pages are per user, so another account never revalidates against this account's pages
+    _mount_pooled_adapter(sess, use_http_cache=use_http_cache, http_cache_namespace=username)
+    if use_page_archive is None:
+        use_page_archive = os.getenv('USE_PAGE_ARCHIVE', '0') == '1'
+    if use_page_archive:
+        # IMPLEMENTATION NOTE: imported here, since the archive is opt-in (and `sqlite3` is slow to import)
+        from forqan_academy_scraper.page_archive import get_page_archive
+        sess.hooks['response'].append(get_page_archive().response_hook)
+        
+    wpnonce = _get_post_request_variables(data, sess)
+
     data.update({
         '_wpnonce': wpnonce, 
         'username-17384': username, 
         'user_password-17384': password
         })
 
-    response = sess.post('https://forqanacademy.com/login/', headers=headers, data=data, cookies=cookies)
+    response = sess.post(f'{er.get_forqan_base_url()}/login/', headers=headers, data=data, cookies=cookies)
 
     login_response_html_string = response.text
     logger.debug(f"login_response_html_string: {login_response_html_string[-100:]}")
@@ -167,44 +243,93 @@ def get_forqan_modules_urls_using_regex(html_string : str) -> List[str]:
         list: A list of URLs of Forqan Academy modules.
     """
     
-    # Regular expression pattern to match 'a' tags with class 'ld-item-name'
-    pattern = r'<a href="(.*?)" class="ld-item-name">'
-    
-    # Find all matches in the HTML string
-    forqan_modules_urls = re.findall(pattern, html_string)
+    # Find all 'a' tags with class 'ld-item-name' in the HTML string
+    forqan_modules_urls = er.MODULE_URL_RULE.findall(html_string)
     
     logger.debug(f"forqan_modules_urls: {forqan_modules_urls}")
     save_data(forqan_modules_urls, "forqan_modules_urls", file_extension="json")
 
     return forqan_modules_urls
 
+def _get_module_name(module_html_string: str) -> str:
+    """
+    Extracts the module name from the `<title>` of the module page.
+
+    Args:
+        module_html_string (str): The HTML of the module page.
+
+    Returns:
+        str: The module name (without the lessons counter, e.g., "(12)"), or "No module name found".
+    """
+    module_name = er.MODULE_TITLE_RULE.search(module_html_string)
+    if module_name:
+        module_name = module_name.group(1)
+        module_name = er.MODULE_LESSONS_COUNTER_RULE.sub('', module_name).strip()
+    else:
+        module_name = "No module name found"
+    logger.info(f"Module name: {module_name}")
+    return module_name
+
+
+@record_metrics
+def _get_module_info(url: str, session: Session) -> Tuple[str, str]:
+    """
+    Fetches a module page, then returns its name and HTML.
+
+    Args:
+        url (str): The URL of the module page.
+        session (Session): The (logged-in) session used for making the request.
+
+    Returns:
+        Tuple[str, str]: The module name and the HTML of the module page.
+    """
+    # fetching the module page from the URL
+    response = session.get(url)
+
+    # getting the module name
+    module_name = _get_module_name(response.text)
+    return module_name, response.text
+
+
+def iter_modules_info_using_regex(forqan_modules_urls: List[str], 
+                                session: Session, 
+                                max_in_flight: Optional[int] = None) -> Iterator[Tuple[str, str]]:
+    """
+    Fetches the module pages concurrently, and yields the info of each module as soon as it (and the modules before it) arrives.
+
+    Unlike `get_modules_info_using_regex()`, the module pages aren't all kept in memory, 
+    so each page can be handed to the lesson-link extractor while the next pages are still in flight.
+
+    Args:
+        forqan_modules_urls (List[str]): A list of URLs for the Forqan modules.
+        session (Session): A requests.Session object for making the requests.
+        max_in_flight (int, optional): The maximum number of module pages fetched at the same time. 
+            Defaults to the 'MAX_IN_FLIGHT_REQUESTS' environment variable (check `get_max_in_flight()`).
+
+    Returns:
+        Iterator[Tuple[str, str]]: The module name and the HTML of the module page, in the same order as `forqan_modules_urls`.
+    """
+    return ordered_bounded_map(lambda url: _get_module_info(url, session), 
+                                forqan_modules_urls, 
+                                get_max_in_flight(max_in_flight))
+
+
 @log_decorator()
-def get_modules_info_using_regex(forqan_modules_urls: List[str], session: Session) -> List[Tuple[str, str]]:
+def get_modules_info_using_regex(forqan_modules_urls: List[str], 
+                                session: Session, 
+                                max_in_flight: Optional[int] = None) -> List[Tuple[str, str]]:
     """
     Fetches and returns information about each module.
 
     Parameters:
     forqan_modules_urls (List[str]): A list of URLs for the Forqan modules.
     session: A requests.Session object for making the requests.
+    max_in_flight (int, optional): The maximum number of module pages fetched at the same time (check `iter_modules_info_using_regex()`).
 
     Returns:
     List[Tuple[str, str]]: A list of tuples, where each tuple contains the module name and the HTML of the module page.
     """
-    modules_name_and_html = []
-    for url in forqan_modules_urls:
-
-        # fetching the module page from the URL
-        response = session.get(url)
-
-        # getting the module name
-        module_name = re.search(r'<title>(.*?)&#8211;', response.text)
-        if module_name:
-            module_name = module_name.group(1)
-            module_name = re.sub(r'\(\d+\)', '', module_name).strip()
-        else:
-            module_name = "No module name found"
-        logger.info(f"Module name: {module_name}")
-        modules_name_and_html.append((module_name, response.text))
+    modules_name_and_html = list(iter_modules_info_using_regex(forqan_modules_urls, session, max_in_flight))
 
     # saving intermediate outputs for debugging purposes
     save_data(modules_name_and_html[0][1], "module_pages_first_url_response")
@@ -213,6 +338,30 @@ def get_modules_info_using_regex(forqan_modules_urls: List[str], session: Sessio
 
     return modules_name_and_html    
 
+
+def _get_lessons_name_and_urls(cur_module_name: str, cur_module_html_page: str) -> List[Tuple[str, str]]:
+    """
+    Get the lessons info (i.e., a tuple containing the lesson's name and URL) from a module page.
+
+    Args:
+        cur_module_name (str): The name of the module.
+        cur_module_html_page (str): The HTML of the module page.
+
+    Returns:
+        List[Tuple[str, str]]: A list of tuples, where each tuple contains the lesson's name and URL.
+    """
+    # getting each lesson's name and URL for the current module
+    cur_module_lessons_names_and_urls = er.LESSON_LINK_RULE.findall(cur_module_html_page)
+    if cur_module_lessons_names_and_urls:
+        # Switch the order of the groups in each match
+        cur_module_lessons_names_and_urls = [(match[1], match[0]) for match in cur_module_lessons_names_and_urls]
+
+    logger.info(f"Lessons matched for module {cur_module_name}:\n{cur_module_lessons_names_and_urls}\n")
+    save_data(cur_module_lessons_names_and_urls, f"lessons_names_and_urls for {cur_module_name}", file_extension="json")
+
+    return cur_module_lessons_names_and_urls
+
+
 @log_decorator()
 def get_lessons_name_and_urls_using_regex(modules_name_and_html: List[Tuple[str, str]]) -> List[List[Tuple[str, str]]]:
     """
@@ -236,18 +385,8 @@ def get_lessons_name_and_urls_using_regex(modules_name_and_html: List[Tuple[str,
         cur_module_name, cur_module_html_page = cur_module
         
         # getting each lesson's name and URL for the current module
-        # TODO (learning, importance level: low): see how to not hardcode the `https://forqanacademy.com` part, 
-        # while at the same time, not use `.*?/topic` since it continues to match in the html until it finds a url with `/topic` in it
-        a_tag_pattern = r'<a class="ld-table-list-item-preview.*?" href="(https://forqanacademy.com/topic/.*?)">.*?<span class="ld-topic-title">(.*?)</span>'
-        # IMPLEMENTATION NOTE: re.DOTALL is used to match newlines as well when using the dot (.) metacharacter
-        cur_module_lessons_names_and_urls = re.findall(a_tag_pattern, cur_module_html_page, re.DOTALL) 
-        if cur_module_lessons_names_and_urls:
-            # Switch the order of the groups in each match
-            cur_module_lessons_names_and_urls = [(match[1], match[0]) for match in cur_module_lessons_names_and_urls]
-
-        logger.info(f"Lessons matched for module {cur_module_name}:\n{cur_module_lessons_names_and_urls}\n")
+        cur_module_lessons_names_and_urls = _get_lessons_name_and_urls(cur_module_name, cur_module_html_page)
         lessons_names_and_urls_per_module.append(cur_module_lessons_names_and_urls)
-        save_data(cur_module_lessons_names_and_urls, f"lessons_names_and_urls for {cur_module_name}", file_extension="json")
 
     # saving intermediate outputs for debugging purposes
     save_data(lessons_names_and_urls_per_module, "lessons_names_and_urls_per_module", file_extension="json")
@@ -260,6 +399,8 @@ def _unused_manually_visualize_lesson_desc(session: Session) -> List[str]:
     Check this documentation file for details on what this unused function does:
     `doc/extracting_video_desc_logic/possible_htmls.md`
     """
+    from bs4 import BeautifulSoup
+
     tmp_links = [
         # no desc. header
         r'https://forqanacademy.com/topic/%d8%a7%d9%84%d9%85%d8%ad%d8%a7%d8%b6%d8%b1%d8%a9-1-%d8%a7%d9%84%d9%85%d8%b1%d8%ad%d9%84%d8%a9-%d8%a7%d9%84%d9%85%d9%83%d9%8a%d8%a9/',
@@ -296,10 +437,190 @@ def _unused_manually_visualize_lesson_desc(session: Session) -> List[str]:
 
 
 
+@record_metrics
+def extract_lesson_info(lesson_name: str, 
+                        lesson_url: str, 
+                        lesson_html_string: str, 
+                        parser_backend: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Extracts the info of a lesson from the HTML of its page.
+
+    - If the lesson is not available, marks the lesson as such.
+    - If it is a revision lesson, extracts the PDF name and URL which may summarize a couple of lessons.
+    - For normal lessons, extracts the video URL and description.
+
+    Args:
+        lesson_name (str): The name of the lesson (as found in the module page).
+        lesson_url (str): The URL of the lesson page.
+        lesson_html_string (str): The HTML of the lesson page.
+        parser_backend (str, optional): The HTML parser backend (check `lesson_parsers.get_lesson_parser_backend()`). 
+            Defaults to the 'LESSON_PARSER_BACKEND' environment variable.
+
+    Returns:
+        Dict[str, Any]: The lesson's name, URL, and its extracted content (e.g., 'video_url', 'pdf_url', etc.).
+    """
+    lesson_content = {}
+
+    # check if the lesson is not available yet
+    if er.LESSON_NOT_AVAILABLE_RULE.search(lesson_html_string):
+        # store lesson's info as non-available
+        lesson_content['not_available'] = True
+        logger.debug(f"lesson_name: {lesson_name} is not available yet")
+
+    # check if the lesson is a revision lesson
+    elif "المحاضرات" in lesson_name:
+        logger.debug(f"revision lesson_title: {lesson_name}")
+
+        # ensure pdf_name is compatible with the file-naming system
+        lesson_name = html.unescape(lesson_name).replace('–', '-')
+        pdf_name = lesson_name
+        pdf_name = er.INVALID_FILE_NAME_CHARS_RULE.sub('', pdf_name)
+        lesson_content['pdf_name'] = pdf_name
+        logger.debug(f"its pdf_name: {pdf_name}")
+
+        # get pdf URL to download later
+        lesson_page = parse_lesson_page(lesson_html_string, parser_backend)
+        pdf_url = lesson_page.get_pdf_url()
+        lesson_content['pdf_url'] = pdf_url
+        logger.debug(f"pdf_url: {pdf_url}")
+
+    # else, this is a normal and available lesson
+    else:
+        lesson_page = parse_lesson_page(lesson_html_string, parser_backend)
+
+        # get video URL to use later for getting .srt files using speech-to-text AI model
+        video_url = lesson_page.get_video_url()
+        if video_url is None:
+            logger.error('unable to find video URL, will print the parsed HTML content for debugging purposes')
+            logger.debug(f"parsed HTML content: {lesson_page.get_debug_html()}")
+
+        lesson_content['video_url'] = video_url
+        logger.debug(f"video_url: {video_url}")
+
+        # get the description of the video
+        text_content = lesson_page.get_materials_text()
+        desc_termination_keyword = "لمشاهدة"
+        video_description = text_content.split(desc_termination_keyword)[0].strip()
+        lesson_content['video_description'] = video_description
+        logger.debug(f"video_description: {video_description}")
+
+    return {
+        "name": lesson_name,
+        "url": lesson_url,
+        **lesson_content
+    }
+
+
+@record_metrics
+def get_lesson_info(lesson_name: str, lesson_url: str, session: Session) -> Dict[str, Any]:
+    """
+    Fetches a lesson page, then extracts the lesson's info from it.
+
+    Args:
+        lesson_name (str): The name of the lesson.
+        lesson_url (str): The URL of the lesson page.
+        session (Session): The (logged-in) session used for making the request.
+
+    Returns:
+        Dict[str, Any]: The lesson's info, as returned by `extract_lesson_info()`.
+    """
+    logger.debug(f"lesson_name: {lesson_name}")
+    logger.debug(f"lesson_url: {lesson_url}")
+    lesson_response = session.get(lesson_url)
+    return extract_lesson_info(lesson_name, lesson_url, lesson_response.text)
+
+
+def iter_lessons_info(modules_name_and_html: List[Tuple[str, str]], 
+                    forqan_modules_urls: List[str], 
+                    lessons_names_and_urls_per_module: List[List[Tuple[str, str]]],
+                    session: Session,
+                    max_in_flight: Optional[int] = None
+                    ) -> Iterator[Dict[str, Any]]:
+    """
+    Streaming version of `get_video_urls_descriptions_and_pdf_metadata()`, which yields one lesson record at a time.
+
+    Each record contains the lesson's module context and the lesson's info:
+    `{"module_key": "module_01", "module_name": ..., "module_url": ..., "lesson": {"name": ..., "url": ..., ...}}`.
+    A module without lessons yields a single record whose "lesson" is None, so that it isn't lost 
+    when the legacy dictionary is rebuilt (check `build_forqan_lessons_info_from_records()`).
+
+    The lesson pages are fetched concurrently (with at most `max_in_flight` requests at the same time), 
+    but the records are yielded in the order of the modules and lessons, and only a small window of them is kept in memory.
+
+    Args:
+        modules_name_and_html (List[Tuple[str, str]]): A list of tuples containing module names and their HTML content.
+        forqan_modules_urls (List[str]): A list of URLs for each module.
+        lessons_names_and_urls_per_module (List[List[Tuple[str, str]]]): A nested list where each sublist contains tuples of lesson names and URLs for a module.
+        session (Session): The (logged-in) session used for fetching the lesson pages.
+        max_in_flight (int, optional): The maximum number of lesson pages fetched at the same time. 
+            Defaults to the 'MAX_IN_FLIGHT_REQUESTS' environment variable (check `get_max_in_flight()`).
+
+    Returns:
+        Iterator[Dict[str, Any]]: The lesson records.
+    """
+    def _iter_modules_lessons() -> Iterator[Tuple[Dict[str, str], Optional[Tuple[str, str]]]]:
+        # iterating by each module name/url
+        for i, ((module_name, _), module_url) in enumerate(zip(modules_name_and_html, forqan_modules_urls)):
+            module_num = f"{i+1:02d}"
+            logger.debug(f"module num and name: {module_num}: {module_name}")
+            module_context = {"module_key": f"module_{module_num}", "module_name": module_name, "module_url": module_url}
+            cur_module_lessons = lessons_names_and_urls_per_module[i]
+            if not cur_module_lessons:
+                yield module_context, None
+            for lesson_name_and_url in cur_module_lessons:
+                yield module_context, lesson_name_and_url
+
+    def _get_lesson_record(module_lesson: Tuple[Dict[str, str], Optional[Tuple[str, str]]]) -> Dict[str, Any]:
+        module_context, lesson_name_and_url = module_lesson
+        lesson_info = get_lesson_info(*lesson_name_and_url, session) if lesson_name_and_url else None
+        return {**module_context, "lesson": lesson_info}
+
+    # fetching the lessons of all modules concurrently (results are yielded in the same order as the lessons)
+    return ordered_bounded_map(_get_lesson_record, _iter_modules_lessons(), get_max_in_flight(max_in_flight))
+
+
+def build_forqan_lessons_info_from_records(lessons_records: Iterable[Dict[str, Any]]) -> Dict[str, Dict]:
+    """
+    Rebuilds the legacy nested `forqan_lessons_info` dictionary from a stream of lesson records (check `iter_lessons_info()`).
+
+    Args:
+        lessons_records (Iterable[Dict[str, Any]]): The lesson records (e.g., read back from a JSON Lines file).
+
+    Returns:
+        Dict[str, Dict]: A dictionary with module information, including lesson details (check `get_video_urls_descriptions_and_pdf_metadata()`).
+    """
+    forqan_lessons_info = {}
+    for record in lessons_records:
+        module_info = forqan_lessons_info.setdefault(record["module_key"], 
+                                                    {"name": record["module_name"], "url": record["module_url"], "lessons": []})
+        if record["lesson"] is not None:
+            module_info["lessons"].append(record["lesson"])
+    return forqan_lessons_info
+
+
+def save_forqan_lessons_info(forqan_lessons_info: Dict[str, Dict]) -> None:
+    """
+    Saves the lessons info of a crawl as `forqan_lessons_info.json` in the directory of the 'FINAL_OUTPUTS_DIR' environment variable,
+    which is where the next incremental crawl starts from (check `incremental_crawl.get_forqan_lessons_info_path()`),
+    then saves an intermediate copy for debugging purposes.
+
+    Args:
+        forqan_lessons_info (Dict[str, Dict]): A dictionary with module information, including lesson details.
+
+    Returns:
+        None
+    """
+    save_data(forqan_lessons_info, "forqan_lessons_info", file_extension="json", 
+            intermediate_output=False, add_intermediate_counter_prefix=False, compression="")
+    save_data(forqan_lessons_info, "forqan_lessons_info", file_extension="json")
+
+
+@record_metrics
 def get_video_urls_descriptions_and_pdf_metadata(modules_name_and_html: List[Tuple[str, str]], 
                                             forqan_modules_urls: List[str], 
                                             lessons_names_and_urls_per_module: List[List[Tuple[str, str]]],
-                                            session: Session
+                                            session: Session,
+                                            max_in_flight: Optional[int] = None
                                             ) -> Dict[str, Dict]:
     """
     Extracts and compiles video URLs, descriptions, and occasionally PDF names/URLs for each lesson in each module. PDFs summarize a couple of lessons.
@@ -311,118 +632,132 @@ def get_video_urls_descriptions_and_pdf_metadata(modules_name_and_html: List[Tup
         - For normal lessons, extracts the video URL and description.
     - Stores all extracted information in a structured dictionary, including video URLs, descriptions, and PDF information when applicable.
 
+    The lesson pages (of all modules) are fetched concurrently, with at most `max_in_flight` requests at the same time, 
+    but the modules and lessons are stored in the same order as the sequential crawl (i.e., when `max_in_flight` is 1).
+    Each lesson record is also appended to a JSON Lines intermediate output as soon as it is scraped 
+    (check `iter_lessons_info()`), so the scraped lessons are kept even if the process dies.
+
     Args:
         modules_name_and_html (List[Tuple[str, str]]): A list of tuples containing module names and their HTML content.
         forqan_modules_urls (List[str]): A list of URLs for each module.
         lessons_names_and_urls_per_module (List[List[Tuple[str, str]]]): A nested list where each sublist contains tuples of lesson names and URLs for a module.
+        session (Session): The (logged-in) session used for fetching the lesson pages.
+        max_in_flight (int, optional): The maximum number of lesson pages fetched at the same time. 
+            Defaults to the 'MAX_IN_FLIGHT_REQUESTS' environment variable (check `get_max_in_flight()`).
 
     Returns:
         Dict[str, Dict]: A dictionary with module information, including lesson details such as names, URLs, availability, content descriptions, and occasionally PDF names/URLs.
     """
+    lessons_records = iter_lessons_info(modules_name_and_html, 
+                                        forqan_modules_urls, 
+                                        lessons_names_and_urls_per_module, 
+                                        session, 
+                                        max_in_flight)
+    lessons_records = stream_records_to_jsonl(lessons_records, "forqan_lessons_records")
+    forqan_lessons_info = build_forqan_lessons_info_from_records(lessons_records)
+    save_forqan_lessons_info(forqan_lessons_info)
+
+    return forqan_lessons_info
+
+
+@record_metrics
+def crawl_forqan_lessons_info(forqan_modules_urls: List[str], 
+                            session: Session, 
+                            max_in_flight: Optional[int] = None) -> Dict[str, Dict]:
+    """
+    Fetches the module pages and lesson pages in one pipelined crawl, then returns the same dictionary as `get_video_urls_descriptions_and_pdf_metadata()`.
+
+    This is the streaming equivalent of calling `get_modules_info_using_regex()`, `get_lessons_name_and_urls_using_regex()`, 
+    then `get_video_urls_descriptions_and_pdf_metadata()`:
+    - All module pages are queued first in a shared thread pool.
+    - As soon as a module page arrives (in the order of `forqan_modules_urls`), its lesson links are extracted 
+        and its lesson pages are queued in the same pool, so they start downloading while the next module pages are still in flight.
+    - Each module's HTML is dropped right after its lesson links are extracted, instead of keeping all module pages in memory.
+
+    Args:
+        forqan_modules_urls (List[str]): A list of URLs for the Forqan modules.
+        session (Session): The (logged-in) session used for fetching the pages.
+        max_in_flight (int, optional): The maximum number of pages fetched at the same time. 
+            Defaults to the 'MAX_IN_FLIGHT_REQUESTS' environment variable (check `get_max_in_flight()`).
+
+    Returns:
+        Dict[str, Dict]: A dictionary with module information, including lesson details (check `get_video_urls_descriptions_and_pdf_metadata()`).
+    """
     forqan_lessons_info = {}
-    # iterating by each module name/url
-    for i, ((module_name, _), module_url) in enumerate(zip(modules_name_and_html, forqan_modules_urls)):
-        module_num = f"{i+1:02d}"
-        logger.debug(f"module num and name: {module_num}: {module_name}")
-        cur_module_lessons = lessons_names_and_urls_per_module[i]
-        forqan_lessons_info[f"module_{module_num}"] = {"name": module_name, "url": module_url, "lessons": []}
-        
-        # iterating by each lesson name/url
-        for lesson_name, lesson_url in cur_module_lessons:
-            logger.debug(f"lesson_name: {lesson_name}")
-            logger.debug(f"lesson_url: {lesson_url}")
-            lesson_response = session.get(lesson_url)
-            lesson_html_string = lesson_response.text
-            soup = BeautifulSoup(lesson_html_string, 'html.parser')
-            lesson_content = {}
-
-            # check if the lesson is not available yet
-            if re.search(r'يرجى العودة وإكمال', lesson_html_string) or re.search(r'متوفر في', lesson_html_string):
-                # store lesson's info as non-available
-                lesson_content['not_available'] = True
-                logger.debug(f"lesson_name: {lesson_name} is not available yet")
-
-            # check if the lesson is a revision lesson
-            elif "المحاضرات" in lesson_name:
-                logger.debug(f"revision lesson_title: {lesson_name}")
-
-                # ensure pdf_name is compatible with the file-naming system
-                lesson_name = html.unescape(lesson_name).replace('–', '-')
-                pdf_name = lesson_name
-                invalid_chars = r'[\\/:*?"<>|]'
-                pdf_name = re.sub(invalid_chars, '', pdf_name)
-                lesson_content['pdf_name'] = pdf_name
-                logger.debug(f"its pdf_name: {pdf_name}")
-
-                # get pdf URL to download later
-                pdf_url = soup.find('a', class_='ui button fluid primary btn text-link')['href']
-                lesson_content['pdf_url'] = pdf_url
-                logger.debug(f"pdf_url: {pdf_url}")
-
-            # else, this is a normal and available lesson
-            else:
-                # get video URL to use later for getting .srt files using speech-to-text AI model
-                try:
-                    video_url = soup.find('iframe')['src']
-                except:
-                    logger.error('unable to find video URL, will print the soup HTML content for debugging purposes')
-                    logger.debug(f"soup HTML content: {soup.prettify()}")
-
-                lesson_content['video_url'] = video_url
-                logger.debug(f"video_url: {video_url}")
-
-                # get the description of the video
-                div_tag = soup.find('div', class_='ld-tab-content ld-visible lesson-materials-btns')
-                text_content = div_tag.get_text(separator='\n\n', strip=True)
-                desc_termination_keyword = "لمشاهدة"
-                video_description = text_content.split(desc_termination_keyword)[0].strip()
-                lesson_content['video_description'] = video_description
-                logger.debug(f"video_description: {video_description}")
-            
-            # store current lesson's info to dictionary
-            forqan_lessons_info[f"module_{module_num}"]["lessons"].append({
-                "name": lesson_name,
-                "url": lesson_url,
-                **lesson_content
-            })
-
-    # saving intermed`iate outputs for debugging purposes
-    save_data(forqan_lessons_info, "forqan_lessons_info", file_extension="json")
+    lessons_names_and_urls_per_module = []
+    # (module key, future of the lesson's info) of all lessons, in the order they should be stored
+    lessons_futures = []
+    with ThreadPoolExecutor(max_workers=get_max_in_flight(max_in_flight)) as executor:
+        modules_futures = [executor.submit(_get_module_info, url, session) for url in forqan_modules_urls]
+
+        for i, (module_future, module_url) in enumerate(zip(modules_futures, forqan_modules_urls)):
+            module_name, module_html = module_future.result()
+            module_num = f"{i+1:02d}"
+            logger.debug(f"module num and name: {module_num}: {module_name}")
+            forqan_lessons_info[f"module_{module_num}"] = {"name": module_name, "url": module_url, "lessons": []}
+
+            # saving intermediate outputs for debugging purposes
+            if i == 0:
+                save_data(module_html, "module_pages_first_url_response")
+            if i == len(forqan_modules_urls) - 1:
+                save_data(module_html, "module_pages_last_url_response")
+
+            cur_module_lessons = _get_lessons_name_and_urls(module_name, module_html)
+            lessons_names_and_urls_per_module.append(cur_module_lessons)
+            lessons_futures.extend((f"module_{module_num}", executor.submit(get_lesson_info, lesson_name, lesson_url, session)) 
+                                    for lesson_name, lesson_url in cur_module_lessons)
+
+        # store each lesson's info to dictionary
+        for module_key, lesson_future in lessons_futures:
+            forqan_lessons_info[module_key]["lessons"].append(lesson_future.result())
+
+    # saving intermediate outputs for debugging purposes
+    save_data(lessons_names_and_urls_per_module, "lessons_names_and_urls_per_module", file_extension="json")
+    save_forqan_lessons_info(forqan_lessons_info)
 
     return forqan_lessons_info
 
 
-def download_revision_pdfs(forqan_lessons_info: Dict) -> None:
+@record_metrics
+def download_revision_pdfs(forqan_lessons_info: Dict, 
+                        session: Optional[Session] = None, 
+                        max_in_flight: Optional[int] = None,
+                        use_blob_store: Optional[bool] = None) -> Dict[str, int]:
     """
     Downloads PDFs from URLs found in the nested dictionary 'forqan_lessons_info' and saves them with names specified in the dictionary.
 
     The PDFs are saved in a subdirectory 'revisions_pdfs' within the directory specified by the 'FINAL_OUTPUTS_DIR' environment variable. 
     This subdirectory is created if it does not already exist.
 
+    Each PDF is streamed to disk in chunks (instead of being buffered in memory), the PDFs are downloaded concurrently 
+    over a pooled session, partial downloads are resumed using HTTP Range requests, and PDFs which were already downloaded 
+    are skipped (check `pdf_downloads.download_file()`).
+
+    If the blob store is used, each distinct PDF is stored once by its content hash, the per-module files are hardlinks to it, 
+    and a URL which was downloaded in a previous run isn't requested again (check `pdf_blob_store.PdfBlobStore`).
+
     Args:
         forqan_lessons_info (Dict): A nested dictionary containing 'pdf_url' and 'pdf_name' keys among others.
+        session (Session, optional): The session used for downloading the PDFs (e.g., the one returned by `login()`, 
+            so that its HTTP cache is used). Defaults to None (i.e., a new pooled session).
+        max_in_flight (int, optional): The maximum number of PDFs downloaded at the same time. 
+            Defaults to the 'MAX_IN_FLIGHT_REQUESTS' environment variable (check `get_max_in_flight()`).
+        use_blob_store (bool, optional): Whether to store the PDFs in the content-addressed blob store. 
+            Defaults to the 'USE_PDF_BLOB_STORE' environment variable (enabled unless it is set to '0').
 
     Returns:
-        None
+        Dict[str, int]: The number of PDFs which were skipped, downloaded, resumed, or failed
+        (e.g., checkpointed by the pipeline's `revision_pdfs` stage, while it returned None before the downloads were parallelized).
     """
-
-    for module_info in forqan_lessons_info.values():
-        module_name = module_info.get("name", "unknown_module")
-        dir_name = os.path.join("revisions_pdfs", module_name)
-
-        for lesson in module_info.get("lessons", []):
-            if "pdf_url" in lesson and "pdf_name" in lesson:
-                pdf_url = lesson["pdf_url"]
-                pdf_name = lesson["pdf_name"]
-                response = requests.get(pdf_url)
-                if response.status_code != 200:
-                    logger.error(f"Failed to download this pdf: {pdf_url}")
-                    continue
-                pdf_content = response.content
-                save_data(data_to_be_saved=pdf_content, 
-                        file_name=pdf_name, 
-                        dir_name=dir_name, 
-                        file_extension="pdf", 
-                        intermediate_output=False, 
-                        add_intermediate_counter_prefix=False)
-                logger.info(f"Downloaded and saved: {pdf_name}.pdf")
\ No newline at end of file
+    max_in_flight = get_max_in_flight(max_in_flight)
+    if session is None:
+        session = ScheduledSession(RequestScheduler(max_concurrency=max_in_flight))
+        _mount_pooled_adapter(session, max_in_flight, use_http_cache=False)
+
+    if use_blob_store is None:
+        use_blob_store = os.getenv('USE_PDF_BLOB_STORE', '1') == '1'
+
+    pdfs_to_download = get_revision_pdfs_to_download(forqan_lessons_info)
+    if use_blob_store:
+        return download_pdfs_to_blob_store(pdfs_to_download, session, PdfBlobStore(), max_in_flight)
+    return download_pdfs(pdfs_to_download, session, max_in_flight)
@@ -0,0 +1,249 @@
+import os
+import json
+import time
+import atexit
+import functools
+import threading
+from typing import Any, Callable, Dict, Union
+
+from loguru import logger
+
+
+# the metrics are only collected if this environment variable is '1' (or if `enable_metrics()` is called)
+_metrics_enabled = os.getenv('LOG_METRICS', '0') == '1'
+_summary_registered = False
+
+# the prefix of the metric names in the Prometheus text format
+PROMETHEUS_METRICS_PREFIX = 'forqan'
+
+
+def _get_size(obj: Any) -> int:
+    """
+    Returns the approximate size of an object's data in bytes.
+
+    Strings are counted by their number of characters, containers by the sizes of their elements,
+    and `requests.Response` objects by their `Content-Length` header. Other objects are counted as 0 bytes.
+
+    Parameters
+    ----------
+    obj : Any
+        The object to measure.
+
+    Returns
+    -------
+    int
+        The approximate size in bytes.
+    """
+    if isinstance(obj, (str, bytes, bytearray)):
+        return len(obj)
+    if isinstance(obj, dict):
+        return sum(_get_size(key) + _get_size(value) for key, value in obj.items())
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return sum(_get_size(elem) for elem in obj)
+    if type(obj).__name__ == 'Response' and type(obj).__module__.startswith('requests'):
+        return int(obj.headers.get('Content-Length', 0) or 0)
+    return 0
+
+
+class MetricsRegistry:
+    """
+    An in-process registry of per-function metrics (calls, errors, wall time, thread CPU time, and bytes in/out).
+
+    Notes
+    -----
+    The times of a function include the times of the functions it calls (i.e., they are inclusive),
+    and the CPU time only counts the thread which called the function (so it excludes the work done by thread pools).
+    """
+
+    _FIELDS = ('calls', 'errors', 'wall_time', 'max_wall_time', 'cpu_time', 'bytes_in', 'bytes_out')
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, Dict[str, Union[int, float]]] = {}
+
+    def record(self,
+            name: str,
+            wall_time: float,
+            cpu_time: float,
+            bytes_in: int = 0,
+            bytes_out: int = 0,
+            failed: bool = False) -> None:
+        """
+        Records a call of a function.
+
+        Parameters
+        ----------
+        name : str
+            The name of the function.
+        wall_time : float
+            The wall time of the call (in seconds).
+        cpu_time : float
+            The CPU time of the calling thread during the call (in seconds).
+        bytes_in : int, optional
+            The size of the call's arguments (check `_get_size()`). Default is 0.
+        bytes_out : int, optional
+            The size of the call's result. Default is 0.
+        failed : bool, optional
+            If True, the call raised an exception. Default is False.
+        """
+        with self._lock:
+            metrics = self._metrics.setdefault(name, dict.fromkeys(self._FIELDS, 0))
+            metrics['calls'] += 1
+            metrics['errors'] += int(failed)
+            metrics['wall_time'] += wall_time
+            metrics['max_wall_time'] = max(metrics['max_wall_time'], wall_time)
+            metrics['cpu_time'] += cpu_time
+            metrics['bytes_in'] += bytes_in
+            metrics['bytes_out'] += bytes_out
+
+    def get_metrics(self) -> Dict[str, Dict[str, Union[int, float]]]:
+        """
+        Returns a copy of the metrics of each function, sorted by their total wall time (descending).
+        """
+        with self._lock:
+            metrics = {name: dict(func_metrics) for name, func_metrics in self._metrics.items()}
+        return dict(sorted(metrics.items(), key=lambda item: item[1]['wall_time'], reverse=True))
+
+    def reset(self) -> None:
+        with self._lock:
+            self._metrics.clear()
+
+    def to_json(self, file_path: Union[str, None] = None) -> str:
+        """
+        Exports the metrics as JSON.
+
+        Parameters
+        ----------
+        file_path : str, optional
+            If given, the JSON is also written to this file.
+
+        Returns
+        -------
+        str
+            The JSON string.
+        """
+        metrics_json = json.dumps(self.get_metrics(), indent=2)
+        if file_path is not None:
+            with open(file_path, 'w', encoding='utf-8') as file:
+                file.write(metrics_json)
+        return metrics_json
+
+    def to_prometheus(self) -> str:
+        """
+        Exports the metrics in the Prometheus text exposition format (e.g., to be written to a node-exporter textfile).
+
+        Returns
+        -------
+        str
+            The metrics, with a `function` label per decorated function.
+        """
+        metric_types = {
+            'calls': ('calls_total', 'counter', 'Number of calls'),
+            'errors': ('errors_total', 'counter', 'Number of calls which raised an exception'),
+            'wall_time': ('wall_seconds_total', 'counter', 'Total wall time in seconds'),
+            'max_wall_time': ('max_wall_seconds', 'gauge', 'Longest wall time of a single call in seconds'),
+            'cpu_time': ('cpu_seconds_total', 'counter', 'Total CPU time of the calling thread in seconds'),
+            'bytes_in': ('bytes_in_total', 'counter', 'Approximate size of the arguments in bytes'),
+            'bytes_out': ('bytes_out_total', 'counter', 'Approximate size of the results in bytes'),
+        }
+        metrics = self.get_metrics()
+        lines = []
+        for field, (suffix, metric_type, description) in metric_types.items():
+            metric_name = f'{PROMETHEUS_METRICS_PREFIX}_function_{suffix}'
+            lines.append(f'# HELP {metric_name} {description} of each decorated function.')
+            lines.append(f'# TYPE {metric_name} {metric_type}')
+            for name, func_metrics in metrics.items():
+                label = name.replace('\\', '\\\\').replace('"', '\\"')
+                lines.append(f'{metric_name}{{function="{label}"}} {func_metrics[field]}')
+        return '\n'.join(lines) + '\n'
+
+    def get_summary_table(self) -> str:
+        """
+        Returns the metrics as a text table (one row per function, sorted by total wall time).
+        """
+        header = f"{'function':<60} {'calls':>7} {'errors':>6} {'wall (s)':>10} {'max (s)':>9} {'cpu (s)':>9} {'in (KB)':>10} {'out (KB)':>10}"
+        rows = [header, '-' * len(header)]
+        for name, m in self.get_metrics().items():
+            rows.append(f"{name[-60:]:<60} {m['calls']:>7} {m['errors']:>6} {m['wall_time']:>10.3f} {m['max_wall_time']:>9.3f} "
+                        f"{m['cpu_time']:>9.3f} {m['bytes_in'] / 1024:>10.1f} {m['bytes_out'] / 1024:>10.1f}")
+        return '\n'.join(rows)
+
+
+metrics_registry = MetricsRegistry()
+
+
+def log_metrics_summary() -> None:
+    """
+    Logs the summary table of the metrics (if any were collected).
+    """
+    if metrics_registry.get_metrics():
+        logger.info('Functions metrics:\n{}', metrics_registry.get_summary_table())
+
+
+def _register_summary_at_exit() -> None:
+    global _summary_registered
+    if not _summary_registered:
+        _summary_registered = True
+        atexit.register(log_metrics_summary)
+
+
+def is_metrics_enabled() -> bool:
+    return _metrics_enabled
+
+
+def enable_metrics(enabled: bool = True) -> None:
+    """
+    Enables (or disables) the collection of metrics by the functions decorated with `record_metrics` (or `log_decorator`).
+
+    When enabled, the summary table is logged when the program exits (check `log_metrics_summary()`).
+
+    Parameters
+    ----------
+    enabled : bool, optional
+        Whether to collect the metrics. Default is True.
+    """
+    global _metrics_enabled
+    _metrics_enabled = enabled
+    if enabled:
+        _register_summary_at_exit()
+
+
+if _metrics_enabled:
+    _register_summary_at_exit()
+
+
+def record_metrics(func: Callable) -> Callable:
+    """
+    Decorator for recording the metrics of a function's calls in `metrics_registry` (if metrics are enabled, check `enable_metrics()`).
+
+    Parameters
+    ----------
+    func : Callable
+        The function to decorate.
+
+    Returns
+    -------
+    Callable
+        The decorated function.
+    """
+    name = f'{func.__module__}.{func.__qualname__}'
+
+    @functools.wraps(func)
+    def wrapped(*args, **kwargs):
+        if not _metrics_enabled:
+            return func(*args, **kwargs)
+
+        start_wall_time, start_cpu_time = time.perf_counter(), time.thread_time()
+        failed, result = True, None
+        try:
+            result = func(*args, **kwargs)
+            failed = False
+            return result
+        finally:
+            wall_time, cpu_time = time.perf_counter() - start_wall_time, time.thread_time() - start_cpu_time
+            metrics_registry.record(name, wall_time, cpu_time,
+                                    bytes_in=_get_size(args) + _get_size(kwargs),
+                                    bytes_out=_get_size(result),
+                                    failed=failed)
+
+    return wrapped
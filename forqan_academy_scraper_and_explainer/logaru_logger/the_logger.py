@@ -1,39 +1,189 @@
 import sys
 import os
-from dotenv import load_dotenv
-load_dotenv(override=True)
 from datetime import datetime
+import random
+import hashlib
 import functools
 from typing import Union, Any
-import pandas as pd
 
-import pyprojroot
 from loguru import logger
-from varname import argname
+
+
+def _find_dotenv_file() -> Union[str, None]:
+    """
+    Returns the path of the closest `.env` file, or None if there is no such file.
+
+    Like `dotenv.find_dotenv()` (when it's called from this file), the file is searched for in this file's directory and its parents,
+    or in the current working directory and its parents in interactive sessions (e.g., notebooks).
+    """
+    if hasattr(sys.modules['__main__'], '__file__'):
+        dir_name = os.path.dirname(os.path.abspath(__file__))
+    else:
+        dir_name = os.getcwd()
+    while True:
+        dotenv_path = os.path.join(dir_name, '.env')
+        if os.path.isfile(dotenv_path):
+            return dotenv_path
+        parent_dir_name = os.path.dirname(dir_name)
+        if parent_dir_name == dir_name:
+            return None
+        dir_name = parent_dir_name
+
+
+# Implementation note: `dotenv` is only imported if there is a `.env` file to load, to cut the startup time
+#   (the same goes for the other slow imports of this file, i.e., `pandas`, `varname` and `pyprojroot`)
+_dotenv_path = _find_dotenv_file()
+if _dotenv_path is not None:
+    from dotenv import load_dotenv
+    load_dotenv(_dotenv_path, override=True)
+
+from logaru_logger.metrics import record_metrics
 
 # the code below should ensure that each file which calls `logger` from this file (not `loguru`) 
 # will have have the same handler configuration
 
-# Remove default handler
-logger.remove()
-lvl = 'DEBUG' if os.environ['DEBUG']=='1' else 'INFO'
+# The logging profiles, selected by the 'LOG_PROFILE' environment variable:
+# * 'notebook' (default): synchronous sinks (check `_add_notebook_sinks()`).
+# * 'production': enqueued (non-blocking) sinks, a JSON file sink and compressed rotated files (check `_add_production_sinks()`).
+LOG_PROFILES = ('notebook', 'production')
+
+
+def _get_project_root_dir() -> str:
+    import pyprojroot
+    return str(pyprojroot.here())
+
+
+def _get_detailed_logs_dir() -> str:
+    """
+    Returns the directory of the log files: 'detailed_logs' within the 'LOG_DIR' environment variable 
+    (relative to the project root), or within the project's 'logs' directory if it isn't set.
+    """
+    return os.path.join(_get_project_root_dir(), os.getenv('LOG_DIR', 'logs'), 'detailed_logs')
+
+
+def _add_notebook_sinks(lvl: str) -> None:
+    """
+    Adds the synchronous stdout sink and the plain-text file sink (shared by all the scripts started in the same 10 minutes).
+
+    Parameters
+    ----------
+    lvl : str
+        The minimum level of the stdout sink.
+    """
+    # Log to stdout
+    # DEBUGGING NOTE: enqueue=False means that the logging calls are processed in the same thread 
+    #   and so the application will wait for the logging to complete before continuing execution.
+    #   This is done to avoid an ipykernel-related issue where the logging messages are all displayed in the first cell which logs a message.
+    logger.add(sys.stdout, level=lvl, enqueue=False)  
+
+    # all scripts' (i.e., sub-processes') logs will be stored 
+    # in the same file of the i^th 10 minute range in today's date and hour
+    # so the files will have a structure like this in case it was created in the 9:30am/9:40am range:
+    # "PROJECT_ROOT_DIR/logs/run_log_2024-05-09_09h-30m.log"
+    mm_interval = str((datetime.now().minute // 10) * 10)
+    log_file_name = 'run_log_{time:YYYY-MM-DD_HH}h-' + mm_interval + 'm.log'
+    log_file_path = os.path.join(_get_detailed_logs_dir(), log_file_name) 
+
+    # Rotate log file every 100 MB in case the log is too large even in the span of these 10 minutes
+    logger.add(log_file_path, rotation="100 MB")  
+
+
+def _get_debug_sampling_filter(sample_rate: float):
+    """
+    Returns a sink filter which keeps all the messages above the DEBUG level, and only a random `sample_rate` fraction 
+    of the DEBUG (and TRACE) messages (e.g., the per-lesson messages of a crawl).
+
+    Parameters
+    ----------
+    sample_rate : float
+        The fraction of DEBUG messages to keep (between 0 and 1).
+
+    Returns
+    -------
+    Union[Callable, None]
+        The filter, or None if all the messages are kept.
+    """
+    if sample_rate >= 1:
+        return None
+    debug_level_no = logger.level('DEBUG').no
+
+    def _filter(record: dict) -> bool:
+        return record['level'].no > debug_level_no or random.random() < sample_rate
+
+    return _filter
+
+
+def _add_production_sinks(lvl: str) -> None:
+    """
+    Adds non-blocking sinks for long (non-interactive) runs:
+    * an enqueued stdout sink, so that a log call never waits for the terminal.
+    * an enqueued file sink, where each message is serialized as a JSON line (for machine parsing).
+      Each process writes its own file (named by its start time and PID), rotated every 'LOG_ROTATION' (default "100 MB")
+      and compressed using 'LOG_COMPRESSION' (default "gz").
+
+    The DEBUG messages of both sinks can be sampled by setting 'LOG_DEBUG_SAMPLE_RATE' (e.g., 0.1 keeps 10% of them).
+
+    Parameters
+    ----------
+    lvl : str
+        The minimum level of the sinks.
+
+    Notes
+    -----
+    Since the sinks are enqueued, the messages are written by a background thread (`loguru` waits for it when the program exits,
+    or call `logger.complete()`).
+    """
+    debug_sampling_filter = _get_debug_sampling_filter(float(os.getenv('LOG_DEBUG_SAMPLE_RATE', '1')))
+
+    logger.add(sys.stdout, level=lvl, enqueue=True, filter=debug_sampling_filter)
+
+    log_file_name = 'run_log_{time:YYYY-MM-DD_HH-mm-ss}_' + str(os.getpid()) + '.json.log'
+    log_file_path = os.path.join(_get_detailed_logs_dir(), log_file_name)
+    logger.add(log_file_path, 
+            level=lvl,
+            enqueue=True, 
+            serialize=True, 
+            rotation=os.getenv('LOG_ROTATION', '100 MB'), 
+            compression=os.getenv('LOG_COMPRESSION', 'gz') or None, 
+            filter=debug_sampling_filter)
+
+
+def configure_logger(profile: Union[str, None] = None) -> None:
+    """
+    (Re)configures the logger's sinks according to a logging profile (check `LOG_PROFILES`).
+
+    Parameters
+    ----------
+    profile : str, optional
+        The logging profile. Defaults to the 'LOG_PROFILE' environment variable, or 'notebook' if it isn't set.
+
+    Raises
+    ------
+    ValueError
+        If the profile is invalid.
+    """
+    if profile is None:
+        profile = os.getenv('LOG_PROFILE', 'notebook')
+    if profile not in LOG_PROFILES:
+        raise ValueError(f"Invalid logging profile: {profile}. Supported profiles are: {', '.join(LOG_PROFILES)}")
+
+    # Remove default handler
+    logger.remove()
+    lvl = 'DEBUG' if os.environ['DEBUG']=='1' else 'INFO'
+
+    if profile == 'production':
+        _add_production_sinks(lvl)
+    else:
+        _add_notebook_sinks(lvl)
+
 
-# Log to stdout
-# DEBUGGING NOTE: enqueue=False means that the logging calls are processed in the same thread 
-#   and so the application will wait for the logging to complete before continuing execution.
-#   This is done to avoid an ipykernel-related issue where the logging messages are all displayed in the first cell which logs a message.
-logger.add(sys.stdout, level=lvl, enqueue=False)  
+configure_logger()
 
-# all scripts' (i.e., sub-processes') logs will be stored 
-# in the same file of the i^th 10 minute range in today's date and hour
-# so the files will have a structure like this in case it was created in the 9:30am/9:40am range:
-# "PROJECT_ROOT_DIR/logs/run_log_2024-05-09_09h-30m.log"
-mm_interval = str((datetime.now().minute // 10) * 10)
-log_file_name = 'run_log_{time:YYYY-MM-DD_HH}h-' + mm_interval + 'm.log'
-log_file_path = os.path.join(str(pyprojroot.here()), 'logs', 'detailed_logs', log_file_name) 
 
-# Rotate log file every 100 MB in case the log is too large even in the span of these 10 minutes
-logger.add(log_file_path, rotation="100 MB")  
+# The maximum number of characters (or bytes) of a value logged by `log_decorator` before it is summarized,
+# and the maximum number of elements of a logged list/tuple (check `_convert_pd_to_str()`)
+LOG_VALUE_BUDGET = int(os.getenv('LOG_VALUE_BUDGET', '300'))
+LOG_MAX_ITEMS = int(os.getenv('LOG_MAX_ITEMS', '10'))
 
 
 def _get_level(level: Union[str, int]) -> Union[str, int]:
@@ -77,6 +227,54 @@ def _get_level(level: Union[str, int]) -> Union[str, int]:
     return level
 
 
+def _get_min_level_no() -> int:
+    """
+    Returns the lowest level number accepted by at least one of the logger's sinks.
+
+    Returns
+    -------
+    int
+        The minimum level number (e.g., 10 if a sink accepts DEBUG messages).
+
+    Notes
+    -----
+    `loguru` doesn't expose this publicly, so its internal `_core.min_level` is used. If it's ever removed (or renamed), 
+    the minimum level of the sinks found in `_core.handlers` is used instead, and if these can't be introspected either, 
+    all levels are considered enabled (i.e., the previous behavior).
+    """
+    core = getattr(logger, '_core', None)
+    min_level = getattr(core, 'min_level', None)
+    if isinstance(min_level, (int, float)):
+        return min_level
+    try:
+        return min((handler.levelno for handler in core.handlers.values()), default=0)
+    except Exception:
+        return 0
+
+
+def _is_level_enabled(level: Union[str, int]) -> bool:
+    """
+    Returns whether a message with the given level would be emitted by at least one sink.
+
+    Parameters
+    ----------
+    level : Union[str, int]
+        The log level (as returned by `_get_level()`).
+
+    Returns
+    -------
+    bool
+        True if the level is enabled.
+    """
+    level_no = level if isinstance(level, int) else logger.level(level).no
+    return level_no >= _get_min_level_no()
+
+
+# The variable names passed to the decorated functions, keyed by the call site (check `log_decorator()`)
+_call_site_var_names_cache = {}
+_CALL_SITE_VAR_NAMES_CACHE_MAX_SIZE = 4096
+
+
 def _get_var_names_passed_to_args_or_kwargs(data:Union[tuple, dict]) -> str:
     """
     Returns the variable names passed to the function arguments or keyword arguments.
@@ -105,6 +303,9 @@ def _get_var_names_passed_to_args_or_kwargs(data:Union[tuple, dict]) -> str:
     if len(data_list) == 0:
         return ''
 
+    # Implementation note: `varname` is imported here (i.e., only when a message with the variable names is emitted), to cut the startup time
+    from varname import argname
+
     func_depth = 2
     try:
         if len(data_list) == 1:
@@ -121,14 +322,81 @@ def _get_var_names_passed_to_args_or_kwargs(data:Union[tuple, dict]) -> str:
             return ''
 
 
+def _get_short_hash(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=6).hexdigest()
+
+
+def _summarize_str(string: str) -> str:
+    """
+    Returns the string itself if it fits in `LOG_VALUE_BUDGET` characters, otherwise a summary of it 
+    (i.e., its length, a hash of its content, and a preview of its head and tail).
+
+    Parameters
+    ----------
+    string : str
+        The string to summarize.
+
+    Returns
+    -------
+    str
+        The string or its summary.
+    """
+    if len(string) <= LOG_VALUE_BUDGET:
+        return string
+    preview_len = LOG_VALUE_BUDGET // 2
+    return (f"<str len={len(string)} hash={_get_short_hash(string.encode('utf-8', 'replace'))} "
+            f"head={string[:preview_len]!r} tail={string[-preview_len:]!r}>")
+
+
+def _summarize_bytes(data: Union[bytes, bytearray]) -> str:
+    """
+    Returns a summary of bytes (i.e., their length, a hash, and a preview of their head and tail if they exceed `LOG_VALUE_BUDGET`).
+    """
+    if len(data) <= LOG_VALUE_BUDGET:
+        return f"<bytes len={len(data)} value={bytes(data)!r}>"
+    preview_len = LOG_VALUE_BUDGET // 2
+    return (f"<bytes len={len(data)} hash={_get_short_hash(bytes(data))} "
+            f"head={bytes(data[:preview_len])!r} tail={bytes(data[-preview_len:])!r}>")
+
+
+def _summarize_response(response: Any) -> str:
+    """
+    Returns a summary of a `requests.Response` (without reading its body, in case it is streamed).
+    """
+    content_length = response.headers.get('Content-Length', 'unknown')
+    return f"<Response [{response.status_code}] url={response.url} content-length={content_length}>"
+
+
+def _is_response(obj: Any) -> bool:
+    # Implementation note: `requests` isn't imported here, so that the logger doesn't depend on it
+    return type(obj).__name__ == 'Response' and type(obj).__module__.startswith('requests')
+
+
+def _summarize_sequence(seq: Union[list, tuple]) -> Union[list, tuple]:
+    """
+    Returns the sequence with each of its elements converted (check `_convert_pd_to_str()`), 
+    where only the first and last elements are kept if it has more than `LOG_MAX_ITEMS` elements.
+    """
+    if len(seq) <= LOG_MAX_ITEMS:
+        elems = [_convert_pd_to_str(elem) for elem in seq]
+    else:
+        kept_len = LOG_MAX_ITEMS // 2
+        elems = [_convert_pd_to_str(elem) for elem in seq[:kept_len]] \
+            + [f"... {len(seq) - 2 * kept_len} more items ..."] \
+            + [_convert_pd_to_str(elem) for elem in seq[-kept_len:]]
+    return elems if isinstance(seq, list) else tuple(elems)
+
+
 def _convert_pd_to_str(obj:Union[dict, list, tuple, Any]) -> Union[dict, list, tuple, Any]:
     """
-    Recursively converts all pandas objects in the input to string representations.
+    Recursively converts all pandas objects (and large values) in the input to string representations.
 
     This function takes an object and recursively converts all pandas DataFrames and Series in the object to string 
     representations. If the object is a dictionary, list, or tuple, it recursively applies this function to each element. 
     If the object is a pandas DataFrame, it returns a string representation of the DataFrame's columns. If the object is a 
-    pandas Series, it returns a string representation of the Series' name. Otherwise, it returns the object as is.
+    pandas Series, it returns a string representation of the Series' name. Long strings, bytes, and `requests.Response` objects
+    are summarized, and long lists/tuples are shortened (check `LOG_VALUE_BUDGET` and `LOG_MAX_ITEMS`). 
+    Otherwise, it returns the object as is.
 
     Parameters
     ----------
@@ -147,12 +415,21 @@ def _convert_pd_to_str(obj:Union[dict, list, tuple, Any]) -> Union[dict, list, t
         gregorian date strings in the object, they would be after the year 1599.
 
     """
+    if isinstance(obj, str):
+        return _summarize_str(obj)
     if isinstance(obj, dict):
         return {k: _convert_pd_to_str(v) for k, v in obj.items()}
-    if isinstance(obj, list):
-        return [_convert_pd_to_str(elem) for elem in obj]
-    if isinstance(obj, tuple):
-        return tuple([_convert_pd_to_str(elem) for elem in obj])
+    if isinstance(obj, (list, tuple)):
+        return _summarize_sequence(obj)
+    if isinstance(obj, (bytes, bytearray)):
+        return _summarize_bytes(obj)
+    if _is_response(obj):
+        return _summarize_response(obj)
+    # Implementation note: pandas isn't imported here (it's slow to import), 
+    #   since if it wasn't imported by the caller, there can't be any pandas objects to convert
+    pd = sys.modules.get('pandas')
+    if pd is None:
+        return obj
     if isinstance(obj, pd.DataFrame):
         return f"pd.DataFrame with cols: {', '.join(obj.columns)}"
     if isinstance(obj, pd.Series):
@@ -245,6 +522,11 @@ def log_decorator(*, entry:bool=True, exit:bool=False, level:str="INFO"):
 
     If entry/exit booleans are False, then the function's entry/exit details 
     will still be logged, but at the DEBUG level.
+
+    The calls are also timed when the metrics are enabled (check `logaru_logger.metrics.enable_metrics()`).
+
+    The entry/exit details are only built if their level is enabled by at least one sink (check `_is_level_enabled()`),
+    and the variable names passed to the function are inspected once per call site.
     
     Source: https://loguru.readthedocs.io/en/stable/resources/recipes.html#logging-entry-and-exit-of-functions-with-a-decorator
     Other sources for understanding decorators:
@@ -256,6 +538,8 @@ def log_decorator(*, entry:bool=True, exit:bool=False, level:str="INFO"):
 
     def wrapper(func):
         func_name = func.__name__
+        # the function's metrics are recorded if they are enabled (check `logaru_logger.metrics`)
+        timed_func = record_metrics(func)
 
         @functools.wraps(func)
         def wrapped(*args, **kwargs):
@@ -266,46 +550,62 @@ def log_decorator(*, entry:bool=True, exit:bool=False, level:str="INFO"):
             entry_level = level if entry else 'DEBUG'
             exit_level = level if exit else 'DEBUG'
 
-            # Get the names of the variables passed to args and kwargs
-            arg_names, kwarg_names = map(_get_var_names_passed_to_args_or_kwargs, [args, kwargs])
-
-            # Convert pandas objects in args and kwargs to a more log-friendly format
-            arg_values, kwarg_values = _convert_pandas_objects(args, kwargs)
-
-            # Filter out any functions that passes sensitive info 
-            # so that it doesn't log the values in the passed arguments
-            # TODO (in the future): Add more functions to this list whenever needed
-            sensitive_functions = ['login']
-
-            # Construct the strings for the log message
-            strs = ['\nArg-Var-Names = ({})', '\nKwarg-Var-Names = ({})', 
-                    '\nArg-Var-Values = ({})' if func_name not in sensitive_functions else '', 
-                    '\nKwarg-Var-Values = ({})' if func_name not in sensitive_functions else '']
-
-            # Get the values to be logged
-            all_vals = [arg_names, kwarg_names, arg_values, kwarg_values]
-            # Implementation note: Get each value only if the corresponding string is not empty
-            vals = [val for val, strr in zip(all_vals, strs) if strr]
-
-            # Construct the final string for the log message
-            str_final = '<magenta>Entering \"{}\"' + ''.join(strs) + '</>'
-
-            # Log the function entry details (args, kwargs, etc.)
-            # Implementation note: we don't use f strings here as they don't get color-formatted by loguru
-            logger_.log(entry_level, str_final, func_name, *vals)
+            # Log the function entry details (args, kwargs, etc.), only if a sink would actually emit them
+            # Implementation note: the variable names and values are costly to get (frame inspection and recursive conversions), 
+            #   and the arguments may be huge (e.g., HTML pages)
+            if _is_level_enabled(entry_level):
+                # Get the names of the variables passed to args and kwargs
+                # Implementation note: the names passed at a call site (i.e., the caller's code and bytecode offset) are always the same,
+                #   so they are only inspected once per call site. 
+                #   `_get_var_names_passed_to_args_or_kwargs` must still be called directly from here, since it inspects the frames above it
+                caller_frame = sys._getframe(1)
+                call_site_key = (caller_frame.f_code, caller_frame.f_lasti, len(args), tuple(kwargs))
+                del caller_frame
+                var_names = _call_site_var_names_cache.get(call_site_key)
+                if var_names is None:
+                    var_names = tuple(map(_get_var_names_passed_to_args_or_kwargs, [args, kwargs]))
+                    if len(_call_site_var_names_cache) >= _CALL_SITE_VAR_NAMES_CACHE_MAX_SIZE:
+                        _call_site_var_names_cache.clear()
+                    _call_site_var_names_cache[call_site_key] = var_names
+                arg_names, kwarg_names = var_names
+
+                # Convert pandas objects in args and kwargs to a more log-friendly format
+                arg_values, kwarg_values = _convert_pandas_objects(args, kwargs)
+
+                # Filter out any functions that passes sensitive info 
+                # so that it doesn't log the values in the passed arguments
+                # TODO (in the future): Add more functions to this list whenever needed
+                sensitive_functions = ['login']
+
+                # Construct the strings for the log message
+                strs = ['\nArg-Var-Names = ({})', '\nKwarg-Var-Names = ({})', 
+                        '\nArg-Var-Values = ({})' if func_name not in sensitive_functions else '', 
+                        '\nKwarg-Var-Values = ({})' if func_name not in sensitive_functions else '']
+
+                # Get the values to be logged
+                all_vals = [arg_names, kwarg_names, arg_values, kwarg_values]
+                # Implementation note: Get each value only if the corresponding string is not empty
+                vals = [val for val, strr in zip(all_vals, strs) if strr]
+
+                # Construct the final string for the log message
+                str_final = '<magenta>Entering \"{}\"' + ''.join(strs) + '</>'
+
+                # Implementation note: we don't use f strings here as they don't get color-formatted by loguru
+                logger_.log(entry_level, str_final, func_name, *vals)
 
             # Run the function
-            result = func(*args, **kwargs)
+            result = timed_func(*args, **kwargs)
 
-            # Convert the result to a more log-friendly format
-            log_result = _convert_pandas_objects(obj=result, get_empty_res_as_str=True)
+            # Log the function exit details (return value(s)), only if a sink would actually emit them
+            if _is_level_enabled(exit_level):
+                # Convert the result to a more log-friendly format
+                log_result = _convert_pandas_objects(obj=result, get_empty_res_as_str=True)
 
-            # Construct the string for the log message
-            str_res = '\nResults = {}' if log_result else ''
-            str_final = '<magenta>Exiting "{}"' + str_res + '</>'
+                # Construct the string for the log message
+                str_res = '\nResults = {}' if log_result else ''
+                str_final = '<magenta>Exiting "{}"' + str_res + '</>'
 
-            # Log the function exit details (return value(s))
-            logger_.log(exit_level, str_final, func_name, *[log_result] if str_res else [])
+                logger_.log(exit_level, str_final, func_name, *[log_result] if str_res else [])
 
             # Return the result of the function
             return result
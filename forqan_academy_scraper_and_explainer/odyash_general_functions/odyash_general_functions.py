@@ -1,21 +1,56 @@
 import json
 import os
+import re
+import gzip
+import hashlib
+import mmap
+import time
 import pickle
-from typing import Any, Union, Dict
-import requests
+import importlib
+import queue
+import atexit
+import functools
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterable, Iterator, Tuple, Union, Dict
 
 from pyprojroot import here
 
 from logaru_logger.the_logger import logger
+from odyash_general_functions.run_manifest import RunManifest, STAGE_ENV_VAR, get_run_id
 
 # TODO (importance level: low): logic that will set "SAVED_FILES_DICT" to key:value pairs 
 #   based on the file name and the file path without extension
 #   then, a boolean flag in save_data() to ask if the developer wants to
 #   overwrite a saved file within the same session or increase its prefix counter its time its run within the same ipython session
 
+# The file formats supported by `save_data()` and `load_data_from_file()`
+SAVE_DATA_FORMATS = ("txt", "html", "json", "jsonl", "pkl", "msgpack", "pdf")
+# The compressions which can be added to a file format (e.g., 'json.gz'). 'zst' requires `zstandard` to be installed
+SAVE_DATA_COMPRESSIONS = ("gz", "zst")
+
+# Files smaller than this are read directly instead of being memory-mapped by `load_data_from_file()`
+_LOAD_DATA_MMAP_MIN_SIZE = 1024 * 1024
+_load_data_cache: OrderedDict = OrderedDict()
+_load_data_cache_lock = threading.Lock()
+_run_manifests: Dict[Tuple[str, str], RunManifest] = {}
+_run_manifests_lock = threading.Lock()
+
+def get_run_manifest() -> RunManifest:
+    """
+    Get the manifest of the current run (check `RunManifest`), stored in the '.run_manifests' directory of the intermediate outputs.
+    """
+    manifests_dir = get_directory(".run_manifests", intermediate_output=True)
+    manifest_key = (manifests_dir, get_run_id())
+    with _run_manifests_lock:
+        if manifest_key not in _run_manifests:
+            _run_manifests[manifest_key] = RunManifest(manifests_dir)
+        return _run_manifests[manifest_key]
+
 def _prefix_str_with_global_counter(string: str) -> str:
     """
-    Prefix a string with a counter.
+    Prefix a string with a counter, which is assigned atomically across the threads and processes of the run (check `RunManifest`).
 
     Args:
         string (str): The string to be prefixed.
@@ -23,14 +58,12 @@ def _prefix_str_with_global_counter(string: str) -> str:
     Returns:
         str: The string prefixed with a counter.
     """    
-    if os.getenv('INTERMEDIATE_OUTPUTS_COUNTER') is None:
-        os.environ['INTERMEDIATE_OUTPUTS_COUNTER'] = "1"
-
-    new_string = f"{os.getenv('INTERMEDIATE_OUTPUTS_COUNTER')}_{string}"
+    return f"{get_run_manifest().next_counter()}_{string}"
 
-    os.environ['INTERMEDIATE_OUTPUTS_COUNTER'] = str(int(os.getenv('INTERMEDIATE_OUTPUTS_COUNTER')) + 1)
-
-    return new_string
+def _get_counter_from_file_path(file_path_without_extension: str, add_intermediate_counter_prefix: bool) -> Union[int, None]:
+    if not add_intermediate_counter_prefix:
+        return None
+    return int(os.path.basename(file_path_without_extension).split("_", 1)[0])
 
 def _create_directory(dir_name: str) -> None:
     """
@@ -44,7 +77,27 @@ def _create_directory(dir_name: str) -> None:
     """
     os.makedirs(dir_name, exist_ok=True)
 
-def _get_directory(dir_name: Union[str, None], intermediate_output: bool) -> str:
+@functools.lru_cache(maxsize=None)
+def _resolve_directory(dir_name: str, outputs_dir: str) -> str:
+    """
+    Resolve (and create) a directory inside an outputs directory of the project.
+
+    The result is cached, since `pyprojroot.here()` walks up the file system on each call,
+    and `save_data()` is called many times with the same few directories.
+
+    Args:
+        dir_name (str): The directory name (relative to `outputs_dir`).
+        outputs_dir (str): The outputs directory (relative to the project root).
+
+    Returns:
+        str: The directory path.
+    """
+    dir_name = os.path.normpath(os.path.join(here(), outputs_dir, dir_name))
+    _create_directory(dir_name)
+
+    return dir_name
+
+def get_directory(dir_name: Union[str, None], intermediate_output: bool) -> str:
     """
     Get the directory path based on the given parameters and create the directory if it does not exist.
 
@@ -58,11 +111,13 @@ def _get_directory(dir_name: Union[str, None], intermediate_output: bool) -> str
     if dir_name is None:
         dir_name = ""
     if intermediate_output:
-        dir_name = os.path.join(here(), os.getenv("INTERMEDIATE_OUTPUTS_DIR"), dir_name)
+        outputs_dir = os.getenv("INTERMEDIATE_OUTPUTS_DIR")
     else:
-        dir_name = os.path.join(here(), os.getenv("FINAL_OUTPUTS_DIR"), dir_name)
-    dir_name = os.path.normpath(dir_name)
-    _create_directory(dir_name)
+        outputs_dir = os.getenv("FINAL_OUTPUTS_DIR")
+    dir_name = _resolve_directory(dir_name, outputs_dir)
+    # in case the directory was deleted after it was cached (e.g., when cleaning the outputs between notebook runs)
+    if not os.path.isdir(dir_name):
+        _create_directory(dir_name)
 
     return dir_name
 
@@ -83,111 +138,491 @@ def _get_file_path_without_extension(dir_name: str, file_name: str, add_intermed
     file_path_without_extension = os.path.join(dir_name, file_name)
     return file_path_without_extension
 
-def _save_data_to_json(file_path_without_extension: str, data_to_be_saved: Any) -> None:
+def _import_optional_module(module_name: str, file_format: str) -> Any:
+    """
+    Import a module which is only needed for some file formats, raising a helpful error if it isn't installed.
     """
-    Save data to a JSON file.
+    try:
+        return importlib.import_module(module_name)
+    except ImportError as e:
+        raise ImportError(f"The '{file_format}' format requires {module_name}, install it using `pip install {module_name}`") from e
+
+def _split_file_extension(file_extension: Union[str, None]) -> Tuple[Union[str, None], Union[str, None]]:
+    """
+    Split a file extension into its format and its compression (e.g., 'json.gz' -> ('json', 'gz'), 'json' -> ('json', None)).
+    """
+    if file_extension is None:
+        return None, None
+    base_extension, _, compression = file_extension.rpartition(".")
+    if base_extension and compression in SAVE_DATA_COMPRESSIONS:
+        return base_extension, compression
+    return file_extension, None
+
+def _get_file_extension_from_name(file_name: str) -> Union[str, None]:
+    """
+    Get the file extension of a file name, parsed from its end (e.g., 'module 1.2 lessons.json.gz' -> 'json.gz'),
+    since the names of the modules and the lessons can contain dots.
+    """
+    name_parts = file_name.split(".")[1:]
+    if name_parts and name_parts[-1] in SAVE_DATA_COMPRESSIONS and len(name_parts) > 1:
+        return ".".join(name_parts[-2:])
+    return name_parts[-1] if name_parts else None
+
+def _get_file_extension(file_extension: Union[str, None], compression: Union[str, None] = None) -> str:
+    """
+    Validate a file extension, then add the compression to it (if it doesn't already have one).
 
     Args:
-        file_path_without_extension (str): The path of the file.
-        data_to_be_saved (Any): The data to be saved.
+        file_extension (str): The file extension (e.g., 'json' or 'json.gz').
+        compression (str, optional): One of `SAVE_DATA_COMPRESSIONS`, or '' for no compression. 
+            Defaults to the 'SAVE_DATA_COMPRESSION' environment variable, or no compression if it isn't set.
 
     Returns:
-        None
+        str: The file extension (e.g., 'json.zst').
+
+    Raises:
+        ValueError: If the file extension or the compression is invalid.
+    """
+    base_extension, file_compression = _split_file_extension(file_extension)
+    if base_extension not in SAVE_DATA_FORMATS:
+        raise ValueError(f"Invalid file_extension: {file_extension}. Supported file_extensions are {', '.join(SAVE_DATA_FORMATS)} " 
+                        f"(optionally followed by one of these compressions: {', '.join(SAVE_DATA_COMPRESSIONS)}).")
+    if compression is None:
+        compression = os.getenv("SAVE_DATA_COMPRESSION", "")
+    if file_compression is not None or not compression or base_extension == "pdf":
+        # EXPLANATION NOTE: PDFs are already compressed, so compressing them again only wastes time
+        return file_extension
+    if compression not in SAVE_DATA_COMPRESSIONS:
+        raise ValueError(f"Invalid compression: {compression}. Supported compressions are {', '.join(SAVE_DATA_COMPRESSIONS)}.")
+    return f"{file_extension}.{compression}"
+
+@functools.lru_cache(maxsize=None)
+def _get_orjson() -> Any:
+    """
+    Get the `orjson` module if it is installed, otherwise None (imported on first use, since it is slow to import).
     """
-    with open(f'{file_path_without_extension}.json', "w") as file:
-        json.dump(data_to_be_saved, file, ensure_ascii=False, indent=2)
+    try:
+        import orjson
+        return orjson
+    except ImportError:
+        return None
 
-def _save_data_to_txt(file_path_without_extension: str, data_to_be_saved: Any) -> None:
+def _dumps_json(data: Any, indent: bool = False) -> bytes:
     """
-    Save data to a text file.
+    Serialize data to UTF-8 encoded JSON, using `orjson` (which is much faster than `json`) if it is installed.
+    """
+    orjson = _get_orjson()
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+        return orjson.dumps(data, option=option)
+    return json.dumps(data, ensure_ascii=False, indent=2 if indent else None).encode("utf-8")
+
+def _loads_json(data: Union[bytes, str, mmap.mmap]) -> Any:
+    orjson = _get_orjson()
+    if orjson is not None:
+        return orjson.loads(data if isinstance(data, (bytes, str)) else memoryview(data))
+    return json.loads(data if isinstance(data, (bytes, str)) else bytes(data))
+
+def _serialize_data(base_extension: str, data_to_be_saved: Any, compressed: bool) -> bytes:
+    """
+    Serialize data to the bytes of a file of the given format.
 
     Args:
-        file_path_without_extension (str): The path of the file.
+        base_extension (str): The file format (i.e., the file extension without its compression).
         data_to_be_saved (Any): The data to be saved.
+        compressed (bool): Whether the bytes will be compressed (in which case, JSON isn't indented, since it is no longer human-readable anyway).
 
     Returns:
-        None
+        bytes: The content of the file.
     """
-    with open(f'{file_path_without_extension}.txt', "w") as file:
-        file.write(str(data_to_be_saved))
+    if base_extension == "txt":
+        return str(data_to_be_saved).encode("utf-8")
+    elif base_extension == "html":
+        return data_to_be_saved if isinstance(data_to_be_saved, bytes) else data_to_be_saved.encode("utf-8")
+    elif base_extension == "json":
+        return _dumps_json(data_to_be_saved, indent=not compressed)
+    elif base_extension == "jsonl":
+        return b"".join(_dumps_json(record) + b"\n" for record in data_to_be_saved)
+    elif base_extension == "pkl":
+        return pickle.dumps(data_to_be_saved)
+    elif base_extension == "msgpack":
+        return _import_optional_module("msgpack", base_extension).packb(data_to_be_saved, use_bin_type=True)
+    elif base_extension == "pdf":
+        return data_to_be_saved
+    else:
+        raise ValueError(f"Invalid file_extension: {base_extension}. Supported file_extensions are {', '.join(SAVE_DATA_FORMATS)}.")
 
-# TODO: prettify the HTML when saving to html file
-def _save_data_to_html(file_path_without_extension: str, data_to_be_saved: Any) -> None:
+def _deserialize_data(base_extension: str, file_content: bytes) -> Any:
     """
-    Save data to an HTML file.
+    Deserialize the bytes of a file of the given format (i.e., the inverse of `_serialize_data()`).
+
+    Notes:
+    - 'txt' and 'html' files are returned as strings, 'pdf' files as bytes, and 'jsonl' files as lists of records.
+    """
+    if base_extension in ("txt", "html"):
+        return bytes(file_content).decode("utf-8")
+    elif base_extension == "json":
+        return _loads_json(file_content)
+    elif base_extension == "jsonl":
+        return [_loads_json(line) for line in bytes(file_content).splitlines() if line.strip()]
+    elif base_extension == "pkl":
+        return pickle.loads(file_content)
+    elif base_extension == "msgpack":
+        return _import_optional_module("msgpack", base_extension).unpackb(file_content, raw=False, strict_map_key=False)
+    elif base_extension == "pdf":
+        return bytes(file_content)
+    else:
+        raise ValueError(f"Invalid file_extension: {base_extension}. Supported file_extensions are {', '.join(SAVE_DATA_FORMATS)}.")
+
+def _compress_data(compression: Union[str, None], file_content: bytes) -> bytes:
+    if compression is None:
+        return file_content
+    elif compression == "gz":
+        return gzip.compress(file_content, compresslevel=6)
+    elif compression == "zst":
+        return _import_optional_module("zstandard", compression).ZstdCompressor(level=3).compress(file_content)
+    else:
+        raise ValueError(f"Invalid compression: {compression}. Supported compressions are {', '.join(SAVE_DATA_COMPRESSIONS)}.")
+
+def _decompress_data(compression: Union[str, None], file_content: bytes) -> bytes:
+    if compression is None:
+        return file_content
+    elif compression == "gz":
+        return gzip.decompress(file_content)
+    elif compression == "zst":
+        # IMPLEMENTATION NOTE: `decompressobj()` is used since frames written in a streaming way don't store the content size
+        return _import_optional_module("zstandard", compression).ZstdDecompressor().decompressobj().decompress(file_content)
+    else:
+        raise ValueError(f"Invalid compression: {compression}. Supported compressions are {', '.join(SAVE_DATA_COMPRESSIONS)}.")
+
+def _save_data_based_on_extension(file_extension: Union[str, None], file_path_without_extension: str, data_to_be_saved: Any) -> Tuple[int, str]:
+    """
+    Serialize (and compress) the data based on the file extension (e.g., 'json' or 'json.gz'), then write it to the file.
 
     Args:
+        file_extension (str, optional): The file extension. Defaults to None.
         file_path_without_extension (str): The path of the file.
         data_to_be_saved (Any): The data to be saved.
 
     Returns:
-        None
+        Tuple[int, str]: The size and the SHA-256 hash of the written content (hashed in memory, so the file isn't read again to record it).
+    """
+    base_extension, compression = _split_file_extension(_get_file_extension(file_extension, compression=""))
+    file_content = _serialize_data(base_extension, data_to_be_saved, compressed=compression is not None)
+    file_content = _compress_data(compression, file_content)
+    with open(f'{file_path_without_extension}.{file_extension}', "wb") as file:
+        file.write(file_content)
+    return len(file_content), hashlib.sha256(file_content).hexdigest()
+
+def _read_file_content(file: Any, file_size: int) -> Union[bytes, mmap.mmap]:
+    """
+    Read a file's content, where large files are memory-mapped (i.e., the OS pages them in while they are decoded,
+    instead of copying them into a bytes object first).
+    """
+    if file_size < _LOAD_DATA_MMAP_MIN_SIZE:
+        return file.read()
+    return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+def _iter_jsonl_records(file_content: Union[bytes, mmap.mmap]) -> Iterator[Any]:
+    start = 0
+    while start < len(file_content):
+        end = file_content.find(b"\n", start)
+        if end == -1:
+            end = len(file_content)
+        line = file_content[start:end]
+        if line.strip():
+            yield _loads_json(line)
+        start = end + 1
+
+def _iter_jsonl_file_records(file_path: str, compression: Union[str, None]) -> Iterator[Any]:
+    with open(file_path, "rb") as file:
+        file_content = _read_file_content(file, os.fstat(file.fileno()).st_size)
+        try:
+            yield from _iter_jsonl_records(_decompress_data(compression, file_content))
+        finally:
+            if isinstance(file_content, mmap.mmap):
+                file_content.close()
+
+def _get_load_data_cache_size() -> int:
+    return max(int(os.getenv("LOAD_DATA_CACHE_SIZE", "16")), 0)
+
+def clear_load_data_cache() -> None:
+    """
+    Clear the in-process cache of `load_data()` and `load_data_from_file()`.
     """
-    with open(f'{file_path_without_extension}.html', "w") as file:
-        file.write(data_to_be_saved)
+    with _load_data_cache_lock:
+        _load_data_cache.clear()
 
-def _save_data_to_pkl(file_path_without_extension: str, data_to_be_saved: Any) -> None:
+def load_data_from_file(file_path: str, use_cache: bool = True, lazy: bool = False) -> Any:
     """
-    Save data to a pickle file.
+    Load the data of a file saved by `save_data()`, where the format (and compression) is inferred from the file's extension.
+
+    - Large files are memory-mapped instead of being read into memory before they are decoded.
+    - The decoded data is kept in an in-process LRU cache (its size is set by the 'LOAD_DATA_CACHE_SIZE' environment variable, 16 by default),
+        keyed by the file's path, modification time and size, so loading an unchanged file again doesn't decode it again.
 
     Args:
-        file_path_without_extension (str): The path of the file.
-        data_to_be_saved (Any): The data to be saved.
+        file_path (str): The path of the file (e.g., '.../forqan_lessons_info.json.zst').
+        use_cache (bool, optional): Whether to use the cache. Defaults to True.
+        lazy (bool, optional): For 'jsonl' files, return an iterator which decodes each record only when it is reached
+            (instead of a list of all the records). Such iterators aren't cached. Defaults to False.
 
     Returns:
-        None
+        Any: The loaded data (check `_deserialize_data()` for the type returned by each format).
+            Since the cached data is shared, it shouldn't be modified (use `copy.deepcopy()` first if needed).
+
+    Raises:
+        FileNotFoundError: If the file doesn't exist.
+    """
+    file_name = os.path.basename(file_path)
+    file_extension = _get_file_extension_from_name(file_name)
+    base_extension, compression = _split_file_extension(_get_file_extension(file_extension, compression=""))
+    if lazy and base_extension == "jsonl":
+        return _iter_jsonl_file_records(file_path, compression)
+
+    file_stat = os.stat(file_path)
+    cache_key = (os.path.abspath(file_path), file_stat.st_mtime_ns, file_stat.st_size)
+    if use_cache:
+        with _load_data_cache_lock:
+            if cache_key in _load_data_cache:
+                _load_data_cache.move_to_end(cache_key)
+                return _load_data_cache[cache_key]
+
+    with open(file_path, "rb") as file:
+        file_content = _read_file_content(file, file_stat.st_size)
+    try:
+        data = _deserialize_data(base_extension, _decompress_data(compression, file_content))
+    finally:
+        if isinstance(file_content, mmap.mmap):
+            file_content.close()
+
+    cache_size = _get_load_data_cache_size()
+    if use_cache and cache_size > 0:
+        with _load_data_cache_lock:
+            _load_data_cache[cache_key] = data
+            while len(_load_data_cache) > cache_size:
+                _load_data_cache.popitem(last=False)
+    return data
+
+def _find_saved_file_path(dir_name: str, 
+                        file_name: str, 
+                        file_extension: Union[str, None], 
+                        add_intermediate_counter_prefix: bool) -> str:
     """
-    with open(f'{file_path_without_extension}.pkl', "wb") as file:
-        pickle.dump(data_to_be_saved, file)
+    Find the path of the latest file saved by `save_data()` with the given name (and extension, if given).
+
+    Args:
+        dir_name (str): The directory where the file was saved.
+        file_name (str): The name of the file (without extension, and without its counter prefix).
+        file_extension (str, optional): The file extension (e.g., 'json' or 'json.gz'). If None, any supported extension is matched.
+        add_intermediate_counter_prefix (bool): Whether the file name was prefixed with a counter.
+
+    Returns:
+        str: The file path. If several files match, the latest modified one is returned (or the one with the largest counter, if they were modified at the same time).
 
-def _save_data_to_pdf(file_path_without_extension: str, data_to_be_saved: Any) -> None:
+    Raises:
+        FileNotFoundError: If no file matches.
+    """
+    if file_extension is None:
+        file_extensions = [base_extension for base_extension in SAVE_DATA_FORMATS] \
+            + [f"{base_extension}.{compression}" for base_extension in SAVE_DATA_FORMATS for compression in SAVE_DATA_COMPRESSIONS]
+    else:
+        file_extensions = [file_extension]
+    counter_pattern = r"(\d+)_" if add_intermediate_counter_prefix else r"()"
+    file_name_pattern = re.compile(counter_pattern + re.escape(file_name) + r"\.(?:" + "|".join(map(re.escape, file_extensions)) + r")")
+
+    latest_file = None
+    if os.path.isdir(dir_name):
+        for entry in os.scandir(dir_name):
+            file_name_match = file_name_pattern.fullmatch(entry.name)
+            if file_name_match is None or not entry.is_file():
+                continue
+            sort_key = (entry.stat().st_mtime_ns, int(file_name_match.group(1) or 0))
+            if latest_file is None or sort_key > latest_file[0]:
+                latest_file = (sort_key, entry.path)
+
+    if latest_file is None:
+        raise FileNotFoundError(f"No saved file named {file_name} (with extension {file_extension or 'any'}) in {dir_name}")
+    return latest_file[1]
+
+def load_data(file_name: str, 
+            dir_name: Union[str, None] = None, 
+            file_extension: Union[str, None] = None,
+            intermediate_output: bool = True,
+            add_intermediate_counter_prefix: bool = True,
+            use_cache: bool = True,
+            lazy: bool = False) -> Any:
     """
-    Save data to a PDF file.
+    Load data saved by `save_data()`, using the same arguments (e.g., `load_data("forqan_lessons_info", file_extension="json")`).
+
+    Since `save_data()` prefixes intermediate outputs with a counter, the latest saved file with the given name is loaded
+    (found in the run's manifest if it was saved during the current run, otherwise check `_find_saved_file_path()`). The file is then loaded by `load_data_from_file()` (i.e., memory-mapped and cached).
 
     Args:
-        file_path_without_extension (str): The path of the file.
-        data_to_be_saved (Any): The data to be saved.
+        file_name (str): The name of the file (without extension, and without its counter prefix).
+        dir_name (str, optional): The directory name where the file was saved. Defaults to None.
+        file_extension (str, optional): The file extension (e.g., 'json' or 'json.gz'). Defaults to None (i.e., any supported extension).
+        intermediate_output (bool, optional): Flag indicating if it is an intermediate output. Defaults to True.
+        add_intermediate_counter_prefix (bool, optional): Flag indicating if the file name was prefixed with a counter. Defaults to True.
+        use_cache (bool, optional): Whether to use the cache of `load_data_from_file()`. Defaults to True.
+        lazy (bool, optional): For 'jsonl' files, return an iterator of the records (check `load_data_from_file()`). Defaults to False.
 
     Returns:
-        None
+        Any: The loaded data.
+
+    Raises:
+        FileNotFoundError: If no saved file matches.
+    """
+    dir_name = get_directory(dir_name, intermediate_output)
+    # the files saved during the current run are found in the run's manifest, without listing the directory
+    entry = get_run_manifest().get_entry(dir_name, file_name) if add_intermediate_counter_prefix else None
+    if entry is not None and os.path.exists(entry["file_path"]) \
+            and (file_extension is None or entry["file_path"].endswith(f".{file_extension}")):
+        file_path = entry["file_path"]
+    else:
+        file_path = _find_saved_file_path(dir_name, file_name, file_extension, add_intermediate_counter_prefix)
+
+    return load_data_from_file(file_path, use_cache=use_cache, lazy=lazy)
+
+class _AsyncSaveDataWriter:
+    """
+    A background thread which writes the files queued by `save_data()` when the async mode is enabled.
+
+    The queued items are written in the order they were queued, in batches (i.e., all the items queued while 
+    the previous batch was being written), so that the callers of `save_data()` never wait for the disk.
     """
-    with open(f'{file_path_without_extension}.pdf', "wb") as file:
-        file.write(data_to_be_saved)
 
-def _save_data_based_on_extension(file_extension: Union[str, None], file_path_without_extension: str, data_to_be_saved: Any) -> None:
+    # queued by `close()` to stop the thread, after the items queued before it are written
+    _STOP = object()
+
+    def __init__(self) -> None:
+        self._queue = queue.Queue()
+        self._closed = False
+        self._closed_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="save_data_writer", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            for write_args in batch:
+                if write_args is self._STOP:
+                    self._queue.task_done()
+                    return
+                try:
+                    _write_data(*write_args)
+                except Exception:
+                    logger.exception(f"Failed to save data to {write_args[1]}.{write_args[0]}")
+                finally:
+                    self._queue.task_done()
+
+    def put(self, *write_args: Any) -> None:
+        """
+        Queue a file to be written (check `_write_data()` for the arguments), or write it right away if the writer was closed
+        (e.g., by a call of `save_data()` which got the writer just before the async mode was disabled).
+        """
+        with self._closed_lock:
+            if not self._closed:
+                self._queue.put(write_args)
+                return
+        _write_data(*write_args)
+
+    def flush(self) -> None:
+        self._queue.join()
+
+    def close(self) -> None:
+        """
+        Write the queued files, then stop the thread.
+        """
+        with self._closed_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(self._STOP)
+        self._thread.join()
+
+
+_async_save_data_writer: Union[_AsyncSaveDataWriter, None] = None
+_async_save_data_writer_lock = threading.Lock()
+
+def enable_async_save_data(enabled: bool = True) -> None:
     """
-    Choose the appropriate save function based on the file extension.
+    Enable (or disable) the async mode of `save_data()`, where files are written by a background thread.
+
+    It can also be enabled by setting the 'ASYNC_SAVE_DATA' environment variable to '1'.
+    The queued files are flushed when the async mode is disabled (which also stops the background thread), when `flush_save_data()` is called, 
+    and when the program exits.
 
     Args:
-        file_extension (str, optional): The file extension. Defaults to None.
-        file_path_without_extension (str): The path of the file.
-        data_to_be_saved (Any): The data to be saved.
+        enabled (bool, optional): Whether to enable the async mode. Defaults to True.
 
     Returns:
         None
     """
-    if file_extension == "txt":
-        _save_data_to_txt(file_path_without_extension, data_to_be_saved)
-    elif file_extension is "html":
-        _save_data_to_html(file_path_without_extension, data_to_be_saved)
-    elif file_extension == "pkl":
-        _save_data_to_pkl(file_path_without_extension, data_to_be_saved)
-    elif file_extension == "json":
-        _save_data_to_json(file_path_without_extension, data_to_be_saved)
-    elif file_extension == "pdf":
-        _save_data_to_pdf(file_path_without_extension, data_to_be_saved)
-    else:
-        raise ValueError("Invalid file_extension. Supported file_extensions are 'txt', 'pkl', and 'json'.")
+    global _async_save_data_writer
+    with _async_save_data_writer_lock:
+        if enabled and _async_save_data_writer is None:
+            _async_save_data_writer = _AsyncSaveDataWriter()
+        elif not enabled and _async_save_data_writer is not None:
+            _async_save_data_writer.close()
+            _async_save_data_writer = None
+
+def flush_save_data() -> None:
+    """
+    Wait until all the files queued by `save_data()` (in async mode) are written to disk.
+
+    Returns:
+        None
+    """
+    writer = _async_save_data_writer
+    if writer is not None:
+        writer.flush()
+
+# the files queued in async mode are written before the program exits (registered once, however many times the async mode is toggled)
+atexit.register(flush_save_data)
+
+def _write_data(file_extension: Union[str, None], 
+                file_path_without_extension: str, 
+                data_to_be_saved: Any, 
+                file_name: str, 
+                counter: Union[int, None], 
+                stage: Union[str, None]) -> None:
+    """
+    Write the data to the file, record it in the run's manifest (check `RunManifest.record()`), then log where it was saved.
+    """
+    start_time = time.perf_counter()
+    size, sha256 = _save_data_based_on_extension(file_extension, file_path_without_extension, data_to_be_saved)
+    get_run_manifest().record(f"{file_path_without_extension}.{file_extension}", file_name, counter, 
+                            time.perf_counter() - start_time, stage, size=size, sha256=sha256)
+
+    log_level = "DEBUG" if os.getenv("DEBUG") == "1" else "INFO"
+    logger.log(log_level, f"Data saved to {file_path_without_extension}.{file_extension}")
 
 def save_data(data_to_be_saved: Any, 
             file_name: str, 
             dir_name: Union[str, None] = None, 
             file_extension: Union[str, None] = "txt",
             intermediate_output: bool = True,
-            add_intermediate_counter_prefix: bool = True) -> None:
+            add_intermediate_counter_prefix: bool = True,
+            compression: Union[str, None] = None) -> None:
     """
     Save data to a file.
 
+    The file format is chosen by `file_extension` (one of `SAVE_DATA_FORMATS`), and it can be compressed 
+    by adding one of `SAVE_DATA_COMPRESSIONS` to it (e.g., 'json.gz'), or by passing `compression` 
+    (or setting the 'SAVE_DATA_COMPRESSION' environment variable to compress all the saved files).
+    Use `load_data_from_file()` to load the file back.
+
+    If the async mode is enabled (check `enable_async_save_data()`), the file is queued to be written by a background thread, 
+    so the data shouldn't be modified after calling this function. The file name (including its counter prefix) is still 
+    decided when this function is called, so the counters keep the order of the calls.
+
     Args:
         data_to_be_saved (Any): The data to be saved.
         file_name (str): The name of the file (without extension).
@@ -195,13 +630,110 @@ def save_data(data_to_be_saved: Any,
         file_extension (str, optional): The file extension.
         intermediate_output (bool, optional): Flag indicating if it is an intermediate output. Defaults to True.
         add_intermediate_counter_prefix (bool, optional): Flag indicating if a counter prefix should be added to the file name. Defaults to False.
+        compression (str, optional): One of `SAVE_DATA_COMPRESSIONS`, or '' for no compression. Defaults to the 'SAVE_DATA_COMPRESSION' environment variable.
 
     Returns:
         None
+
+    Raises:
+        ValueError: If the file extension or the compression is invalid.
     """
-    dir_name = _get_directory(dir_name, intermediate_output)
+    file_extension = _get_file_extension(file_extension, compression)
+    dir_name = get_directory(dir_name, intermediate_output)
     file_path_without_extension = _get_file_path_without_extension(dir_name, file_name, add_intermediate_counter_prefix)
-    _save_data_based_on_extension(file_extension, file_path_without_extension, data_to_be_saved)
+
+    if _async_save_data_writer is None and os.getenv("ASYNC_SAVE_DATA") == "1":
+        enable_async_save_data()
+
+    write_args = (file_extension, file_path_without_extension, data_to_be_saved, file_name, 
+                _get_counter_from_file_path(file_path_without_extension, add_intermediate_counter_prefix), os.getenv(STAGE_ENV_VAR))
+    writer = _async_save_data_writer
+    if writer is not None:
+        writer.put(*write_args)
+    else:
+        _write_data(*write_args)
+
+def ordered_bounded_map(func: Callable[[Any], Any], 
+                        iterable: Iterable[Any], 
+                        max_in_flight: int = 1) -> Iterator[Any]:
+    """
+    Lazily apply a function to each item of an iterable using a thread pool, yielding the results in input order.
+
+    At most `max_in_flight` calls run at the same time, and only a small window of 
+    items is consumed ahead of the item currently being yielded, 
+    so memory stays bounded even for long (or lazy) iterables.
+    If `max_in_flight` is 1 (or less), the items are processed sequentially in the calling thread.
+
+    Args:
+        func (Callable[[Any], Any]): The function to apply to each item.
+        iterable (Iterable[Any]): The items to process.
+        max_in_flight (int, optional): The maximum number of concurrent calls. Defaults to 1.
+
+    Returns:
+        Iterator[Any]: The results of `func`, in the same order as the items of `iterable`.
+    """
+    if max_in_flight <= 1:
+        for item in iterable:
+            yield func(item)
+        return
+
+    # IMPLEMENTATION NOTE: the window is larger than the pool so that a slow item at the head 
+    #   of the queue doesn't leave the workers idle while we wait to yield it
+    window_size = 2 * max_in_flight
+    with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+        pending = deque()
+        try:
+            for item in iterable:
+                pending.append(executor.submit(func, item))
+                if len(pending) >= window_size:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            # in case the consumer stopped early (or an exception was raised), don't run the remaining items
+            for future in pending:
+                future.cancel()
+
+
+def stream_records_to_jsonl(records: Iterable[Any], 
+                            file_name: str, 
+                            dir_name: Union[str, None] = None, 
+                            intermediate_output: bool = True,
+                            add_intermediate_counter_prefix: bool = True) -> Iterator[Any]:
+    """
+    Append each record to a JSON Lines file as soon as it is produced, then yield it (i.e., a pass-through sink).
+
+    Since each line is flushed right after it is written, the records produced so far are kept 
+    even if the process dies before the stream is exhausted.
+
+    Args:
+        records (Iterable[Any]): The (JSON-serializable) records.
+        file_name (str): The name of the file (without extension).
+        dir_name (str, optional): The directory name where the file will be saved. Defaults to None.
+        intermediate_output (bool, optional): Flag indicating if it is an intermediate output. Defaults to True.
+        add_intermediate_counter_prefix (bool, optional): Flag indicating if a counter prefix should be added to the file name. Defaults to True.
+
+    Returns:
+        Iterator[Any]: The same records.
+    """
+    dir_name = get_directory(dir_name, intermediate_output)
+    file_path_without_extension = _get_file_path_without_extension(dir_name, file_name, add_intermediate_counter_prefix)
+
+    start_time = time.perf_counter()
+    sha256 = hashlib.sha256()
+    with open(f'{file_path_without_extension}.jsonl', "ab") as file:
+        # EXPLANATION NOTE: the records are hashed while they are written, unless the file already had records (which would have to be read)
+        previous_size = file.tell()
+        for record in records:
+            line = _dumps_json(record) + b"\n"
+            file.write(line)
+            file.flush()
+            sha256.update(line)
+            yield record
+        size = file.tell()
+    get_run_manifest().record(f"{file_path_without_extension}.jsonl", file_name, 
+                            _get_counter_from_file_path(file_path_without_extension, add_intermediate_counter_prefix), 
+                            time.perf_counter() - start_time, size=size, sha256=sha256.hexdigest() if previous_size == 0 else None)
 
     log_level = "DEBUG" if os.getenv("DEBUG") == "1" else "INFO"
-    logger.log(log_level, f"Data saved to {file_path_without_extension}.{file_extension}")
\ No newline at end of file
+    logger.log(log_level, f"Records streamed to {file_path_without_extension}.jsonl")
@@ -0,0 +1,181 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Tuple, Union
+
+try:
+    import fcntl
+except ImportError:
+    # Windows
+    fcntl = None
+    import msvcrt
+
+
+# The environment variable holding the ID of the current run. It is set when this module is first imported,
+# so that the worker processes started by the run inherit it (and share the run's counter and index)
+RUN_ID_ENV_VAR = "SAVE_DATA_RUN_ID"
+# The environment variable holding the stage recorded with each saved file (e.g., set by `PipelineRunner.run_stage()`)
+STAGE_ENV_VAR = "SAVE_DATA_STAGE"
+
+os.environ.setdefault(RUN_ID_ENV_VAR, f"{time.strftime('%Y%m%d_%H%M%S')}_{os.getpid()}")
+
+
+def get_run_id() -> str:
+    return os.environ[RUN_ID_ENV_VAR]
+
+
+@contextmanager
+def _locked_file(file_path: str) -> Iterator[Any]:
+    """
+    Open a file (creating it if needed) and hold an exclusive lock on it, which excludes the other threads and processes.
+    """
+    file_descriptor = os.open(file_path, os.O_RDWR | os.O_CREAT, 0o644)
+    with os.fdopen(file_descriptor, "r+b") as file:
+        if fcntl is not None:
+            fcntl.flock(file.fileno(), fcntl.LOCK_EX)
+        else:
+            msvcrt.locking(file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield file
+        finally:
+            file.flush()
+            if fcntl is not None:
+                fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+            else:
+                file.seek(0)
+                msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _get_file_sha256(file_path: str) -> str:
+    sha256 = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+class RunManifest:
+    """
+    The counter and the index of the files saved by `save_data()` during a run, shared by all the threads and processes of the run.
+
+    - `<manifests_dir>/<run_id>.counter` has a byte per assigned counter. Each counter is assigned by appending a byte with a single `O_APPEND` write,
+        then reading the offset where that write ended, so each counter is assigned once (even across processes) without locking the file.
+    - `<manifests_dir>/<run_id>.jsonl` has a line per saved file (its counter, name, path, stage, size, duration, and SHA-256 hash).
+        Each line is appended with a single `O_APPEND` write, so concurrent writers don't need a lock.
+    - `get_entry()` finds the latest entry of a file name in O(1), after the new lines of the index are read
+        (i.e., each line is only parsed once per process).
+    """
+
+    def __init__(self, manifests_dir: str, run_id: Union[str, None] = None) -> None:
+        """
+        Args:
+            manifests_dir (str): The directory of the manifests (e.g., `<INTERMEDIATE_OUTPUTS_DIR>/.run_manifests`).
+            run_id (str, optional): The ID of the run. Defaults to `get_run_id()`.
+        """
+        self.run_id = run_id or get_run_id()
+        os.makedirs(manifests_dir, exist_ok=True)
+        self.counter_path = os.path.join(manifests_dir, f"{self.run_id}.counter")
+        self.index_path = os.path.join(manifests_dir, f"{self.run_id}.jsonl")
+        self._lock = threading.Lock()
+        # the descriptor of the counter file, and the process which opened it (check `next_counter()`)
+        self._counter_file_descriptor: Union[int, None] = None
+        self._counter_file_pid: Union[int, None] = None
+        self._entries: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._index_offset = 0
+
+    def next_counter(self) -> int:
+        """
+        Atomically assign the next counter of the run (starting from 1).
+        """
+        if fcntl is None:
+            # EXPLANATION NOTE: `O_APPEND` writes aren't atomic on Windows, so the counter file is locked there instead
+            with self._lock, _locked_file(self.counter_path) as file:
+                counter = file.seek(0, os.SEEK_END) + 1
+                file.write(b"\n")
+            return counter
+
+        # IMPLEMENTATION NOTE: the threading lock only serializes the threads of this process, since they share the descriptor (and its offset).
+        #   A forked process inherits the descriptor, but its offset would be shared with the parent's, so the counter file is reopened in it
+        with self._lock:
+            if self._counter_file_pid != os.getpid():
+                self._counter_file_descriptor = os.open(self.counter_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+                self._counter_file_pid = os.getpid()
+            os.write(self._counter_file_descriptor, b"\n")
+            return os.lseek(self._counter_file_descriptor, 0, os.SEEK_CUR)
+
+    def record(self, 
+            file_path: str, 
+            file_name: str, 
+            counter: Union[int, None], 
+            duration: float, 
+            stage: Union[str, None] = None,
+            size: Union[int, None] = None,
+            sha256: Union[str, None] = None) -> Dict[str, Any]:
+        """
+        Append an entry for a saved file to the index.
+
+        Args:
+            file_path (str): The path of the saved file.
+            file_name (str): The name of the file (without its counter prefix and extension).
+            counter (int, optional): The counter prefixed to the file name (if any).
+            duration (float): How long it took to serialize and write the file (in seconds).
+            stage (str, optional): The stage which saved the file. Defaults to the 'SAVE_DATA_STAGE' environment variable.
+            size (int, optional): The size of the file (in bytes). Defaults to the size of the file on disk.
+            sha256 (str, optional): The SHA-256 hash of the file's content, computed by the writer while writing it.
+                Defaults to hashing the file (i.e., reading it again).
+
+        Returns:
+            Dict[str, Any]: The entry.
+        """
+        entry = {
+            "counter": counter,
+            "file_name": file_name,
+            "file_path": file_path,
+            "stage": stage if stage is not None else os.getenv(STAGE_ENV_VAR),
+            "size": size if size is not None else os.path.getsize(file_path),
+            "duration": round(duration, 6),
+            "sha256": sha256 if sha256 is not None else _get_file_sha256(file_path),
+            "pid": os.getpid(),
+            "time": time.time(),
+        }
+        line = (json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8")
+        file_descriptor = os.open(self.index_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(file_descriptor, line)
+        finally:
+            os.close(file_descriptor)
+        return entry
+
+    def _read_new_entries(self) -> None:
+        # IMPLEMENTATION NOTE: should be called while holding `self._lock`
+        if not os.path.exists(self.index_path):
+            return
+        with open(self.index_path, "rb") as file:
+            file.seek(self._index_offset)
+            for line in file:
+                if not line.endswith(b"\n"):
+                    # a line which is still being written
+                    break
+                self._index_offset += len(line)
+                entry = json.loads(line)
+                self._entries[(os.path.dirname(entry["file_path"]), entry["file_name"])] = entry
+
+    def get_entry(self, dir_name: str, file_name: str) -> Union[Dict[str, Any], None]:
+        """
+        Get the latest entry of a file name (without its counter prefix and extension) saved in a directory during the run,
+        or None if there is no such entry.
+        """
+        with self._lock:
+            self._read_new_entries()
+            return self._entries.get((os.path.normpath(dir_name), file_name))
+
+    def get_entries(self) -> Dict[Tuple[str, str], Dict[str, Any]]:
+        """
+        Get the latest entry of each file saved during the run, keyed by its directory and file name.
+        """
+        with self._lock:
+            self._read_new_entries()
+            return dict(self._entries)
@@ -13,22 +13,19 @@ except Exception as e:
 # %% 
 # # Imports
 
-import os
-import re
-from typing import List, Tuple
-
 from dotenv import load_dotenv
-from bs4 import BeautifulSoup
 
 # from forqan_academy_scraper.scraper import login, \
 #     get_forqan_modules_urls_using_regex, \
 #     get_modules_info_using_regex, \
 #     get_lessons_name_and_urls_using_regex
 
-from forqan_academy_scraper import scraper as fsc
+from forqan_academy_scraper.pipeline import PipelineRunner
+# importing it registers the explainer's stages (i.e., `revision_pdfs_text`, `subtitles` and `search_index`) in the pipeline
+from forqan_academy_explainer import pipeline_stages
+from forqan_academy_explainer.search_index import SearchIndex
 
 from logaru_logger.the_logger import logger
-from odyash_general_functions.odyash_general_functions import save_data
 
 # %%
 # Global variables
@@ -39,39 +36,61 @@ load_dotenv()
 # %% 
 logger.info("Welcome to Forqan scraper & Explainer!")
 
-session, login_response_html_string = fsc.login()
+# each stage below is loaded from its checkpoint if it was already completed (check `PipelineRunner`),
+# so re-running this file after a crash resumes from the last completed stage (or lesson)
+# EXPLANATION NOTE: run `runner.run(fresh=True)` (or `python forqan_academy_scraper_and_explainer/forqan_academy_explainer/pipeline_stages.py --fresh`) to start over
+#   and set `incremental=True` (or add `--incremental`) so that a daily run only fetches the lessons which are new (or weren't available) since the previous crawl
+runner = PipelineRunner(incremental=False)
+
+login_response_html_string = runner.get("login")
 
 # %% 
 # getting the URLs of each Forqan module using regex
-forqan_modules_urls = fsc.get_forqan_modules_urls_using_regex(login_response_html_string)
+forqan_modules_urls = runner.get("modules_urls")
 
 # %%
 # getting the info (tuple) of each module page
-modules_name_and_html = fsc.get_modules_info_using_regex(forqan_modules_urls, session)
+modules_name_and_html = runner.get("modules_info")
 
 # %%
 # getting the lessons info from each module page
-lessons_names_and_urls_per_module = fsc.get_lessons_name_and_urls_using_regex(modules_name_and_html)
+lessons_names_and_urls_per_module = runner.get("lessons_urls")
 
 # %%
 
 # get other overview/video-urls/pdf-metadata from each lesson of each module
-forqan_lessons_info = fsc.get_video_urls_descriptions_and_pdf_metadata(modules_name_and_html, 
-                                                                    forqan_modules_urls, 
-                                                                    lessons_names_and_urls_per_module,
-                                                                    session)
+forqan_lessons_info = runner.get("lessons_info")
 
 # %%
 
 # save the pdfs
-fsc.download_revision_pdfs(forqan_lessons_info)
+runner.get("revision_pdfs")
+
+# %%
+# NOTE: to just fetch the `forqan_lessons_info` from the local checkpoint, use `runner.load_checkpoint("lessons_info")`
+#       (or `load_data("forqan_lessons_info", file_extension="json")` to load the latest intermediate output saved by `save_data()`)
 
 # %%
-# TODO: add code after the imports to just fetch the `forqan_lessons_info` from a local json file, and then PDF text extraction code to be written below
-#       also, check possible pdf text extraction libraries like PyMuPDF, pdfplumber, etc... relevant links:
-#       4-o
+# extract the text of the pdfs (saved to `revisions_pdfs_text/<module_name>/<pdf_name>.txt`)
+# EXPLANATION NOTE: requires PyMuPDF (or pypdf), e.g., `pip install -e .[explainer]` (the stage is skipped with a warning otherwise),
+#   check `forqan_academy_explainer.pdf_text_extraction.extract_pdfs_text()`
+#   relevant links for OCR-ing scanned pdfs (if needed later):
 #       https://github.com/zaakki-ahamed/Arabic_OCR_From_PDF/blob/main/Arabic_OCR.py
-#       https://pymupdf.readthedocs.io/en/latest/installation.html , https://pymupdf.readthedocs.io/en/latest/rag.html
-#       https://github.com/jsvine/pdfplumber?tab=readme-ov-file
+#       https://pymupdf.readthedocs.io/en/latest/rag.html
+runner.get("revision_pdfs_text")
+
+# %%
+# transcribe the lessons' videos (saved to `subtitles/<module_name>/<lesson_name>.srt`)
+# EXPLANATION NOTE: requires faster-whisper and yt-dlp, e.g., `pip install -e .[explainer]` (the stage is skipped with a warning otherwise),
+#   or set the 'TRANSCRIPTION_BACKEND' environment variable to 'stub' for a dry run,
+#   check `forqan_academy_explainer.transcription.transcribe_lessons()`
+runner.get("subtitles")
+
+# %%
+# index the lessons' descriptions, the pdfs' text and the subtitles for searching them
+# (or run `python forqan_academy_scraper_and_explainer/forqan_academy_explainer/search_index.py "<query>"`)
+runner.run_stage("search_index")
+with SearchIndex() as search_index:
+    logger.info(search_index.search("غزوة الخندق"))
 
 # %%
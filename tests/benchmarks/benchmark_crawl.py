@@ -0,0 +1,178 @@
+# benchmark_crawl.py
+# Runs the whole scraping pipeline against a local stand-in of forqanacademy.com (check `forqan_stand_in_server.py`),
+# and reports the time, pages per second, and peak RSS of each stage, along with the parse time per page of each parser backend
+# and extraction rule, so that performance regressions show up as numbers.
+#
+# Usage (from the project root):
+#   python tests/benchmarks/benchmark_crawl.py --modules 20 --lessons-per-module 10 --latency 0.005 --error-rate 0.02
+#   python tests/benchmarks/benchmark_crawl.py --json benchmark_results.json
+import os
+import sys
+import json
+import time
+import timeit
+import argparse
+import tempfile
+from typing import Any, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:
+    # Windows
+    resource = None
+
+# the helpers of the tests (i.e., the stand-in server and the synthetic pages)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# `logaru_logger.the_logger` reads these environment variables at import time, so they are set before the scraper is imported
+# EXPLANATION NOTE: the requests aren't rate limited by default (to measure the scraper itself, rather than the rate limit),
+#   and the retries back off for a short time (since the stand-in server's errors are random, not caused by overloading it)
+_benchmark_outputs_dir = tempfile.mkdtemp(prefix='forqan_benchmark_')
+os.environ.setdefault('DEBUG', '0')
+os.environ.setdefault('INTERMEDIATE_OUTPUTS_DIR', os.path.join(_benchmark_outputs_dir, 'intermediate_outputs'))
+os.environ.setdefault('FINAL_OUTPUTS_DIR', os.path.join(_benchmark_outputs_dir, 'final_outputs'))
+os.environ.setdefault('USE_HTTP_CACHE', '0')
+os.environ.setdefault('PAGE_ARCHIVE_DIR', os.path.join(_benchmark_outputs_dir, 'page_archive'))
+os.environ.setdefault('REQUESTS_PER_SECOND', '0')
+os.environ.setdefault('REQUEST_BACKOFF_BASE', '0.01')
+os.environ.setdefault('MY_USERNAME', 'benchmark')
+os.environ.setdefault('MY_PASSWORD', 'benchmark')
+
+from forqan_stand_in_server import ForqanStandInServer
+
+
+def get_peak_rss_mb() -> Optional[float]:
+    """
+    Get the peak resident set size of the process so far (in MB), or None if it can't be measured (i.e., on Windows).
+    """
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # EXPLANATION NOTE: `ru_maxrss` is in bytes on macOS, and in kilobytes on Linux
+    return max_rss / 1024 ** 2 if sys.platform == 'darwin' else max_rss / 1024
+
+
+def benchmark_stages(server: ForqanStandInServer, checkpoints_dir: str, max_in_flight: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Run each crawling stage of the pipeline (in order) against the stand-in server.
+
+    Returns:
+        List[Dict[str, Any]]: The metrics of each stage: its wall and CPU time, the number of pages served (and failed) during it,
+            the pages per second, and the peak RSS of the process after it (i.e., `ru_maxrss`, which only grows).
+    """
+    from forqan_academy_scraper.pipeline import STAGES, PipelineRunner
+
+    runner = PipelineRunner(checkpoints_dir, max_in_flight)
+    runner.clear_checkpoints()
+    stages_results = []
+    # EXPLANATION NOTE: the PDFs served by the stand-in server aren't real PDFs, so their text extraction stage isn't benchmarked
+    for stage_name in STAGES[:STAGES.index('revision_pdfs') + 1]:
+        requests_count, errors_count = server.requests_count, server.errors_count
+        start_wall_time, start_cpu_time = time.perf_counter(), time.process_time()
+        runner.run_stage(stage_name)
+        wall_time, cpu_time = time.perf_counter() - start_wall_time, time.process_time() - start_cpu_time
+        pages = server.requests_count - requests_count - (server.errors_count - errors_count)
+        stages_results.append({
+            'stage': stage_name,
+            'wall_seconds': wall_time,
+            'cpu_seconds': cpu_time,
+            'pages': pages,
+            'errors': server.errors_count - errors_count,
+            'pages_per_second': pages / wall_time if wall_time else 0.0,
+            'peak_rss_mb': get_peak_rss_mb(),
+        })
+    return stages_results
+
+
+def benchmark_parsing(pages: Dict[str, str], repeat: int = 5) -> Dict[str, Dict[str, float]]:
+    """
+    Measure the parse time per page of each lesson parser backend (parsing a lesson page then extracting all its fields),
+    and of each extraction rule (scanning the module and lesson pages).
+
+    Returns:
+        Dict[str, Dict[str, float]]: The best time (in microseconds) per page, keyed by the backend (or rule) name.
+    """
+    from forqan_academy_scraper import extraction_rules as er
+    from forqan_academy_scraper.lesson_parsers import LESSON_PARSER_BACKENDS, parse_lesson_page
+
+    lessons_pages = [html for url, html in pages.items() if '/topic/' in url]
+
+    def _parse_lessons_pages(backend: str) -> None:
+        for lesson_html_string in lessons_pages:
+            lesson_page = parse_lesson_page(lesson_html_string, backend)
+            lesson_page.get_video_url(), lesson_page.get_materials_text(), lesson_page.get_pdf_url()
+
+    backends_results = {}
+    for backend in LESSON_PARSER_BACKENDS:
+        best_time = min(timeit.Timer(lambda: _parse_lessons_pages(backend)).repeat(repeat=repeat, number=1))
+        backends_results[backend] = best_time / max(len(lessons_pages), 1) * 1e6
+
+    return {
+        'lesson_parser_backends_us_per_page': backends_results,
+        'extraction_rules_us_per_page': er.benchmark_extraction_rules(pages.values(), repeat=repeat),
+    }
+
+
+def run_benchmark(num_modules: int = 10,
+                lessons_per_module: int = 8,
+                latency: float = 0.005,
+                error_rate: float = 0.0,
+                max_in_flight: Optional[int] = None,
+                repeat: int = 5) -> Dict[str, Any]:
+    """
+    Start the stand-in server, run the pipeline's stages against it, then benchmark the parsers on its pages.
+    """
+    with ForqanStandInServer(num_modules, lessons_per_module, latency=latency, error_rate=error_rate) as server:
+        os.environ['FORQAN_BASE_URL'] = server.base_url
+        start_time = time.perf_counter()
+        stages_results = benchmark_stages(server, os.path.join(_benchmark_outputs_dir, 'pipeline_checkpoints'), max_in_flight)
+        crawl_seconds = time.perf_counter() - start_time
+        parsing_results = benchmark_parsing(server.catalogue['pages'], repeat)
+
+    return {
+        'config': {'num_modules': num_modules, 'lessons_per_module': lessons_per_module, 'latency': latency,
+                'error_rate': error_rate, 'max_in_flight': max_in_flight},
+        'crawl_seconds': crawl_seconds,
+        'pages_per_second': sum(stage['pages'] for stage in stages_results) / crawl_seconds,
+        'stages': stages_results,
+        **parsing_results,
+    }
+
+
+def format_results(results: Dict[str, Any]) -> str:
+    header = f"{'stage':<15} {'wall (s)':>9} {'cpu (s)':>8} {'pages':>6} {'errors':>6} {'pages/s':>9} {'peak RSS (MB)':>14}"
+    lines = [header, '-' * len(header)]
+    for stage in results['stages']:
+        peak_rss = f"{stage['peak_rss_mb']:.1f}" if stage['peak_rss_mb'] is not None else 'n/a'
+        lines.append(f"{stage['stage']:<15} {stage['wall_seconds']:>9.3f} {stage['cpu_seconds']:>8.3f} {stage['pages']:>6} "
+                    f"{stage['errors']:>6} {stage['pages_per_second']:>9.1f} {peak_rss:>14}")
+    lines.append(f"end-to-end crawl: {results['crawl_seconds']:.3f} s ({results['pages_per_second']:.1f} pages/s)")
+    lines.append('')
+    lines.append('parse time per page (us):')
+    for name, us_per_page in results['lesson_parser_backends_us_per_page'].items():
+        lines.append(f"  lesson parser backend {name:<27} {us_per_page:>10.1f}")
+    for name, us_per_page in results['extraction_rules_us_per_page'].items():
+        lines.append(f"  extraction rule {name:<33} {us_per_page:>10.1f}")
+    return '\n'.join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the scraping pipeline against a local stand-in of Forqan Academy")
+    parser.add_argument("--modules", type=int, default=10, help="the number of modules in the synthetic catalogue")
+    parser.add_argument("--lessons-per-module", type=int, default=8, help="the number of lessons per module")
+    parser.add_argument("--latency", type=float, default=0.005, help="the latency of each response (in seconds)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="the fraction of GET/HEAD requests which fail with a 503")
+    parser.add_argument("--max-in-flight", type=int, default=None, help="the maximum number of pages fetched at the same time")
+    parser.add_argument("--repeat", type=int, default=5, help="the number of repetitions of the parsing benchmarks (the best time is kept)")
+    parser.add_argument("--json", default=None, help="also write the results to this JSON file")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.modules, args.lessons_per_module, args.latency, args.error_rate, args.max_in_flight, args.repeat)
+    print(format_results(results))
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,13 @@
+# conftest.py
+import os
+import tempfile
+
+# `logaru_logger.the_logger` reads these environment variables at import time,
+# so they have to be set before any test module imports the scraper packages.
+# EXPLANATION NOTE: the `.env` file (if it exists) still overrides these, since `the_logger` calls `load_dotenv(override=True)`
+os.environ.setdefault('DEBUG', '1')
+_tests_outputs_dir = tempfile.mkdtemp(prefix='forqan_tests_')
+os.environ.setdefault('INTERMEDIATE_OUTPUTS_DIR', os.path.join(_tests_outputs_dir, 'intermediate_outputs'))
+os.environ.setdefault('FINAL_OUTPUTS_DIR', os.path.join(_tests_outputs_dir, 'final_outputs'))
+os.environ.setdefault('PAGE_ARCHIVE_DIR', os.path.join(_tests_outputs_dir, 'page_archive'))
+os.environ.setdefault('LOG_DIR', os.path.join(_tests_outputs_dir, 'logs'))
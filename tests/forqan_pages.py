@@ -0,0 +1,116 @@
+# forqan_pages.py
+# Helpers that build synthetic HTML pages shaped like the LearnDash markup of forqanacademy.com,
+# so that the scraper's extractors can be tested without hitting the live website.
+import threading
+import time
+from types import SimpleNamespace
+from typing import List, Tuple
+
+BASE_URL = 'https://forqanacademy.com'
+
+
+def lesson_url(module_num: int, lesson_num: int, base_url: str = BASE_URL) -> str:
+    return f'{base_url}/topic/module-{module_num}-lesson-{lesson_num}/'
+
+
+def module_page_html(module_name: str, lessons_names_and_urls: List[Tuple[str, str]]) -> str:
+    lessons_html = '\n'.join(
+        f'<a class="ld-table-list-item-preview ld-primary-color-hover ld-topic-row" href="{url}">\n'
+        f'    <span class="ld-topic-title">{name}</span>\n'
+        f'</a>'
+        for name, url in lessons_names_and_urls
+    )
+    return (f'<html><head><title>{module_name} (12) &#8211; أكاديمية فرقان</title></head>\n'
+            f'<body><div class="ld-table-list-items">\n{lessons_html}\n</div></body></html>')
+
+
+def login_response_html(modules_urls: List[str]) -> str:
+    modules_html = '\n'.join(f'<div class="ld-item-list-item"><a href="{url}" class="ld-item-name">module</a></div>'
+                             for url in modules_urls)
+    return f'<html><head><title>الدورات</title></head><body>\n{modules_html}\n</body></html>'
+
+
+def video_lesson_html(video_url: str, description_items: List[str]) -> str:
+    items_html = ''.join(f'<li>{item}</li>' for item in description_items)
+    return (
+        '<html><head><title>lesson</title><script>var x = "<div>";</script></head><body>\n'
+        '<div class="ld-tabs-content">\n'
+        '<div class="ld-tab-content ld-visible lesson-materials-btns" id="ld-tab-content-21005">\n'
+        '<h4 class="wp-block-heading">ندرس في هذه المحاضرة:</h4>\n'
+        f'<ul><li><strong>غزوة الخندق</strong><ol>{items_html}</ol></li></ul>\n'
+        '<h4 class="wp-block-heading">لمشاهدة المحاضرة:</h4>\n'
+        '<figure class="wp-block-embed is-type-video"><div class="wp-block-embed__wrapper">\n'
+        f'<iframe title="lesson" src="{video_url}" allowfullscreen></iframe>\n'
+        '</div></figure>\n'
+        '</div></div></body></html>'
+    )
+
+
+def revision_lesson_html(pdf_url: str) -> str:
+    return (
+        '<html><head><title>revision</title></head><body>\n'
+        '<div class="ld-tab-content ld-visible lesson-materials-btns">\n'
+        f'<a class="ui button fluid primary btn text-link" href="{pdf_url}">تحميل الملف</a>\n'
+        '</div></body></html>'
+    )
+
+
+def not_available_lesson_html() -> str:
+    return ('<html><head><title>locked</title></head><body>\n'
+            '<div class="ld-alert"><div class="ld-alert-messages">يرجى العودة وإكمال الدرس السابق</div></div>\n'
+            '</body></html>')
+
+
+def build_catalogue(num_modules: int = 3, lessons_per_module: int = 4, base_url: str = BASE_URL) -> dict:
+    """
+    Build a {url: html} mapping of a whole synthetic catalogue, along with the module URLs (in order).
+
+    Every module has one not-available lesson, one revision lesson (which links to a PDF), and normal video lessons.
+    """
+    pages = {}
+    modules_urls = []
+    for module_num in range(1, num_modules + 1):
+        module_url = f'{base_url}/courses/module-{module_num}/'
+        modules_urls.append(module_url)
+        lessons = []
+        for lesson_num in range(1, lessons_per_module + 1):
+            url = lesson_url(module_num, lesson_num, base_url)
+            if lesson_num == lessons_per_module:
+                name = f'مراجعة المحاضرات 1 &#8211; {lesson_num - 1}'
+                pages[url] = revision_lesson_html(f'{base_url}/wp-content/uploads/module-{module_num}.pdf')
+            elif lesson_num == lessons_per_module - 1:
+                name = f'المحاضرة {lesson_num}'
+                pages[url] = not_available_lesson_html()
+            else:
+                name = f'المحاضرة {lesson_num}'
+                pages[url] = video_lesson_html(f'https://www.youtube.com/embed/m{module_num}l{lesson_num}',
+                                               [f'النقطة {i} من المحاضرة {lesson_num}' for i in range(1, 4)])
+            lessons.append((name, url))
+        pages[module_url] = module_page_html(f'الوحدة {module_num}', lessons)
+    return {'pages': pages, 'modules_urls': modules_urls}
+
+
+class FakeSession:
+    """Serves the pages of a synthetic catalogue, while keeping track of the concurrent requests."""
+
+    def __init__(self, pages: dict, latency: float = 0.01, latency_per_url: dict = None) -> None:
+        self.pages = pages
+        self.latency = latency
+        self.latency_per_url = latency_per_url or {}
+        self.in_flight = 0
+        self.max_in_flight_seen = 0
+        self.requested_urls = []
+        self.finished_urls = []
+        self._lock = threading.Lock()
+
+    def get(self, url: str, **kwargs) -> SimpleNamespace:
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight_seen = max(self.max_in_flight_seen, self.in_flight)
+            self.requested_urls.append(url)
+        time.sleep(self.latency_per_url.get(url, self.latency))
+        with self._lock:
+            self.in_flight -= 1
+            self.finished_urls.append(url)
+        text = self.pages[url]
+        return SimpleNamespace(text=text, content=text.encode(), status_code=200, url=url)
@@ -0,0 +1,150 @@
+# forqan_stand_in_server.py
+# A local HTTP stand-in of forqanacademy.com which serves a synthetic catalogue (check `forqan_pages.build_catalogue()`),
+# so that the whole scraper (login included) can be tested and benchmarked without hitting the live website.
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+from forqan_pages import build_catalogue, login_response_html
+
+LOGIN_WPNONCE = 'stand1n0nce'
+LOGIN_COOKIE = 'wordpress_logged_in_stand_in=1'
+
+
+def login_page_html(wpnonce: str = LOGIN_WPNONCE) -> str:
+    return ('<html><head><title>تسجيل الدخول</title></head><body>\n'
+            '<form method="post" action="">\n'
+            f'<input type="hidden" id="_wpnonce" name="_wpnonce" value="{wpnonce}" />\n'
+            '<input type="text" name="username-17384" /><input type="password" name="user_password-17384" />\n'
+            '</form></body></html>')
+
+
+def pdf_content(url: str, size: int = 64 * 1024) -> bytes:
+    """Deterministic (but URL-specific) bytes which look like a PDF."""
+    header = f'%PDF-1.4\n% {url}\n'.encode()
+    return header + bytes(i % 251 for i in range(size - len(header)))
+
+
+class ForqanStandInServer:
+    """
+    Serves a synthetic catalogue on `127.0.0.1` (on a free port) in a background thread.
+
+    - `GET /login/` returns a login form with a `_wpnonce`, and `POST /login/` returns the page listing the modules (with a session cookie).
+        If `redirect_login` is True, `POST /login/` redirects to `GET /user/` (which returns that page) instead, like WordPress does.
+    - `GET`/`HEAD` of the module, lesson and PDF URLs return their content (PDFs support `Range` requests).
+    - Every response is delayed by `latency` seconds, and a `error_rate` fraction of the `GET`/`HEAD` requests fail with a 503
+        (the login `POST` never fails, since the scraper doesn't retry it).
+
+    Example:
+        with ForqanStandInServer(num_modules=5, latency=0.01) as server:
+            os.environ['FORQAN_BASE_URL'] = server.base_url
+            ...
+    """
+
+    def __init__(self,
+                num_modules: int = 3,
+                lessons_per_module: int = 4,
+                latency: float = 0.0,
+                error_rate: float = 0.0,
+                pdf_size: int = 64 * 1024,
+                seed: int = 0,
+                redirect_login: bool = False) -> None:
+        self.latency = latency
+        self.error_rate = error_rate
+        self.pdf_size = pdf_size
+        self.redirect_login = redirect_login
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.requests_count = 0
+        self.errors_count = 0
+
+        server = self
+        class _Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args) -> None:
+                pass
+
+            def do_GET(self) -> None:
+                server._handle(self, send_body=True)
+
+            def do_HEAD(self) -> None:
+                server._handle(self, send_body=False)
+
+            def do_POST(self) -> None:
+                self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                server._handle(self, send_body=True)
+
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self._httpd.daemon_threads = True
+        self.base_url = f'http://127.0.0.1:{self._httpd.server_address[1]}'
+        self.catalogue = build_catalogue(num_modules, lessons_per_module, base_url=self.base_url)
+        self._pages: Dict[str, str] = {urlsplit(url).path: html for url, html in self.catalogue['pages'].items()}
+        self._thread: Optional[threading.Thread] = None
+
+    def _should_fail(self, method: str) -> bool:
+        with self._lock:
+            self.requests_count += 1
+            failed = method != 'POST' and self.error_rate > 0 and self._random.random() < self.error_rate
+            self.errors_count += int(failed)
+        return failed
+
+    def _handle(self, handler: BaseHTTPRequestHandler, send_body: bool) -> None:
+        if self.latency:
+            time.sleep(self.latency)
+        path = urlsplit(handler.path).path
+        status, headers, body = 200, {'Content-Type': 'text/html; charset=UTF-8'}, b''
+
+        if self._should_fail(handler.command):
+            status, body = 503, b'Service Unavailable'
+        elif path == '/login/':
+            if handler.command == 'POST' and self.redirect_login:
+                status = 302
+                headers['Location'] = '/user/'
+                headers['Set-Cookie'] = f'{LOGIN_COOKIE}; Path=/'
+            elif handler.command == 'POST':
+                body = login_response_html(self.catalogue['modules_urls']).encode()
+                headers['Set-Cookie'] = f'{LOGIN_COOKIE}; Path=/'
+            else:
+                body = login_page_html().encode()
+        elif path == '/user/' and self.redirect_login:
+            body = login_response_html(self.catalogue['modules_urls']).encode()
+        elif path in self._pages:
+            body = self._pages[path].encode()
+        elif path.endswith('.pdf'):
+            body = pdf_content(path, self.pdf_size)
+            headers['Content-Type'] = 'application/pdf'
+            headers['Accept-Ranges'] = 'bytes'
+            range_header = handler.headers.get('Range')
+            if range_header:
+                start = int(range_header.split('=')[1].split('-')[0])
+                headers['Content-Range'] = f'bytes {start}-{len(body) - 1}/{len(body)}'
+                status, body = 206, body[start:]
+        else:
+            status, body = 404, b'Not Found'
+
+        handler.send_response(status)
+        for name, value in headers.items():
+            handler.send_header(name, value)
+        handler.send_header('Content-Length', str(len(body)))
+        handler.end_headers()
+        if send_body:
+            handler.wfile.write(body)
+
+    def start(self) -> 'ForqanStandInServer':
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> 'ForqanStandInServer':
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
@@ -0,0 +1,28 @@
+# test_benchmark_crawl.py
+import os
+import sys
+import json
+import subprocess
+
+BENCHMARK_SCRIPT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks', 'benchmark_crawl.py')
+
+
+def test_benchmark_crawl_smoke(tmp_path) -> None:
+    # the benchmark runs in its own process, since it sets up the environment variables before importing the scraper
+    results_path = tmp_path / 'results.json'
+    env = {name: value for name, value in os.environ.items() if name not in ('INTERMEDIATE_OUTPUTS_DIR', 'FINAL_OUTPUTS_DIR')}
+    subprocess.run([sys.executable, BENCHMARK_SCRIPT_PATH, '--modules', '2', '--lessons-per-module', '3', '--latency', '0',
+                    '--error-rate', '0.1', '--repeat', '1', '--json', str(results_path)],
+                   env=env, capture_output=True, text=True, check=True)
+    results = json.loads(results_path.read_text(encoding='utf-8'))
+
+    stages = {stage['stage']: stage for stage in results['stages']}
+    assert list(stages) == ['login', 'modules_urls', 'modules_info', 'lessons_urls', 'lessons_info', 'revision_pdfs']
+    # the login page and form, the module pages, the lesson pages, and a PDF per module (the failed requests were retried)
+    assert stages['login']['pages'] == 2
+    assert stages['modules_info']['pages'] == 2
+    assert stages['lessons_info']['pages'] == 6
+    assert stages['revision_pdfs']['pages'] == 2
+    assert results['pages_per_second'] > 0
+    assert set(results['lesson_parser_backends_us_per_page']) == {'html.parser', 'strainer', 'lxml'}
+    assert 'lesson_link' in results['extraction_rules_us_per_page']
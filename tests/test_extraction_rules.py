@@ -0,0 +1,39 @@
+# test_extraction_rules.py
+import re
+
+import pytest
+
+from forqan_academy_scraper import extraction_rules as er
+from forqan_pages import build_catalogue, login_response_html
+
+
+def test_combined_availability_rule_matches_the_separate_scans() -> None:
+    pages = list(build_catalogue(num_modules=2, lessons_per_module=4)['pages'].values())
+    pages += ['<html><body>الدرس متوفر في يوم الجمعة</body></html>', 'متوفر في (a page without a body tag)',
+              '<html><head><meta name="description" content="يرجى العودة وإكمال الدرس السابق"></head><body></body></html>']
+
+    for page in pages:
+        separate_scans = bool(re.search(r'يرجى العودة وإكمال', page) or re.search(r'متوفر في', page))
+        assert bool(er.LESSON_NOT_AVAILABLE_RULE.search(page)) == separate_scans
+
+
+def test_rules_restricted_to_a_region() -> None:
+    catalogue = build_catalogue(num_modules=2, lessons_per_module=3)
+    module_page = catalogue['pages'][catalogue['modules_urls'][0]]
+
+    assert er.MODULE_TITLE_RULE.get_region(module_page).endswith('</title>')
+    assert er.MODULE_TITLE_RULE.search(module_page).group(1) == 'الوحدة 1 (12) '
+    assert len(er.LESSON_LINK_RULE.findall(module_page)) == 3
+    assert er.MODULE_URL_RULE.findall(login_response_html(catalogue['modules_urls'])) == catalogue['modules_urls']
+    assert er.INVALID_FILE_NAME_CHARS_RULE.sub('', 'مراجعة: 1/2?') == 'مراجعة 12'
+
+
+def test_registry_and_benchmark() -> None:
+    assert er.get_extraction_rule('lesson_link') is er.LESSON_LINK_RULE
+    with pytest.raises(KeyError):
+        er.get_extraction_rule('unknown')
+
+    pages = list(build_catalogue(num_modules=1, lessons_per_module=3)['pages'].values())
+    timings = er.benchmark_extraction_rules(pages, repeat=2)
+    assert set(timings) == set(er.EXTRACTION_RULES)
+    assert all(timing >= 0 for timing in timings.values())
@@ -1,19 +1,35 @@
 # test_forqan_scraper.py
-from dotenv import load_dotenv
-import os
+import pytest
 import requests
 
-from forqan_academy_scraper.scraper import ForqanScraper
-from logaru_logger.the_logger import logger
+from forqan_academy_scraper import scraper as fsc
+from forqan_stand_in_server import LOGIN_COOKIE, ForqanStandInServer
 
 
-def test_login() -> None:
-    load_dotenv()
-    username = os.getenv('MY_USERNAME')
-    password = os.getenv('MY_PASSWORD')
-    logger.info(ForqanScraper)
-    session, response = ForqanScraper.login(username, password)
-    logger.info(f"{session}\n{response}")
+@pytest.fixture
+def stand_in_server(monkeypatch):
+    with ForqanStandInServer(num_modules=2, lessons_per_module=3) as server:
+        monkeypatch.setenv('FORQAN_BASE_URL', server.base_url)
+        yield server
+
+
+def test_login(stand_in_server) -> None:
+    session, login_response_html_string = fsc.login('username', 'password', use_http_cache=False)
+
     assert isinstance(session, requests.sessions.Session)
-    assert isinstance(response, requests.models.Response)
+    assert session.cookies.get(LOGIN_COOKIE.split('=')[0]) == '1'
+    assert fsc.get_forqan_modules_urls_using_regex(login_response_html_string) == stand_in_server.catalogue['modules_urls']
+
+
+def test_crawl_from_stand_in_server(stand_in_server) -> None:
+    session, login_response_html_string = fsc.login('username', 'password', use_http_cache=False)
+    forqan_modules_urls = fsc.get_forqan_modules_urls_using_regex(login_response_html_string)
+
+    forqan_lessons_info = fsc.crawl_forqan_lessons_info(forqan_modules_urls, session, max_in_flight=4)
 
+    assert len(forqan_lessons_info) == 2
+    for module_info in forqan_lessons_info.values():
+        lessons = module_info['lessons']
+        assert len(lessons) == 3
+        assert lessons[0]['video_url'].startswith('https://www.youtube.com/embed/')
+        assert lessons[-1]['pdf_url'].startswith(stand_in_server.base_url)
@@ -0,0 +1,101 @@
+# test_http_cache.py
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from forqan_academy_scraper.http_cache import CachingHTTPAdapter
+
+
+class _ETagHandler(BaseHTTPRequestHandler):
+    pages = {'/a': 'a' * 1000, '/b': 'b' * 1000, '/no-validators': 'c' * 10, '/vary': 'd' * 10}
+    requests_log = []
+
+    def do_GET(self) -> None:
+        body = self.pages[self.path].encode()
+        etag = '"' + hashlib.md5(body).hexdigest() + '"'
+        self.requests_log.append((self.path, self.headers.get('If-None-Match')))
+        if self.path != '/no-validators' and self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        if self.path != '/no-validators':
+            self.send_header('ETag', etag)
+        if self.path == '/vary':
+            self.send_header('Vary', 'Accept-Language')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+@pytest.fixture()
+def server_url():
+    _ETagHandler.requests_log = []
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _ETagHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_address[1]}'
+    server.shutdown()
+
+
+def _session(cache_dir, **kwargs) -> requests.Session:
+    session = requests.Session()
+    session.mount('http://', CachingHTTPAdapter(cache_dir=str(cache_dir), **kwargs))
+    return session
+
+
+def test_304_is_served_from_cache(server_url, tmp_path) -> None:
+    first = _session(tmp_path).get(f'{server_url}/a')
+    # a new session (i.e., a new run) reuses the on-disk entry
+    second = _session(tmp_path).get(f'{server_url}/a')
+
+    assert first.from_cache is False and second.from_cache is True
+    assert first.status_code == second.status_code == 200
+    assert second.text == first.text == 'a' * 1000
+    assert _ETagHandler.requests_log[0][1] is None
+    assert _ETagHandler.requests_log[1][1] is not None
+
+
+def test_responses_without_validators_are_not_cached(server_url, tmp_path) -> None:
+    session = _session(tmp_path)
+    session.get(f'{server_url}/no-validators')
+    response = session.get(f'{server_url}/no-validators')
+
+    assert response.from_cache is False
+    assert not list(tmp_path.iterdir())
+
+
+def test_ttl_and_size_eviction(server_url, tmp_path) -> None:
+    expired_session = _session(tmp_path, ttl_seconds=0)
+    expired_session.get(f'{server_url}/a')
+    assert expired_session.get(f'{server_url}/a').from_cache is False
+
+    small_session = _session(tmp_path / 'small', max_size_bytes=1500)
+    small_session.get(f'{server_url}/a')
+    small_session.get(f'{server_url}/b')
+    # only one of the 1000-byte bodies fits, so the least recently used one (i.e., '/a') was evicted
+    assert len(list((tmp_path / 'small').glob('*.body'))) == 1
+    assert small_session.get(f'{server_url}/b').from_cache is True
+    assert small_session.get(f'{server_url}/a').from_cache is False
+
+
+def test_entries_are_separated_per_user_and_vary_headers(server_url, tmp_path) -> None:
+    _session(tmp_path, namespace='user_1').get(f'{server_url}/a')
+    # another user, or the same user while sending cookies (i.e., logged in), doesn't revalidate against that body
+    assert _session(tmp_path, namespace='user_2').get(f'{server_url}/a').from_cache is False
+    assert _session(tmp_path, namespace='user_1').get(f'{server_url}/a', cookies={'logged_in': '1'}).from_cache is False
+    assert _session(tmp_path, namespace='user_1').get(f'{server_url}/a').from_cache is True
+    assert [if_none_match is None for _, if_none_match in _ETagHandler.requests_log] == [True, True, True, False]
+
+    session = _session(tmp_path)
+    session.get(f'{server_url}/vary', headers={'Accept-Language': 'ar'})
+    assert session.get(f'{server_url}/vary', headers={'Accept-Language': 'en'}).from_cache is False
+    assert session.get(f'{server_url}/vary', headers={'Accept-Language': 'en'}).from_cache is True
@@ -0,0 +1,52 @@
+# test_import_time.py
+import os
+import sys
+import json
+import subprocess
+
+import pytest
+
+# the slow modules which must only be imported when they are actually used
+# (and the explainer, which the scraper mustn't depend on)
+DEFERRED_MODULES = ('pandas', 'bs4', 'varname', 'lxml', 'orjson', 'forqan_academy_explainer', 'sqlite3')
+
+# the import time budget of our own modules in a single-stage rerun, i.e., `python pipeline.py --stage ...`, as a fraction of
+# the import time of the third-party libraries they import eagerly (measured in the same process, so the budget doesn't depend on the machine)
+# EXPLANATION NOTE: `requests` (since `ScheduledSession` and the HTTP adapters subclass its classes) and `loguru` (since `logger` is used
+#   by every module) take ~200 ms together, and can't be deferred, while our own modules add ~25 ms (`the_logger`, most of it is loguru adding
+#   its sinks) to ~55 ms (`pipeline`) on top of them
+IMPORT_TIME_BUDGET = float(os.getenv('IMPORT_TIME_BUDGET', '0.5'))
+
+
+def _get_import_times(module_name, eager_modules_names, repeats: int = 3) -> dict:
+    """
+    Import the eager modules then the module in a fresh interpreter (`repeats` times),
+    and get their fastest import times and the deferred modules which were imported.
+    """
+    script = (
+        "import sys, json, time\n"
+        "start_time = time.perf_counter()\n"
+        f"import {', '.join(eager_modules_names)}\n"
+        "eager_modules_import_time = time.perf_counter() - start_time\n"
+        "start_time = time.perf_counter()\n"
+        f"import {module_name}\n"
+        "import_time = time.perf_counter() - start_time\n"
+        "print(json.dumps({'import_time': import_time, 'eager_modules_import_time': eager_modules_import_time, "
+        f"'modules': [m for m in {DEFERRED_MODULES!r} if m in sys.modules]}}))\n"
+    )
+    results = []
+    for _ in range(repeats):
+        process = subprocess.run([sys.executable, '-c', script], env=dict(os.environ), capture_output=True, text=True, check=True)
+        results.append(json.loads(process.stdout.strip().splitlines()[-1]))
+    return {'import_time': min(result['import_time'] for result in results),
+            'eager_modules_import_time': min(result['eager_modules_import_time'] for result in results),
+            'modules': results[-1]['modules']}
+
+
+@pytest.mark.parametrize('module_name, eager_modules_names', [('logaru_logger.the_logger', ['loguru']),
+                                                              ('forqan_academy_scraper.pipeline', ['requests', 'loguru'])])
+def test_import_time(module_name, eager_modules_names):
+    result = _get_import_times(module_name, eager_modules_names)
+
+    assert result['modules'] == []
+    assert result['import_time'] < IMPORT_TIME_BUDGET * result['eager_modules_import_time']
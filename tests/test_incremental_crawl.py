@@ -0,0 +1,94 @@
+# test_incremental_crawl.py
+from forqan_academy_scraper import scraper as fsc
+from forqan_academy_scraper.http_cache import CachingHTTPAdapter
+from forqan_academy_scraper.incremental_crawl import update_forqan_lessons_info
+from forqan_pages import FakeSession, build_catalogue, lesson_url, module_page_html, video_lesson_html
+
+
+def _get_modules_and_lessons(catalogue: dict) -> tuple:
+    session = FakeSession(catalogue['pages'], latency=0)
+    modules_name_and_html = fsc.get_modules_info_using_regex(catalogue['modules_urls'], session)
+    return modules_name_and_html, fsc.get_lessons_name_and_urls_using_regex(modules_name_and_html)
+
+
+def _update(catalogue: dict, file_path: str, **kwargs) -> tuple:
+    modules_name_and_html, lessons_names_and_urls_per_module = _get_modules_and_lessons(catalogue)
+    session = FakeSession(catalogue['pages'], latency=0)
+    forqan_lessons_info = update_forqan_lessons_info(modules_name_and_html, catalogue['modules_urls'],
+                                                     lessons_names_and_urls_per_module, session,
+                                                     file_path=file_path, **kwargs)
+    return forqan_lessons_info, session
+
+
+def _without_page_hashes(forqan_lessons_info: dict) -> dict:
+    return {module_key: {**module_info, 'lessons': [{k: v for k, v in lesson.items() if k != 'page_hash'}
+                                                    for lesson in module_info['lessons']]}
+            for module_key, module_info in forqan_lessons_info.items()}
+
+
+def test_incremental_crawl_only_fetches_new_and_previously_unavailable_lessons(tmp_path) -> None:
+    file_path = str(tmp_path / 'forqan_lessons_info.json')
+    catalogue = build_catalogue(num_modules=2, lessons_per_module=4)
+
+    # the first run has no previous crawl, so it fetches everything
+    _, first_session = _update(catalogue, file_path)
+    assert len(first_session.requested_urls) == 8
+
+    # the not-available lesson of the first module becomes available, and a new lesson is added to the second module
+    unlocked_url = lesson_url(1, 3)
+    catalogue['pages'][unlocked_url] = video_lesson_html('https://www.youtube.com/embed/unlocked', ['نقطة'])
+    new_url = lesson_url(2, 5)
+    catalogue['pages'][new_url] = video_lesson_html('https://www.youtube.com/embed/new', ['نقطة جديدة'])
+    second_module_lessons = fsc.get_lessons_name_and_urls_using_regex(
+        [('الوحدة 2', catalogue['pages'][catalogue['modules_urls'][1]])])[0]
+    catalogue['pages'][catalogue['modules_urls'][1]] = module_page_html('الوحدة 2', second_module_lessons + [('المحاضرة 5', new_url)])
+
+    merged_info, second_session = _update(catalogue, file_path)
+
+    # the (still) not-available lesson of the second module is fetched again, since it may have become available
+    assert sorted(second_session.requested_urls) == sorted([unlocked_url, new_url, lesson_url(2, 3)])
+
+    # the merged result is the same as a full crawl of the updated catalogue
+    modules_name_and_html, lessons_names_and_urls_per_module = _get_modules_and_lessons(catalogue)
+    full_info = fsc.get_video_urls_descriptions_and_pdf_metadata(modules_name_and_html, catalogue['modules_urls'],
+                                                                 lessons_names_and_urls_per_module,
+                                                                 FakeSession(catalogue['pages'], latency=0))
+    assert _without_page_hashes(merged_info) == full_info
+
+    # rechecking known lessons fetches every page, but unchanged pages keep their previous records
+    rechecked_info, third_session = _update(catalogue, file_path, recheck_known_lessons=True)
+    assert len(third_session.requested_urls) == 9
+    assert rechecked_info == merged_info
+
+
+def test_incremental_crawl_starts_from_the_full_crawl_output(monkeypatch, tmp_path) -> None:
+    monkeypatch.delenv('INCREMENTAL_RECHECK_KNOWN_LESSONS', raising=False)
+    catalogue = build_catalogue(num_modules=2, lessons_per_module=4)
+    modules_name_and_html, lessons_names_and_urls_per_module = _get_modules_and_lessons(catalogue)
+    full_info = fsc.get_video_urls_descriptions_and_pdf_metadata(modules_name_and_html, catalogue['modules_urls'],
+                                                                 lessons_names_and_urls_per_module,
+                                                                 FakeSession(catalogue['pages'], latency=0))
+
+    # only the not-available lessons are fetched again (the default file is the one saved by the full crawl)
+    merged_info, session = _update(catalogue, file_path=None)
+    assert sorted(session.requested_urls) == sorted([lesson_url(1, 3), lesson_url(2, 3)])
+    assert _without_page_hashes(merged_info) == full_info
+
+
+def test_incremental_crawl_only_rechecks_known_lessons_when_asked(monkeypatch, tmp_path) -> None:
+    monkeypatch.delenv('INCREMENTAL_RECHECK_KNOWN_LESSONS', raising=False)
+    file_path = str(tmp_path / 'forqan_lessons_info.json')
+    catalogue = build_catalogue(num_modules=1, lessons_per_module=4)
+    _update(catalogue, file_path)
+
+    # even when the session uses the HTTP cache, only the not-available lesson is fetched by default
+    modules_name_and_html, lessons_names_and_urls_per_module = _get_modules_and_lessons(catalogue)
+    session = FakeSession(catalogue['pages'], latency=0)
+    session.adapters = {'https://': CachingHTTPAdapter(cache_dir=str(tmp_path / 'http_cache'))}
+    update_forqan_lessons_info(modules_name_and_html, catalogue['modules_urls'], lessons_names_and_urls_per_module,
+                               session, file_path=file_path)
+    assert session.requested_urls == [lesson_url(1, 3)]
+
+    monkeypatch.setenv('INCREMENTAL_RECHECK_KNOWN_LESSONS', '1')
+    _, session = _update(catalogue, file_path)
+    assert len(session.requested_urls) == 4
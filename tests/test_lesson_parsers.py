@@ -0,0 +1,67 @@
+# test_lesson_parsers.py
+import pytest
+
+from forqan_academy_scraper import scraper as fsc
+from forqan_academy_scraper.lesson_parsers import LESSON_PARSER_BACKENDS, LessonPage, parse_lesson_page
+from forqan_pages import build_catalogue
+
+TRICKY_VIDEO_LESSON_HTML = '''<html><head><title>lesson</title></head><body>
+<header><div class="ld-tab-content">not the materials <iframe src="https://example.com/header-widget"></iframe></div></header>
+<div class="ld-tabs-content">
+<div class="ld-tab-content  ld-visible lesson-materials-btns " id="ld-tab-content-1">
+  <!-- a comment which isn't part of the description -->
+  <h4 class="wp-block-heading">ندرس في&nbsp;هذه المحاضرة &amp; غيرها:</h4>
+  <script>var notText = "<p>";</script><style>p { color: red; }</style>
+  <p>السطر الأول<br>السطر&#160;الثاني <strong>مهم</strong> جدا</p>
+  <ul><li>نقطة <em>أولى</em></li><li>   </li><li>نقطة ثانية</li></ul>
+  <h4>لمشاهدة المحاضرة:</h4>
+  <figure><iframe title="x" src="https://www.youtube.com/embed/abc?feature=oembed"></iframe></figure>
+</div></div>
+<a class="ui button fluid primary btn text-link" href="https://forqanacademy.com/file.pdf">PDF</a>
+</body></html>'''
+
+
+def _pages():
+    catalogue = build_catalogue(num_modules=1, lessons_per_module=4)
+    lessons_pages = [(url, html) for url, html in catalogue['pages'].items() if '/topic/' in url]
+    return lessons_pages + [('tricky', TRICKY_VIDEO_LESSON_HTML)]
+
+
+@pytest.mark.parametrize('backend', LESSON_PARSER_BACKENDS)
+def test_parser_backends_have_identical_outputs(backend) -> None:
+    if backend == 'lxml':
+        pytest.importorskip('lxml')
+
+    for _, lesson_html in _pages():
+        reference_page = parse_lesson_page(lesson_html, 'html.parser')
+        page = parse_lesson_page(lesson_html, backend)
+        assert page.get_video_url() == reference_page.get_video_url()
+        assert page.get_materials_text() == reference_page.get_materials_text()
+        assert page.get_pdf_url() == reference_page.get_pdf_url()
+
+        for lesson_name in ('المحاضرة 1', 'مراجعة المحاضرات 1 &#8211; 3'):
+            assert fsc.extract_lesson_info(lesson_name, 'url', lesson_html, backend) == \
+                   fsc.extract_lesson_info(lesson_name, 'url', lesson_html, 'html.parser')
+
+
+def test_tricky_page_extraction() -> None:
+    lesson_info = fsc.extract_lesson_info('المحاضرة 1', 'url', TRICKY_VIDEO_LESSON_HTML, 'strainer')
+
+    # the first iframe of the page is used, like `soup.find('iframe')`
+    assert lesson_info['video_url'] == 'https://example.com/header-widget'
+    assert lesson_info['video_description'] == ('ندرس في\xa0هذه المحاضرة & غيرها:\n\nالسطر الأول\n\nالسطر\xa0الثاني'
+                                                '\n\nمهم\n\nجدا\n\nنقطة\n\nأولى\n\nنقطة ثانية')
+
+
+def test_invalid_backend() -> None:
+    with pytest.raises(ValueError):
+        parse_lesson_page('<html></html>', 'regex')
+
+
+def test_incomplete_backend_fails_when_created() -> None:
+    class _IncompleteLessonPage(LessonPage):
+        def get_video_url(self):
+            return None
+
+    with pytest.raises(TypeError):
+        _IncompleteLessonPage()
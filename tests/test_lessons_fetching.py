@@ -0,0 +1,108 @@
+# test_lessons_fetching.py
+import json
+
+from forqan_academy_scraper import scraper as fsc
+from odyash_general_functions.odyash_general_functions import stream_records_to_jsonl
+from forqan_pages import FakeSession, build_catalogue
+
+
+def _crawl(catalogue: dict, max_in_flight: int) -> tuple:
+    session = FakeSession(catalogue['pages'])
+    modules_urls = catalogue['modules_urls']
+    modules_name_and_html = fsc.get_modules_info_using_regex(modules_urls, session, max_in_flight=max_in_flight)
+    lessons_names_and_urls_per_module = fsc.get_lessons_name_and_urls_using_regex(modules_name_and_html)
+    forqan_lessons_info = fsc.get_video_urls_descriptions_and_pdf_metadata(modules_name_and_html,
+                                                                          modules_urls,
+                                                                          lessons_names_and_urls_per_module,
+                                                                          session,
+                                                                          max_in_flight=max_in_flight)
+    return forqan_lessons_info, session
+
+
+def test_concurrent_lessons_fetching_matches_sequential_output() -> None:
+    catalogue = build_catalogue(num_modules=3, lessons_per_module=5)
+
+    sequential_info, sequential_session = _crawl(catalogue, max_in_flight=1)
+    concurrent_info, concurrent_session = _crawl(catalogue, max_in_flight=6)
+
+    assert sequential_session.max_in_flight_seen == 1
+    assert 1 < concurrent_session.max_in_flight_seen <= 6
+    # same modules/lessons, in the same order (json-wise, i.e., including the order of the keys)
+    assert list(concurrent_info) == list(sequential_info) == ['module_01', 'module_02', 'module_03']
+    assert concurrent_info == sequential_info
+    for module_key in sequential_info:
+        assert [lesson['url'] for lesson in concurrent_info[module_key]['lessons']] == \
+               [lesson['url'] for lesson in sequential_info[module_key]['lessons']]
+
+
+def test_lesson_info_extraction() -> None:
+    catalogue = build_catalogue(num_modules=1, lessons_per_module=4)
+    forqan_lessons_info, _ = _crawl(catalogue, max_in_flight=2)
+
+    module = forqan_lessons_info['module_01']
+    assert module['name'] == 'الوحدة 1'
+    video_lesson, _, not_available_lesson, revision_lesson = module['lessons']
+
+    assert video_lesson['video_url'] == 'https://www.youtube.com/embed/m1l1'
+    assert video_lesson['video_description'].startswith('ندرس في هذه المحاضرة:')
+    assert 'لمشاهدة' not in video_lesson['video_description']
+    assert not_available_lesson['not_available'] is True
+    assert revision_lesson['name'] == revision_lesson['pdf_name'] == 'مراجعة المحاضرات 1 - 3'
+    assert revision_lesson['pdf_url'].endswith('/module-1.pdf')
+
+
+def test_modules_info_is_kept_in_input_order() -> None:
+    catalogue = build_catalogue(num_modules=4, lessons_per_module=2)
+    modules_urls = catalogue['modules_urls']
+    # the first module is the slowest one, so the other ones arrive before it
+    session = FakeSession(catalogue['pages'], latency_per_url={modules_urls[0]: 0.1})
+
+    modules_info = list(fsc.iter_modules_info_using_regex(modules_urls, session, max_in_flight=4))
+
+    assert [module_name for module_name, _ in modules_info] == [f'الوحدة {i}' for i in range(1, 5)]
+    assert [module_html for _, module_html in modules_info] == [catalogue['pages'][url] for url in modules_urls]
+
+
+def test_pipelined_crawl_matches_stage_by_stage_crawl() -> None:
+    catalogue = build_catalogue(num_modules=3, lessons_per_module=5)
+    stage_by_stage_info, _ = _crawl(catalogue, max_in_flight=1)
+
+    # the last module is the slowest one
+    session = FakeSession(catalogue['pages'], latency_per_url={catalogue['modules_urls'][-1]: 0.2})
+    pipelined_info = fsc.crawl_forqan_lessons_info(catalogue['modules_urls'], session, max_in_flight=4)
+
+    assert pipelined_info == stage_by_stage_info
+    assert list(pipelined_info) == list(stage_by_stage_info)
+    # the lessons of the first module were downloaded while the (slow) last module page was still in flight
+    first_module_lessons = [lesson['url'] for lesson in pipelined_info['module_01']['lessons']]
+    last_module_finished_at = session.finished_urls.index(catalogue['modules_urls'][-1])
+    assert all(session.finished_urls.index(url) < last_module_finished_at for url in first_module_lessons)
+
+
+def test_lessons_records_stream_and_rebuild(tmp_path) -> None:
+    catalogue = build_catalogue(num_modules=2, lessons_per_module=3)
+    session = FakeSession(catalogue['pages'], latency=0)
+    modules_name_and_html = fsc.get_modules_info_using_regex(catalogue['modules_urls'], session)
+    lessons_names_and_urls_per_module = fsc.get_lessons_name_and_urls_using_regex(modules_name_and_html)
+    # a module without lessons is kept as well
+    modules_name_and_html.append(('وحدة فارغة', ''))
+    modules_urls = catalogue['modules_urls'] + ['https://forqanacademy.com/courses/empty/']
+    lessons_names_and_urls_per_module.append([])
+
+    records = fsc.iter_lessons_info(modules_name_and_html, modules_urls, lessons_names_and_urls_per_module,
+                                    session, max_in_flight=3)
+    first_record = next(records)
+    assert first_record['module_key'] == 'module_01' and first_record['module_name'] == 'الوحدة 1'
+    assert first_record['lesson']['url'] == lessons_names_and_urls_per_module[0][0][1]
+
+    streamed_records = list(stream_records_to_jsonl(records, 'records', dir_name=str(tmp_path),
+                                                    add_intermediate_counter_prefix=False))
+    with open(tmp_path / 'records.jsonl', encoding='utf-8') as file:
+        saved_records = [json.loads(line) for line in file]
+    assert saved_records == streamed_records
+    assert len(saved_records) == 6 and saved_records[-1]['lesson'] is None
+
+    rebuilt_info = fsc.build_forqan_lessons_info_from_records([first_record] + saved_records)
+    assert rebuilt_info == fsc.get_video_urls_descriptions_and_pdf_metadata(modules_name_and_html, modules_urls,
+                                                                            lessons_names_and_urls_per_module, session)
+    assert rebuilt_info['module_03'] == {'name': 'وحدة فارغة', 'url': modules_urls[-1], 'lessons': []}
@@ -0,0 +1,99 @@
+# test_page_archive.py
+import pytest
+
+from forqan_academy_scraper import scraper as fsc
+from forqan_academy_scraper.page_archive import PageArchive, get_page_archive, replay_forqan_lessons_info
+from forqan_pages import build_catalogue
+from forqan_stand_in_server import ForqanStandInServer
+
+# the markup shared by all the pages of the website (i.e., what the shared dictionary should capture)
+_BOILERPLATE = ''.join(f'<link rel="stylesheet" id="learndash-style-{i}-css" href="https://forqanacademy.com/wp-content/plugins/'
+                       f'sfwd-lms/themes/ld30/assets/css/learndash-{i}.min.css?ver=4.{i}" media="all" />\n' for i in range(120))
+
+
+def _with_boilerplate(page: str) -> bytes:
+    return page.replace('<head>', f'<head>\n{_BOILERPLATE}').encode()
+
+
+@pytest.mark.parametrize('redirect_login', [False, True])
+def test_crawl_is_archived_then_replayed_offline(monkeypatch, tmp_path, redirect_login) -> None:
+    monkeypatch.setenv('PAGE_ARCHIVE_DIR', str(tmp_path / 'page_archive'))
+    get_page_archive.cache_clear()
+    with ForqanStandInServer(num_modules=2, lessons_per_module=4, redirect_login=redirect_login) as server:
+        monkeypatch.setenv('FORQAN_BASE_URL', server.base_url)
+        session, login_response_html_string = fsc.login('username', 'password', use_http_cache=False, use_page_archive=True)
+        forqan_modules_urls = fsc.get_forqan_modules_urls_using_regex(login_response_html_string)
+        forqan_lessons_info = fsc.crawl_forqan_lessons_info(forqan_modules_urls, session, max_in_flight=4)
+
+    # the login form and response (and the redirect to it, like the real WordPress login), and the module and lesson pages
+    archive = get_page_archive()
+    assert archive.get_stats()['captures'] == 2 + int(redirect_login) + 2 + 2 * 4
+    assert [crawl['captures'] for crawl in archive.get_crawls()] == [12 + int(redirect_login)]
+    if redirect_login:
+        assert archive.get_capture(f'{server.base_url}/login/', 'POST')['location'] == '/user/'
+
+    # the server is stopped, so the pages can only come from the archive
+    assert replay_forqan_lessons_info(archive) == forqan_lessons_info
+    get_page_archive.cache_clear()
+    archive.close()
+
+
+def test_bodies_are_deduplicated_and_compressed_with_a_shared_dictionary(tmp_path) -> None:
+    pages = {url: _with_boilerplate(html) for url, html in build_catalogue(num_modules=4, lessons_per_module=8)['pages'].items()}
+
+    with PageArchive(str(tmp_path / 'with_dictionary'), codec='zlib', dictionary_samples=8, crawl_id='crawl_1') as archive:
+        for url, body in pages.items():
+            archive.add(url, body, content_type='text/html; charset=UTF-8')
+        stats = archive.get_stats()
+        # the module pages, and all the locked lessons, are identical
+        assert stats['captures'] == len(pages) and stats['bodies'] < len(pages)
+
+        # a second crawl of the unchanged pages only adds captures
+        archive.crawl_id = 'crawl_2'
+        for url, body in pages.items():
+            archive.add(url, body, content_type='text/html; charset=UTF-8')
+        assert archive.get_stats()['bodies'] == stats['bodies']
+        assert [(crawl['crawl_id'], crawl['captures']) for crawl in archive.get_crawls()] == [('crawl_1', len(pages)), ('crawl_2', len(pages))]
+
+        # the bodies stored before and after the dictionary was built are both readable
+        for capture, body in archive.iter_captures(crawl_id='crawl_1'):
+            assert body == pages[capture['url']]
+        assert archive.get_capture('https://forqanacademy.com/missing/') is None
+        with pytest.raises(KeyError):
+            archive.get_body('0' * 64)
+        stored_size_with_dictionary = stats['stored_size']
+
+    with PageArchive(str(tmp_path / 'without_dictionary'), codec='zlib', dictionary_samples=0, crawl_id='crawl_1') as archive:
+        for url, body in pages.items():
+            archive.add(url, body)
+        assert archive.get_stats()['stored_size'] > 1.25 * stored_size_with_dictionary
+
+    # the dictionary is persisted with the archive
+    with PageArchive(str(tmp_path / 'with_dictionary'), codec='zlib', dictionary_samples=8) as archive:
+        for capture, body in archive.iter_captures():
+            assert body == pages[capture['url']]
+
+
+def test_response_hook_skips_streams_and_failures(tmp_path) -> None:
+    with ForqanStandInServer(num_modules=1, lessons_per_module=3) as server, \
+            PageArchive(str(tmp_path / 'page_archive'), codec='zlib') as archive:
+        session = fsc.ScheduledSession()
+        session.hooks['response'].append(archive.response_hook)
+        module_url = server.catalogue['modules_urls'][0]
+        session.get(module_url)
+        session.get(f'{server.base_url}/missing/')
+        with session.get(f'{server.base_url}/wp-content/uploads/module-1.pdf', stream=True) as response:
+            assert len(response.content) == server.pdf_size
+
+        assert [capture['url'] for capture, _ in archive.iter_captures()] == [module_url]
+
+
+def test_pages_are_not_archived_by_default(monkeypatch, tmp_path) -> None:
+    monkeypatch.setenv('PAGE_ARCHIVE_DIR', str(tmp_path / 'page_archive'))
+    monkeypatch.delenv('USE_PAGE_ARCHIVE', raising=False)
+    with ForqanStandInServer(num_modules=1, lessons_per_module=2) as server:
+        monkeypatch.setenv('FORQAN_BASE_URL', server.base_url)
+        session, _ = fsc.login('username', 'password', use_http_cache=False)
+
+    assert session.hooks['response'] == []
+    assert not (tmp_path / 'page_archive').exists()
@@ -0,0 +1,168 @@
+# test_pdf_downloads.py
+import os
+import shutil
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from forqan_academy_scraper import scraper as fsc
+from forqan_academy_scraper.pdf_downloads import download_file, get_revision_pdfs_to_download
+from forqan_academy_scraper.pdf_blob_store import PdfBlobStore, download_pdfs_to_blob_store
+
+PDF_CONTENT = b'%PDF-1.4\n' + bytes(range(256)) * 400
+
+
+class _PdfHandler(BaseHTTPRequestHandler):
+    requests_log = []
+
+    def _send_headers(self, status: int, length: int, content_range: str = None) -> None:
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/pdf')
+        self.send_header('Content-Length', str(length))
+        if content_range:
+            self.send_header('Content-Range', content_range)
+        self.end_headers()
+
+    def do_HEAD(self) -> None:
+        self.requests_log.append(('HEAD', self.path, None))
+        self._send_headers(200, len(PDF_CONTENT))
+
+    def do_GET(self) -> None:
+        range_header = self.headers.get('Range')
+        self.requests_log.append(('GET', self.path, range_header))
+        if range_header:
+            start = int(range_header.split('=')[1].rstrip('-'))
+            if 'misaligned' in self.path:
+                # a server which doesn't start the range where it was asked to
+                start = max(start - 100, 0)
+            body = PDF_CONTENT[start:]
+            self._send_headers(206, len(body), f'bytes {start}-{len(PDF_CONTENT) - 1}/{len(PDF_CONTENT)}')
+        else:
+            body = PDF_CONTENT
+            self._send_headers(200, len(body))
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+@pytest.fixture()
+def server_url():
+    _PdfHandler.requests_log = []
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _PdfHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{server.server_address[1]}'
+    server.shutdown()
+
+
+def test_download_skip_and_resume(server_url, tmp_path) -> None:
+    session = requests.Session()
+    file_path = str(tmp_path / 'revision.pdf')
+
+    assert download_file(session, f'{server_url}/revision.pdf', file_path) == 'downloaded'
+    assert open(file_path, 'rb').read() == PDF_CONTENT
+    assert not os.path.exists(f'{file_path}.part')
+
+    # the file is complete, so only a HEAD request is sent
+    _PdfHandler.requests_log.clear()
+    assert download_file(session, f'{server_url}/revision.pdf', file_path) == 'skipped'
+    assert [method for method, _, _ in _PdfHandler.requests_log] == ['HEAD']
+
+    # an interrupted download is resumed from the size of the partial file
+    os.remove(file_path)
+    with open(f'{file_path}.part', 'wb') as file:
+        file.write(PDF_CONTENT[:1000])
+    _PdfHandler.requests_log.clear()
+    assert download_file(session, f'{server_url}/revision.pdf', file_path) == 'resumed'
+    assert ('GET', '/revision.pdf', 'bytes=1000-') in _PdfHandler.requests_log
+    assert open(file_path, 'rb').read() == PDF_CONTENT
+
+
+def test_download_restarts_when_the_returned_range_is_misaligned(server_url, tmp_path) -> None:
+    file_path = str(tmp_path / 'revision.pdf')
+    with open(f'{file_path}.part', 'wb') as file:
+        file.write(PDF_CONTENT[:1000])
+
+    assert download_file(requests.Session(), f'{server_url}/misaligned.pdf', file_path) == 'downloaded'
+    assert [range_header for method, _, range_header in _PdfHandler.requests_log if method == 'GET'] == ['bytes=1000-', None]
+    assert open(file_path, 'rb').read() == PDF_CONTENT
+
+
+def test_download_revision_pdfs(server_url) -> None:
+    forqan_lessons_info = {
+        f'module_0{i}': {'name': f'الوحدة {i}', 'url': '', 'lessons': [
+            {'name': 'المحاضرة 1', 'url': '', 'video_url': 'v'},
+            {'name': f'مراجعة المحاضرات {i}', 'url': '', 'pdf_name': f'مراجعة المحاضرات {i}', 'pdf_url': f'{server_url}/{i}.pdf'},
+            # a revision lesson whose page has no PDF link, which isn't counted as a failed download
+            {'name': f'مراجعة المحاضرات {i}.1', 'url': '', 'pdf_name': f'مراجعة المحاضرات {i}.1', 'pdf_url': None},
+        ]} for i in range(1, 4)
+    }
+
+    assert fsc.download_revision_pdfs(forqan_lessons_info, max_in_flight=3, use_blob_store=False) == \
+        {'skipped': 0, 'downloaded': 3, 'resumed': 0, 'failed': 0}
+    assert fsc.download_revision_pdfs(forqan_lessons_info, max_in_flight=3, use_blob_store=False) == \
+        {'skipped': 3, 'downloaded': 0, 'resumed': 0, 'failed': 0}
+    pdf_path = os.path.join(os.environ['FINAL_OUTPUTS_DIR'], 'revisions_pdfs', 'الوحدة 2', 'مراجعة المحاضرات 2.pdf')
+    assert open(pdf_path, 'rb').read() == PDF_CONTENT
+
+
+def test_blob_store_deduplicates_pdfs(server_url, tmp_path) -> None:
+    # the same PDF is linked from two modules (under different names), and a third URL serves the same content
+    forqan_lessons_info = {
+        f'module_0{i}': {'name': f'وحدة {i}', 'url': '', 'lessons': [
+            {'name': f'مراجعة {i}', 'url': '', 'pdf_name': f'مراجعة {i}', 'pdf_url': f'{server_url}/{url_name}.pdf'},
+        ]} for i, url_name in ((1, 'shared'), (2, 'shared'), (3, 'copy'))
+    }
+    blob_store = PdfBlobStore(str(tmp_path / 'blobs'))
+    pdfs_to_download = get_revision_pdfs_to_download(forqan_lessons_info)
+
+    outcomes = download_pdfs_to_blob_store(pdfs_to_download, requests.Session(), blob_store, max_in_flight=2)
+
+    assert outcomes == {'skipped': 0, 'downloaded': 2, 'resumed': 0, 'failed': 0}
+    assert [path for method, path, _ in _PdfHandler.requests_log if method == 'GET'].count('/shared.pdf') == 1
+    assert len(list((tmp_path / 'blobs').glob('*/*.pdf'))) == 1
+    file_paths = [file_path for _, file_path in pdfs_to_download]
+    assert all(open(file_path, 'rb').read() == PDF_CONTENT for file_path in file_paths)
+    assert os.path.samefile(file_paths[0], file_paths[2])
+    # each change was appended to the journal (2 URLs and 3 links), instead of rewriting the manifest
+    with open(blob_store.journal_path, encoding='utf-8') as file:
+        assert len(file.readlines()) == 5
+    assert not os.path.exists(blob_store.manifest_path)
+
+    # a new run (i.e., a new store object reading the manifest) doesn't send any request
+    _PdfHandler.requests_log.clear()
+    blob_store = PdfBlobStore(str(tmp_path / 'blobs'))
+    assert not os.path.exists(blob_store.journal_path)
+    outcomes = download_pdfs_to_blob_store(pdfs_to_download, requests.Session(), blob_store)
+    assert outcomes == {'skipped': 2, 'downloaded': 0, 'resumed': 0, 'failed': 0}
+    assert _PdfHandler.requests_log == []
+    # the unchanged links aren't recorded again
+    assert not os.path.exists(blob_store.journal_path)
+
+
+def test_blob_store_copies_are_not_copied_again(server_url, tmp_path, monkeypatch) -> None:
+    def _unsupported_link(*args, **kwargs):
+        raise OSError("Hardlinks aren't supported")
+
+    copied_paths = []
+    copyfile = shutil.copyfile
+    monkeypatch.setattr(os, 'link', _unsupported_link)
+    monkeypatch.setattr(shutil, 'copyfile', lambda source, destination: copied_paths.append(destination) or copyfile(source, destination))
+    pdfs_to_download = [(f'{server_url}/{i}.pdf', str(tmp_path / 'revisions_pdfs' / f'{i}.pdf')) for i in range(1, 3)]
+    download_pdfs_to_blob_store(pdfs_to_download, requests.Session(), PdfBlobStore(str(tmp_path / 'blobs')))
+    assert len(copied_paths) == 2
+
+    # the next run finds the unchanged copies in the manifest
+    copied_paths.clear()
+    blob_store = PdfBlobStore(str(tmp_path / 'blobs'))
+    assert download_pdfs_to_blob_store(pdfs_to_download, requests.Session(), blob_store)['skipped'] == 2
+    assert copied_paths == [] and not os.path.exists(blob_store.journal_path)
+
+    # a modified copy is copied again
+    with open(pdfs_to_download[0][1], 'wb') as file:
+        file.write(b'modified')
+    download_pdfs_to_blob_store(pdfs_to_download, requests.Session(), PdfBlobStore(str(tmp_path / 'blobs')))
+    assert len(copied_paths) == 1 and copied_paths[0].startswith(pdfs_to_download[0][1])
+    assert open(pdfs_to_download[0][1], 'rb').read() == PDF_CONTENT
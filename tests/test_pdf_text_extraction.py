@@ -0,0 +1,90 @@
+# test_pdf_text_extraction.py
+import json
+from typing import Iterator
+
+import pytest
+
+from forqan_academy_explainer import pdf_text_extraction as pte
+
+
+class FakePdfBackend:
+    """Reads "PDFs" which are text files whose pages are separated by form feeds (the workers import it from this module)."""
+
+    @staticmethod
+    def _read_pages(pdf_path: str) -> list:
+        with open(pdf_path, 'r', encoding='utf-8') as file:
+            content = file.read()
+        if content.startswith('CORRUPT'):
+            raise ValueError('corrupted pdf')
+        return content.split('\f')
+
+    @staticmethod
+    def get_page_count(pdf_path: str) -> int:
+        with open(pdf_path, 'r', encoding='utf-8') as file:
+            return file.read().count('\f') + 1
+
+    @staticmethod
+    def iter_pages_text(pdf_path: str, first_page: int, last_page: int) -> Iterator[str]:
+        yield from FakePdfBackend._read_pages(pdf_path)[first_page:last_page]
+
+
+class ExplodingPdfBackend:
+    """Fails if any PDF is opened (i.e., if a PDF is extracted instead of being loaded from the cache)."""
+
+    @staticmethod
+    def get_page_count(pdf_path: str) -> int:
+        raise RuntimeError('the pdf was opened')
+
+    @staticmethod
+    def iter_pages_text(pdf_path: str, first_page: int, last_page: int) -> Iterator[str]:
+        raise RuntimeError('the pdf was opened')
+
+
+def _write_fake_pdf(path, pages: list) -> str:
+    path.write_text('\f'.join(pages), encoding='utf-8')
+    return str(path)
+
+
+def test_extract_pdfs_text_in_parallel_with_cache(tmp_path) -> None:
+    long_pdf_pages = [f'الصفحة {i}' for i in range(1, 21)]
+    long_pdf_path = _write_fake_pdf(tmp_path / 'long.pdf', long_pdf_pages)
+    # the same content as the long pdf (e.g., a revision pdf linked from two modules)
+    duplicate_pdf_path = _write_fake_pdf(tmp_path / 'duplicate.pdf', long_pdf_pages)
+    short_pdf_path = _write_fake_pdf(tmp_path / 'short.pdf', ['a', 'b'])
+    corrupt_pdf_path = _write_fake_pdf(tmp_path / 'corrupt.pdf', ['CORRUPT', 'x'])
+    texts_dir = tmp_path / 'texts'
+    pdfs_to_extract = [(pdf_path, str(texts_dir / f'{name}.txt')) for pdf_path, name in
+                        [(long_pdf_path, 'long'), (duplicate_pdf_path, 'duplicate'), (short_pdf_path, 'short'),
+                        (corrupt_pdf_path, 'corrupt'), (str(tmp_path / 'missing.pdf'), 'missing')]]
+    cache_dir = str(tmp_path / 'cache')
+
+    outcomes = pte.extract_pdfs_text(pdfs_to_extract, backend=FakePdfBackend, max_workers=2, pages_per_task=3, cache_dir=cache_dir)
+
+    assert outcomes == {'extracted': 2, 'cached': 0, 'missing': 1, 'failed': 1}
+    assert (texts_dir / 'long.txt').read_text(encoding='utf-8') == pte.PAGE_SEPARATOR.join(long_pdf_pages)
+    assert (texts_dir / 'duplicate.txt').read_text(encoding='utf-8') == pte.PAGE_SEPARATOR.join(long_pdf_pages)
+    assert (texts_dir / 'short.txt').read_text(encoding='utf-8') == 'a\fb'
+    assert not (texts_dir / 'corrupt.txt').exists()
+
+    # each page's extraction time is recorded in the cache
+    cache = pte.PdfTextCache(cache_dir)
+    long_pdf_hash = pte.get_file_sha256(long_pdf_path)
+    with open(cache.get_path(long_pdf_hash), 'r', encoding='utf-8') as file:
+        pages_records = [json.loads(line) for line in file]
+    assert sorted(page_record['page'] for page_record in pages_records) == list(range(1, 21))
+    assert all(page_record['seconds'] >= 0 for page_record in pages_records)
+
+    # the unchanged pdfs are loaded from the cache (without being opened), and the corrupted one is retried
+    (texts_dir / 'long.txt').unlink()
+    outcomes = pte.extract_pdfs_text(pdfs_to_extract, backend=ExplodingPdfBackend, max_workers=1, cache_dir=cache_dir)
+    assert outcomes == {'extracted': 0, 'cached': 2, 'missing': 1, 'failed': 1}
+    assert (texts_dir / 'long.txt').read_text(encoding='utf-8') == pte.PAGE_SEPARATOR.join(long_pdf_pages)
+
+
+def test_get_pdf_text_backend(monkeypatch) -> None:
+    assert pte.get_pdf_text_backend('pypdf') is pte.PDF_TEXT_BACKENDS['pypdf']
+    assert pte.get_pdf_text_backend(FakePdfBackend) is FakePdfBackend
+    monkeypatch.setenv('PDF_TEXT_BACKEND', 'pymupdf')
+    assert pte.get_pdf_text_backend() is pte.PDF_TEXT_BACKENDS['pymupdf']
+    with pytest.raises(ValueError):
+        pte.get_pdf_text_backend('pdftotext')
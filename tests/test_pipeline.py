@@ -0,0 +1,205 @@
+# test_pipeline.py
+import pytest
+
+from forqan_academy_scraper import scraper as fsc
+from forqan_academy_scraper import pipeline
+from forqan_academy_scraper.pipeline import PipelineRunner, register_stage
+from forqan_pages import FakeSession, build_catalogue, login_response_html
+
+
+class _CrashingSession(FakeSession):
+    """Raises KeyboardInterrupt (i.e., simulates Ctrl-C) when the n-th lesson page is requested."""
+
+    def __init__(self, pages: dict, crash_at_lesson: int) -> None:
+        super().__init__(pages, latency=0)
+        self.crash_at_lesson = crash_at_lesson
+        self.lessons_requested = 0
+
+    def get(self, url: str, **kwargs):
+        if '/topic/' in url:
+            self.lessons_requested += 1
+            if self.lessons_requested == self.crash_at_lesson:
+                raise KeyboardInterrupt
+        return super().get(url, **kwargs)
+
+
+def _patch_login(monkeypatch, catalogue: dict, session: FakeSession) -> None:
+    monkeypatch.setattr(fsc, 'login', lambda *args, **kwargs: (session, login_response_html(catalogue['modules_urls'])))
+
+
+def test_pipeline_resumes_lessons_stage_after_interruption(monkeypatch, tmp_path) -> None:
+    catalogue = build_catalogue(num_modules=2, lessons_per_module=4)
+    checkpoints_dir = str(tmp_path / 'checkpoints')
+
+    crashing_session = _CrashingSession(catalogue['pages'], crash_at_lesson=6)
+    _patch_login(monkeypatch, catalogue, crashing_session)
+    with pytest.raises(KeyboardInterrupt):
+        PipelineRunner(checkpoints_dir, max_in_flight=1).run(until_stage='lessons_info')
+
+    # the stages before the interruption were checkpointed, and so were the first 5 lessons
+    runner = PipelineRunner(checkpoints_dir, max_in_flight=1)
+    assert runner.has_checkpoint('lessons_urls') and not runner.has_checkpoint('lessons_info')
+
+    resumed_session = FakeSession(catalogue['pages'], latency=0)
+    _patch_login(monkeypatch, catalogue, resumed_session)
+    forqan_lessons_info = runner.run(until_stage='lessons_info')['lessons_info']
+
+    # only the 3 remaining lessons were fetched (no module pages)
+    assert len(resumed_session.requested_urls) == 3
+    assert all('/topic/' in url for url in resumed_session.requested_urls)
+
+    full_session = FakeSession(catalogue['pages'], latency=0)
+    modules_name_and_html = fsc.get_modules_info_using_regex(catalogue['modules_urls'], full_session)
+    lessons_names_and_urls_per_module = fsc.get_lessons_name_and_urls_using_regex(modules_name_and_html)
+    assert forqan_lessons_info == fsc.get_video_urls_descriptions_and_pdf_metadata(
+        modules_name_and_html, catalogue['modules_urls'], lessons_names_and_urls_per_module, full_session)
+    assert runner.load_checkpoint('lessons_info') == forqan_lessons_info
+
+
+def test_run_single_stage_from_checkpoints(monkeypatch, tmp_path) -> None:
+    catalogue = build_catalogue(num_modules=2, lessons_per_module=3)
+    session = FakeSession(catalogue['pages'], latency=0)
+    _patch_login(monkeypatch, catalogue, session)
+    runner = PipelineRunner(str(tmp_path / 'checkpoints'), max_in_flight=2)
+    runner.run(until_stage='lessons_urls')
+    requests_before = len(session.requested_urls)
+
+    lessons_names_and_urls_per_module = runner.run_stage('lessons_urls')
+
+    assert len(session.requested_urls) == requests_before
+    assert lessons_names_and_urls_per_module == runner.load_checkpoint('lessons_urls')
+    assert all(isinstance(lesson, tuple) for lesson in lessons_names_and_urls_per_module[0])
+    with pytest.raises(ValueError):
+        runner.run_stage('unknown_stage')
+
+
+def test_registered_stages_run_after_the_scraping_stages(monkeypatch, tmp_path) -> None:
+    from forqan_academy_explainer import pipeline_stages
+
+    assert pipeline.STAGES[-3:] == ['revision_pdfs_text', 'subtitles', 'search_index']
+    # registering the same stage again (e.g., when the module is reloaded) changes nothing
+    register_stage('subtitles', ['lessons_info'], pipeline_stages._run_subtitles)
+    assert pipeline.STAGES.count('subtitles') == 1
+    with pytest.raises(ValueError):
+        register_stage('subtitles', ['lessons_info'], lambda runner, forqan_lessons_info: {})
+    with pytest.raises(ValueError):
+        register_stage('lessons_summaries', ['unknown_stage'], lambda runner, forqan_lessons_info: {})
+
+    catalogue = build_catalogue(num_modules=1, lessons_per_module=3)
+    _patch_login(monkeypatch, catalogue, FakeSession(catalogue['pages'], latency=0))
+    runner = PipelineRunner(str(tmp_path / 'checkpoints'), max_in_flight=2)
+    runner.run(until_stage='lessons_info')
+    assert list(runner.run_stage('search_index')) == ['lesson', 'revision_pdf', 'subtitles']
+    assert runner.has_checkpoint('search_index')
+
+
+def test_run_defaults_to_the_last_registered_stage(monkeypatch, tmp_path) -> None:
+    # the stages registered by this test are removed after it
+    monkeypatch.setattr(pipeline, 'STAGES', pipeline.STAGES[:pipeline.STAGES.index('revision_pdfs') + 1])
+    monkeypatch.setattr(pipeline, 'STAGES_INPUTS', {stage_name: pipeline.STAGES_INPUTS[stage_name] for stage_name in pipeline.STAGES})
+    monkeypatch.setattr(pipeline, '_REGISTERED_STAGES_FUNCTIONS', {})
+    monkeypatch.setattr(fsc, 'download_revision_pdfs', lambda *args, **kwargs: {})
+    register_stage('lessons_count', ['lessons_info'],
+                   lambda runner, forqan_lessons_info: sum(len(module['lessons']) for module in forqan_lessons_info.values()))
+
+    catalogue = build_catalogue(num_modules=2, lessons_per_module=3)
+    _patch_login(monkeypatch, catalogue, FakeSession(catalogue['pages'], latency=0))
+    outputs = PipelineRunner(str(tmp_path / 'checkpoints'), max_in_flight=2).run()
+
+    assert list(outputs)[-1] == 'lessons_count'
+    assert outputs['lessons_count'] == 6
+
+
+def test_lessons_progress_follows_the_lessons_when_the_site_changes(monkeypatch, tmp_path) -> None:
+    catalogue = build_catalogue(num_modules=2, lessons_per_module=3)
+    checkpoints_dir = str(tmp_path / 'checkpoints')
+    _patch_login(monkeypatch, catalogue, _CrashingSession(catalogue['pages'], crash_at_lesson=4))
+    with pytest.raises(KeyboardInterrupt):
+        PipelineRunner(checkpoints_dir, max_in_flight=1).run(until_stage='lessons_info')
+
+    # the first lesson was removed from the site (while the progress file of the first 3 lessons exists)
+    runner = PipelineRunner(checkpoints_dir, max_in_flight=1)
+    lessons_names_and_urls_per_module = runner.load_checkpoint('lessons_urls')
+    removed_lesson_url = lessons_names_and_urls_per_module[0].pop(0)[1]
+    runner.save_checkpoint('lessons_urls', lessons_names_and_urls_per_module)
+
+    session = FakeSession(catalogue['pages'], latency=0)
+    _patch_login(monkeypatch, catalogue, session)
+    forqan_lessons_info = runner.run(until_stage='lessons_info')['lessons_info']
+
+    assert len(session.requested_urls) == 3
+    lessons_urls = [lesson_url for cur_module_lessons in lessons_names_and_urls_per_module for _, lesson_url in cur_module_lessons]
+    assert [lesson['url'] for module in forqan_lessons_info.values() for lesson in module['lessons']] == lessons_urls
+    assert removed_lesson_url not in lessons_urls
+
+
+def test_rerunning_a_stage_deletes_the_checkpoints_depending_on_it(monkeypatch, tmp_path) -> None:
+    catalogue = build_catalogue(num_modules=2, lessons_per_module=3)
+    checkpoints_dir = str(tmp_path / 'checkpoints')
+    _patch_login(monkeypatch, catalogue, _CrashingSession(catalogue['pages'], crash_at_lesson=4))
+    with pytest.raises(KeyboardInterrupt):
+        PipelineRunner(checkpoints_dir, max_in_flight=1).run(until_stage='lessons_info')
+    session = FakeSession(catalogue['pages'], latency=0)
+    _patch_login(monkeypatch, catalogue, session)
+    runner = PipelineRunner(checkpoints_dir, max_in_flight=1)
+
+    assert pipeline.get_dependent_stages('modules_info')[:3] == ['lessons_urls', 'lessons_info', 'revision_pdfs']
+    runner.run_stage('modules_info')
+
+    assert runner.has_checkpoint('modules_info') and not runner.has_checkpoint('lessons_urls')
+    assert runner._load_lessons_progress() == {}
+    # all lessons are fetched again (after the 2 module pages)
+    runner.run(until_stage='lessons_info')
+    assert len(session.requested_urls) == 2 + 6
+
+
+def test_incremental_pipeline_only_fetches_the_new_and_unavailable_lessons(monkeypatch, tmp_path) -> None:
+    monkeypatch.setenv('FINAL_OUTPUTS_DIR', str(tmp_path / 'final_outputs'))
+    monkeypatch.delenv('INCREMENTAL_RECHECK_KNOWN_LESSONS', raising=False)
+    catalogue = build_catalogue(num_modules=2, lessons_per_module=4)
+    _patch_login(monkeypatch, catalogue, FakeSession(catalogue['pages'], latency=0))
+    full_info = PipelineRunner(str(tmp_path / 'checkpoints'), max_in_flight=2).run(until_stage='lessons_info')['lessons_info']
+
+    session = FakeSession(catalogue['pages'], latency=0)
+    _patch_login(monkeypatch, catalogue, session)
+    runner = PipelineRunner(str(tmp_path / 'checkpoints'), max_in_flight=2, incremental=True)
+    incremental_info = runner.run(until_stage='lessons_info', fresh=True)['lessons_info']
+
+    # the 2 module pages, then the not-available lesson of each module
+    assert len(session.requested_urls) == 2 + 2
+    assert [lesson['url'] for module in incremental_info.values() for lesson in module['lessons']] == \
+        [lesson['url'] for module in full_info.values() for lesson in module['lessons']]
+
+
+def test_stage_is_skipped_without_its_optional_library(monkeypatch, tmp_path) -> None:
+    from forqan_academy_explainer import pipeline_stages
+
+    def _missing_backend(*args, **kwargs):
+        raise ImportError("Extracting the text of PDFs requires PyMuPDF or pypdf")
+
+    monkeypatch.setattr(pipeline_stages.pte, 'get_pdf_text_backend', _missing_backend)
+    monkeypatch.setattr(fsc, 'download_revision_pdfs', lambda *args, **kwargs: {})
+    catalogue = build_catalogue(num_modules=1, lessons_per_module=3)
+    _patch_login(monkeypatch, catalogue, FakeSession(catalogue['pages'], latency=0))
+    runner = PipelineRunner(str(tmp_path / 'checkpoints'), max_in_flight=2)
+
+    assert runner.get('revision_pdfs_text') is None
+    # the skipped stage isn't checkpointed, so it runs once the library is installed
+    assert runner.has_checkpoint('revision_pdfs') and not runner.has_checkpoint('revision_pdfs_text')
+
+
+def test_subtitles_stage_is_skipped_without_the_transcription_libraries(monkeypatch, tmp_path) -> None:
+    from forqan_academy_explainer import pipeline_stages
+
+    def _missing_module(module_name, package_name):
+        raise ImportError(f"This transcription backend requires {package_name}")
+
+    monkeypatch.setenv('FINAL_OUTPUTS_DIR', str(tmp_path / 'final_outputs'))
+    monkeypatch.delenv('TRANSCRIPTION_BACKEND', raising=False)
+    monkeypatch.setattr(pipeline_stages.ftr, '_import_transcription_module', _missing_module)
+    catalogue = build_catalogue(num_modules=1, lessons_per_module=3)
+    _patch_login(monkeypatch, catalogue, FakeSession(catalogue['pages'], latency=0))
+    runner = PipelineRunner(str(tmp_path / 'checkpoints'), max_in_flight=2)
+
+    assert runner.get('subtitles') is None
+    assert not runner.has_checkpoint('subtitles')
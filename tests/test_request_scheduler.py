@@ -0,0 +1,107 @@
+# test_request_scheduler.py
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from forqan_academy_scraper.request_scheduler import RequestScheduler, ScheduledSession
+
+
+class _FlakyHandler(BaseHTTPRequestHandler):
+    # the status codes returned by the next requests (200 once they are exhausted)
+    statuses = []
+    requests_count = 0
+    delay = 0.0
+    lock = threading.Lock()
+
+    def _respond(self) -> None:
+        with self.lock:
+            type(self).requests_count += 1
+            status = self.statuses.pop(0) if self.statuses else 200
+        time.sleep(self.delay)
+        body = b'ok' if status == 200 else b'error'
+        self.send_response(status)
+        if status == 429:
+            self.send_header('Retry-After', '0')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        self._respond()
+
+    def do_POST(self) -> None:
+        self._respond()
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+@pytest.fixture()
+def server_url():
+    _FlakyHandler.statuses = []
+    _FlakyHandler.requests_count = 0
+    _FlakyHandler.delay = 0.0
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _FlakyHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{server.server_address[1]}'
+    server.shutdown()
+
+
+def _session(**kwargs) -> ScheduledSession:
+    kwargs.setdefault('requests_per_second', 0)
+    kwargs.setdefault('backoff_base', 0.01)
+    return ScheduledSession(RequestScheduler(**kwargs))
+
+
+def test_transient_errors_are_retried_and_back_off(server_url) -> None:
+    _FlakyHandler.statuses = [503, 429, 502]
+    session = _session(max_concurrency=8, max_retries=3, backoff_cooldown=0, latency_backoff_factor=1000)
+
+    response = session.get(f'{server_url}/lesson')
+    assert response.status_code == 200
+    assert _FlakyHandler.requests_count == 4
+    stats = session.scheduler.get_stats()
+    assert stats['retries'] == stats['backoffs'] == 3
+    # halved on each of the 3 errors (8 -> 1), then increased by the successful request
+    assert list(stats['concurrency_limits'].values()) == [2]
+
+    # the limit grows back with successful requests (by one per "round" of requests, i.e., 2 -> 4.99)
+    for _ in range(10):
+        session.get(f'{server_url}/lesson')
+    assert list(session.scheduler.get_stats()['concurrency_limits'].values()) == [4]
+
+
+def test_retries_are_limited_and_non_idempotent_requests_are_not_retried(server_url) -> None:
+    _FlakyHandler.statuses = [500] * 10
+    session = _session(max_retries=2)
+
+    assert session.get(f'{server_url}/lesson').status_code == 500
+    assert _FlakyHandler.requests_count == 3
+
+    _FlakyHandler.requests_count = 0
+    assert session.post(f'{server_url}/login/', data={'username': 'user'}).status_code == 500
+    assert _FlakyHandler.requests_count == 1
+
+
+def test_requests_are_rate_limited_per_host(server_url) -> None:
+    session = _session(requests_per_second=20, burst=1)
+
+    start_time = time.perf_counter()
+    for _ in range(6):
+        session.get(f'{server_url}/lesson')
+    # the first request uses the initial token, then a token is added every 50 ms
+    assert time.perf_counter() - start_time >= 0.25
+
+
+def test_requests_have_a_default_timeout(server_url) -> None:
+    _FlakyHandler.delay = 0.5
+    session = _session(read_timeout=0.1, max_retries=1)
+
+    with pytest.raises(requests.Timeout):
+        session.get(f'{server_url}/lesson')
+    assert _FlakyHandler.requests_count == 2
+    # an explicit timeout is kept
+    assert session.get(f'{server_url}/lesson', timeout=5).status_code == 200
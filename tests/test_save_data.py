@@ -0,0 +1,217 @@
+# test_save_data.py
+import os
+import json
+import hashlib
+import threading
+import multiprocessing
+
+import pytest
+
+from odyash_general_functions import odyash_general_functions as ogf
+
+
+def test_async_save_data_keeps_the_calls_order_and_flushes(monkeypatch):
+    # a new run, so that the counters start from 1
+    monkeypatch.setenv('SAVE_DATA_RUN_ID', 'async_test_run')
+    written_event = threading.Event()
+    original_save = ogf._save_data_based_on_extension
+
+    def _slow_save(*args):
+        written_event.wait(timeout=5)
+        return original_save(*args)
+
+    monkeypatch.setattr(ogf, '_save_data_based_on_extension', _slow_save)
+    ogf.enable_async_save_data()
+    try:
+        ogf.save_data({'a': 1}, 'first', dir_name='async_test', file_extension='json')
+        ogf.save_data('second', 'second', dir_name='async_test')
+        dir_name = ogf.get_directory('async_test', intermediate_output=True)
+        # the callers don't wait for the disk
+        assert not os.path.exists(os.path.join(dir_name, '1_first.json'))
+
+        written_event.set()
+        ogf.flush_save_data()
+        with open(os.path.join(dir_name, '1_first.json'), encoding='utf-8') as file:
+            assert json.load(file) == {'a': 1}
+        with open(os.path.join(dir_name, '2_second.txt'), encoding='utf-8') as file:
+            assert file.read() == 'second'
+    finally:
+        written_event.set()
+        ogf.enable_async_save_data(False)
+
+
+
+def test_disabling_async_save_data_stops_the_writer_thread(monkeypatch):
+    monkeypatch.setenv('SAVE_DATA_RUN_ID', 'async_toggle_test_run')
+    ogf.enable_async_save_data()
+    writer = ogf._async_save_data_writer
+    ogf.save_data('queued', 'queued', dir_name='async_toggle_test')
+    ogf.enable_async_save_data(False)
+
+    assert not writer._thread.is_alive()
+    assert ogf.load_data('queued', dir_name='async_toggle_test') == 'queued'
+    # a call which got the writer before it was closed still saves its file
+    writer.put('txt', os.path.join(ogf.get_directory('async_toggle_test', intermediate_output=True), 'late'), 'late', 'late', None, None)
+    assert ogf.load_data('late', dir_name='async_toggle_test', add_intermediate_counter_prefix=False) == 'late'
+
+    threads_count = threading.active_count()
+    for _ in range(3):
+        ogf.enable_async_save_data()
+        ogf.enable_async_save_data(False)
+    assert threading.active_count() == threads_count
+
+def test_directories_are_resolved_once(monkeypatch):
+    ogf._resolve_directory.cache_clear()
+    ogf.get_run_manifest()
+    calls = []
+    original_here = ogf.here
+    monkeypatch.setattr(ogf, 'here', lambda: calls.append(1) or original_here())
+
+    for i in range(3):
+        ogf.save_data(str(i), f'file_{i}', dir_name='cached_dir', add_intermediate_counter_prefix=False)
+
+    assert len(calls) == 1
+    assert os.path.exists(os.path.join(ogf.get_directory('cached_dir', intermediate_output=True), 'file_2.txt'))
+
+
+@pytest.mark.parametrize('file_extension', ['json', 'json.gz', 'jsonl.gz', 'pkl.gz', 'txt', 'html.gz'])
+def test_save_data_formats_round_trip(file_extension):
+    data = [{'name': 'درس 1', 'url': 'https://example.com/topic/1'}, {'name': 'درس 2', 'url': None}]
+    if file_extension.startswith(('txt', 'html')):
+        data = '<p>درس</p>'
+    ogf.save_data(data, 'round_trip', dir_name='formats', file_extension=file_extension, add_intermediate_counter_prefix=False)
+
+    file_path = os.path.join(ogf.get_directory('formats', intermediate_output=True), f'round_trip.{file_extension}')
+    assert ogf.load_data_from_file(file_path) == data
+
+
+@pytest.mark.parametrize('module_name, file_extension', [('zstandard', 'json.zst'), ('msgpack', 'msgpack')])
+def test_save_data_optional_formats_round_trip(module_name, file_extension):
+    pytest.importorskip(module_name)
+    data = {'module': {'lessons': [{'name': 'درس', 'pdf_url': None}]}}
+    ogf.save_data(data, 'optional', dir_name='formats', file_extension=file_extension, add_intermediate_counter_prefix=False)
+
+    file_path = os.path.join(ogf.get_directory('formats', intermediate_output=True), f'optional.{file_extension}')
+    assert ogf.load_data_from_file(file_path) == data
+
+
+def test_save_data_global_compression(monkeypatch):
+    monkeypatch.setenv('SAVE_DATA_COMPRESSION', 'gz')
+    ogf.save_data({'a': 1}, 'globally_compressed', dir_name='formats', file_extension='json', add_intermediate_counter_prefix=False)
+    ogf.save_data(b'%PDF-1.4', 'not_compressed', dir_name='formats', file_extension='pdf', add_intermediate_counter_prefix=False)
+
+    dir_name = ogf.get_directory('formats', intermediate_output=True)
+    assert ogf.load_data_from_file(os.path.join(dir_name, 'globally_compressed.json.gz')) == {'a': 1}
+    assert os.path.exists(os.path.join(dir_name, 'not_compressed.pdf'))
+
+    with pytest.raises(ValueError):
+        ogf.save_data('data', 'invalid', file_extension='docx')
+
+
+def test_load_data_finds_the_latest_saved_file_and_caches_it():
+    ogf.save_data({'version': 1}, 'lessons_info', dir_name='load_test', file_extension='json')
+    ogf.save_data({'version': 2}, 'lessons_info', dir_name='load_test', file_extension='json.gz')
+
+    data = ogf.load_data('lessons_info', dir_name='load_test')
+    assert data == {'version': 2}
+    assert ogf.load_data('lessons_info', dir_name='load_test', file_extension='json') == {'version': 1}
+    # an unchanged file isn't decoded again
+    assert ogf.load_data('lessons_info', dir_name='load_test') is data
+
+    ogf.save_data({'version': 3}, 'lessons_info', dir_name='load_test', file_extension='json')
+    assert ogf.load_data('lessons_info', dir_name='load_test') == {'version': 3}
+
+    with pytest.raises(FileNotFoundError):
+        ogf.load_data('missing', dir_name='load_test')
+
+
+
+@pytest.mark.parametrize('file_extension', ['json', 'json.gz', 'txt'])
+def test_load_data_from_file_with_dots_in_the_file_name(file_extension):
+    dir_name = f"dotted_names_test_{file_extension.replace('.', '_')}"
+    ogf.save_data({'a': 1}, 'module 1.2 lessons', dir_name=dir_name, file_extension=file_extension)
+
+    expected_data = {'a': 1} if 'json' in file_extension else "{'a': 1}"
+    assert ogf.load_data('module 1.2 lessons', dir_name=dir_name) == expected_data
+    dir_path = ogf.get_directory(dir_name, intermediate_output=True)
+    file_path = os.path.join(dir_path, os.listdir(dir_path)[0])
+    assert ogf.load_data_from_file(file_path, use_cache=False) == expected_data
+    with pytest.raises(ValueError):
+        ogf.load_data_from_file(f'{file_path}.docx')
+
+@pytest.mark.parametrize('file_extension', ['json', 'jsonl', 'jsonl.gz', 'pkl'])
+def test_load_data_memory_maps_large_files(monkeypatch, file_extension):
+    monkeypatch.setattr(ogf, '_LOAD_DATA_MMAP_MIN_SIZE', 0)
+    records = [{'index': i, 'name': f'درس {i}'} for i in range(100)]
+    ogf.save_data(records, 'records', dir_name='mmap_test', file_extension=file_extension, add_intermediate_counter_prefix=False)
+
+    assert ogf.load_data('records', dir_name='mmap_test', file_extension=file_extension, 
+                        add_intermediate_counter_prefix=False, use_cache=False) == records
+    if file_extension.startswith('jsonl'):
+        lazy_records = ogf.load_data('records', dir_name='mmap_test', file_extension=file_extension, 
+                                    add_intermediate_counter_prefix=False, lazy=True)
+        assert next(lazy_records) == records[0]
+        assert list(lazy_records) == records[1:]
+
+
+def test_run_manifest_assigns_unique_counters_and_records_files(monkeypatch):
+    monkeypatch.setenv('SAVE_DATA_RUN_ID', 'manifest_test_run')
+    monkeypatch.setenv('SAVE_DATA_STAGE', 'lessons_info')
+
+    threads = [threading.Thread(target=ogf.save_data, args=(f'lesson {i}', f'lesson_{i}'), kwargs={'dir_name': 'manifest_test'}) 
+            for i in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    entries = ogf.get_run_manifest().get_entries()
+    dir_name = ogf.get_directory('manifest_test', intermediate_output=True)
+    assert sorted(entry['counter'] for entry in entries.values()) == list(range(1, 21))
+    entry = ogf.get_run_manifest().get_entry(dir_name, 'lesson_7')
+    assert entry['stage'] == 'lessons_info'
+    assert entry['size'] == len('lesson 7'.encode('utf-8'))
+    assert os.path.basename(entry['file_path']) == f"{entry['counter']}_lesson_7.txt"
+    assert ogf.load_data('lesson_7', dir_name='manifest_test') == 'lesson 7'
+
+
+
+def test_run_manifest_records_without_reading_the_files_again_or_locking(monkeypatch):
+    from odyash_general_functions import run_manifest
+
+    monkeypatch.setenv('SAVE_DATA_RUN_ID', 'manifest_hash_test_run')
+    def _fail(*args, **kwargs):
+        raise AssertionError('should not be called')
+    monkeypatch.setattr(run_manifest, '_get_file_sha256', _fail)
+    if run_manifest.fcntl is not None:
+        monkeypatch.setattr(run_manifest, '_locked_file', _fail)
+
+    ogf.save_data({'a': 1}, 'hashed', dir_name='manifest_hash_test', file_extension='json.gz')
+    list(ogf.stream_records_to_jsonl(iter([{'a': 1}, {'b': 2}]), 'hashed_records', dir_name='manifest_hash_test'))
+
+    dir_name = ogf.get_directory('manifest_hash_test', intermediate_output=True)
+    for file_name in ('hashed', 'hashed_records'):
+        entry = ogf.get_run_manifest().get_entry(dir_name, file_name)
+        with open(entry['file_path'], 'rb') as file:
+            file_content = file.read()
+        assert entry['size'] == len(file_content)
+        assert entry['sha256'] == hashlib.sha256(file_content).hexdigest()
+    assert sorted(entry['counter'] for entry in ogf.get_run_manifest().get_entries().values()) == [1, 2]
+
+def _save_data_in_another_process(run_id: str) -> None:
+    os.environ['SAVE_DATA_RUN_ID'] = run_id
+    for i in range(10):
+        ogf.save_data(str(i), f'child_{os.getpid()}_{i}', dir_name='manifest_processes_test')
+
+
+def test_run_manifest_counters_are_unique_across_processes(monkeypatch):
+    monkeypatch.setenv('SAVE_DATA_RUN_ID', 'processes_test_run')
+    context = multiprocessing.get_context('spawn')
+    processes = [context.Process(target=_save_data_in_another_process, args=('processes_test_run',)) for _ in range(3)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    counters = [entry['counter'] for entry in ogf.get_run_manifest().get_entries().values()]
+    assert sorted(counters) == list(range(1, 31))
@@ -0,0 +1,70 @@
+# test_search_index.py
+import os
+
+from forqan_academy_explainer import transcription as ftr
+from forqan_academy_explainer.search_index import SearchIndex, normalize_arabic
+
+
+def _lessons_info() -> dict:
+    return {
+        'module_01': {'name': 'search_module_1', 'lessons': [
+            {'name': 'غزوة الخندق', 'url': 'https://f/topic/1/', 'video_url': 'https://v/1',
+            'video_description': 'حفر الخَنْدَق حول المدينة، ودور سلمان الفارسي'},
+            {'name': 'صلح الحديبية', 'url': 'https://f/topic/2/', 'video_url': 'https://v/2',
+            'video_description': 'شروط الصلح مع قريش، وبيعة الرضوان'},
+            {'name': 'locked', 'url': 'https://f/topic/3/', 'not_available': True},
+        ]},
+        'module_02': {'name': 'search_module_2', 'lessons': [
+            {'name': 'فتح مكة', 'url': 'https://f/topic/4/', 'video_url': 'https://v/4',
+            'video_description': 'دخول النبي مكّة، والعفو عن قريش'},
+        ]},
+    }
+
+
+def test_normalize_arabic() -> None:
+    assert normalize_arabic('الخَنْدَقُ') == 'الخندق'
+    assert normalize_arabic('إلى مكّـة') == 'الي مكه'
+    assert normalize_arabic('أآٱ ى ة PDF') == 'ااا ي ه pdf'
+
+
+def test_search_ranks_and_normalizes(tmp_path) -> None:
+    with SearchIndex(str(tmp_path / 'index.sqlite3')) as search_index:
+        assert search_index.index_lessons_info(_lessons_info()) == {'indexed': 3, 'unchanged': 0, 'removed': 0}
+
+        # the query's diacritics and letters' variants don't matter
+        results = search_index.search('الخندق')
+        assert [result['url'] for result in results] == ['https://f/topic/1/']
+        assert results[0]['module_name'] == 'search_module_1' and results[0]['lesson_name'] == 'غزوة الخندق'
+        assert [result['url'] for result in search_index.search('مكة')] == ['https://f/topic/4/']
+
+        # a lesson matching in its name ranks before a lesson only matching in its description
+        assert [result['url'] for result in search_index.search('قريش الحديبية')] == ['https://f/topic/2/', 'https://f/topic/4/']
+        assert search_index.search('OR "NOT"') == []
+        assert search_index.search('...') == []
+
+
+def test_index_is_incremental_and_extensible(tmp_path) -> None:
+    forqan_lessons_info = _lessons_info()
+    with SearchIndex(str(tmp_path / 'index.sqlite3')) as search_index:
+        search_index.index_lessons_info(forqan_lessons_info)
+
+        # only the changed lesson is re-indexed, and the removed lesson is deleted
+        forqan_lessons_info['module_01']['lessons'][0]['video_description'] = 'تحالف الأحزاب'
+        forqan_lessons_info['module_02']['lessons'].pop()
+        assert search_index.index_lessons_info(forqan_lessons_info) == {'indexed': 1, 'unchanged': 1, 'removed': 1}
+        assert [result['url'] for result in search_index.search('الاحزاب')] == ['https://f/topic/1/']
+        assert search_index.search('مكة') == []
+
+        # the subtitles which exist are indexed too (and can be filtered by kind)
+        ftr.transcribe_lessons(ftr.get_lessons_to_transcribe(forqan_lessons_info)[:1], backend=ftr.StubTranscriptionBackend())
+        counts = search_index.index_all(forqan_lessons_info)
+        assert counts['subtitles'] == {'indexed': 1, 'unchanged': 0, 'removed': 0}
+        assert counts['revision_pdf'] == {'indexed': 0, 'unchanged': 0, 'removed': 0}
+        results = search_index.search('untranscribed', kinds=['subtitles'])
+        assert [(result['kind'], result['url']) for result in results] == [('subtitles', 'https://v/1')]
+        assert search_index.search('untranscribed', kinds=['lesson']) == []
+        assert search_index.index_subtitles(forqan_lessons_info) == {'indexed': 0, 'unchanged': 1, 'removed': 0}
+
+    # the index persists on disk
+    with SearchIndex(str(tmp_path / 'index.sqlite3')) as search_index:
+        assert len(search_index.search('الاحزاب الحديبية')) == 2
@@ -0,0 +1,165 @@
+# test_the_logger.py
+import os
+import sys
+import json
+import subprocess
+from types import SimpleNamespace
+
+import pytest
+
+from logaru_logger import the_logger, metrics
+from logaru_logger.the_logger import logger, log_decorator
+
+
+@pytest.fixture
+def captured_messages():
+    messages = []
+    handler_id = logger.add(messages.append, level='DEBUG', format='{message}')
+    yield messages
+    logger.remove(handler_id)
+
+
+@log_decorator(exit=True)
+def _add(first_number, second_number=0):
+    return first_number + second_number
+
+
+def test_log_decorator_logs_the_variable_names_and_values(captured_messages):
+    lessons_count = 3
+    _add(lessons_count, second_number=lessons_count)
+
+    entry_message, exit_message = [message for message in captured_messages if '"_add"' in message]
+    assert 'Arg-Var-Names = (lessons_count)' in entry_message
+    assert 'Arg-Var-Values = ((3,))' in entry_message
+    assert 'Results = 6' in exit_message
+
+
+def test_log_decorator_inspects_each_call_site_once(monkeypatch, captured_messages):
+    inspected = []
+    original_get_var_names = the_logger._get_var_names_passed_to_args_or_kwargs
+    monkeypatch.setattr(the_logger, '_get_var_names_passed_to_args_or_kwargs', 
+                        lambda data: inspected.append(data) or original_get_var_names(data))
+    lessons_count = 1
+    for _ in range(5):
+        _add(lessons_count)
+
+    # once for the args and once for the kwargs
+    assert len(inspected) == 2
+    assert sum('Entering "_add"' in message for message in captured_messages) == 5
+
+
+def test_log_decorator_skips_disabled_levels(monkeypatch, captured_messages):
+    monkeypatch.setattr(the_logger, '_get_min_level_no', lambda: logger.level('WARNING').no)
+    monkeypatch.setattr(the_logger, '_get_var_names_passed_to_args_or_kwargs', lambda data: pytest.fail('names were inspected'))
+    monkeypatch.setattr(the_logger, '_convert_pandas_objects', lambda *args, **kwargs: pytest.fail('values were converted'))
+
+    assert _add(1, 2) == 3
+
+
+@log_decorator()
+def _count_pages(modules_name_and_html):
+    return len(modules_name_and_html)
+
+
+
+def test_min_level_falls_back_when_loguru_internals_change(monkeypatch):
+    # the current loguru exposes `_core.min_level`, which is the level of its most verbose sink
+    if hasattr(logger._core, 'min_level'):
+        assert the_logger._get_min_level_no() == logger._core.min_level
+
+    class _Handler:
+        def __init__(self, levelno):
+            self.levelno = levelno
+
+    # without `min_level`, the levels of the sinks are introspected
+    monkeypatch.setattr(the_logger, 'logger', SimpleNamespace(_core=SimpleNamespace(handlers={1: _Handler(20), 2: _Handler(30)})))
+    assert the_logger._get_min_level_no() == 20
+    assert not the_logger._is_level_enabled(10) and the_logger._is_level_enabled(20)
+
+    # if nothing can be introspected, all levels are enabled
+    monkeypatch.setattr(the_logger, 'logger', SimpleNamespace())
+    assert the_logger._get_min_level_no() == 0
+    assert the_logger._is_level_enabled(5)
+
+def test_log_decorator_summarizes_large_values(captured_messages):
+    modules_name_and_html = [(f'module {i}', '<html>' + 'x' * 100_000 + '</html>') for i in range(50)]
+    _count_pages(modules_name_and_html)
+
+    entry_message = next(message for message in captured_messages if 'Entering "_count_pages"' in message)
+    assert len(entry_message) < 10 * the_logger.LOG_VALUE_BUDGET * the_logger.LOG_MAX_ITEMS
+    assert 'str len=100013' in entry_message
+    assert '... 40 more items ...' in entry_message
+
+
+def test_summarizers():
+    long_string = 'a' * 1000 + 'b' * 1000
+    summary = the_logger._convert_pd_to_str(long_string)
+    assert summary.startswith('<str len=2000 hash=')
+    assert "head='aaa" in summary and "bbb'>" in summary
+    assert the_logger._convert_pd_to_str('short') == 'short'
+    assert the_logger._convert_pd_to_str(b'\x00' * 5000).startswith('<bytes len=5000 hash=')
+
+    class Response:
+        status_code = 200
+        url = 'https://example.com/topic/1'
+        headers = {'Content-Length': '123'}
+    Response.__module__ = 'requests.models'
+    assert the_logger._convert_pd_to_str(Response()) == '<Response [200] url=https://example.com/topic/1 content-length=123>'
+
+
+def test_log_decorator_records_metrics(monkeypatch):
+    metrics.metrics_registry.reset()
+    monkeypatch.setattr(metrics, '_metrics_enabled', True)
+
+    for _ in range(3):
+        _count_pages([('module', 'x' * 100)])
+    with pytest.raises(TypeError):
+        _count_pages(None)
+
+    name = f'{__name__}._count_pages'
+    func_metrics = metrics.metrics_registry.get_metrics()[name]
+    assert func_metrics['calls'] == 4
+    assert func_metrics['errors'] == 1
+    assert func_metrics['bytes_in'] == 3 * len('module' + 'x' * 100)
+    assert func_metrics['wall_time'] >= func_metrics['max_wall_time'] > 0
+
+    assert json.loads(metrics.metrics_registry.to_json())[name]['calls'] == 4
+    assert f'forqan_function_calls_total{{function="{name}"}} 4' in metrics.metrics_registry.to_prometheus()
+    assert name in metrics.metrics_registry.get_summary_table()
+
+
+def test_metrics_are_disabled_by_default():
+    metrics.metrics_registry.reset()
+    _count_pages([])
+    assert metrics.metrics_registry.get_metrics() == {}
+
+
+def test_production_profile_writes_sampled_json_logs(tmp_path):
+    script = (
+        "import os\n"
+        "from logaru_logger.the_logger import logger\n"
+        "logger.info('lesson fetched')\n"
+        "for i in range(100):\n"
+        "    logger.debug('per-lesson message')\n"
+        "logger.complete()\n"
+        "print(os.getpid())\n"
+    )
+    env = dict(os.environ, LOG_PROFILE='production', LOG_DEBUG_SAMPLE_RATE='0', DEBUG='1', LOG_DIR=str(tmp_path / 'logs'))
+    process = subprocess.run([sys.executable, '-c', script], env=env, capture_output=True, text=True, check=True)
+
+    log_dir = tmp_path / 'logs' / 'detailed_logs'
+    log_file_paths = list(log_dir.glob(f'*_{process.stdout.split()[-1]}.json.log'))
+    assert len(log_file_paths) == 1
+    with open(log_file_paths[0], encoding='utf-8') as file:
+        records = [json.loads(line)['record'] for line in file]
+    assert [record['message'] for record in records] == ['lesson fetched']
+
+
+def test_invalid_log_profile():
+    with pytest.raises(ValueError):
+        the_logger.configure_logger('verbose')
+
+
+def test_pandas_objects_are_converted_if_pandas_is_imported():
+    pd = pytest.importorskip('pandas')
+    assert the_logger._convert_pd_to_str([pd.DataFrame(columns=['name', 'url'])]) == ['pd.DataFrame with cols: name, url']
@@ -0,0 +1,108 @@
+# test_transcription.py
+import os
+import threading
+
+import pytest
+
+from forqan_academy_explainer import transcription as ftr
+
+
+class _RecordingBackend(ftr.TranscriptionBackend):
+    """Records the batches it receives, and fails on the videos whose URL contains 'broken'."""
+
+    def __init__(self) -> None:
+        self.batches = []
+        self.transcribed_urls = []
+        self._lock = threading.Lock()
+
+    def transcribe(self, video_url: str):
+        if 'broken' in video_url:
+            raise RuntimeError('unable to download the video')
+        with self._lock:
+            self.transcribed_urls.append(video_url)
+        return [(0.0, 2.5, f'نص {video_url}'), (2.5, 3661.25, 'النهاية')]
+
+    def transcribe_batch(self, videos_urls):
+        with self._lock:
+            self.batches.append(list(videos_urls))
+        return super().transcribe_batch(videos_urls)
+
+
+def _lessons_info(videos_urls_per_module: dict) -> dict:
+    return {f'module_{i:02d}': {'name': module_name,
+                                'lessons': [{'name': f'المحاضرة {j}', 'video_url': video_url}
+                                            for j, video_url in enumerate(videos_urls, start=1)]
+                                            + [{'name': 'locked', 'not_available': True}]}
+            for i, (module_name, videos_urls) in enumerate(videos_urls_per_module.items(), start=1)}
+
+
+def test_format_srt() -> None:
+    assert ftr.format_srt([(0.0, 2.5, 'a'), (2.5, 3661.25, 'b')]) == \
+        '1\n00:00:00,000 --> 00:00:02,500\na\n\n2\n00:00:02,500 --> 01:01:01,250\nb\n\n'
+
+
+def test_transcribe_lessons_dedupes_checkpoints_and_skips() -> None:
+    forqan_lessons_info = _lessons_info({
+        'transcription_module_a': ['https://v/1', 'https://v/2', 'https://v/broken', 'https://v/3'],
+        # the same video as a lesson of the first module
+        'transcription_module_b': ['https://v/1', 'https://v/4'],
+    })
+    lessons_to_transcribe = ftr.get_lessons_to_transcribe(forqan_lessons_info)
+    assert len(lessons_to_transcribe) == 6
+
+    backend = _RecordingBackend()
+    outcomes = ftr.transcribe_lessons(lessons_to_transcribe, backend=backend, max_workers=2, batch_size=2)
+
+    assert outcomes == {'skipped': 0, 'transcribed': 4, 'failed': 1}
+    # each video URL was sent once, in batches of 2 (the failed batch was retried one video at a time)
+    assert sorted(url for batch in backend.batches for url in batch) == ['https://v/1', 'https://v/2', 'https://v/3', 'https://v/4', 'https://v/broken']
+    assert all(len(batch) <= 2 for batch in backend.batches)
+    assert sorted(backend.transcribed_urls).count('https://v/1') == 1
+
+    srt_paths = dict((srt_path, video_url) for video_url, srt_path in lessons_to_transcribe)
+    for srt_path, video_url in srt_paths.items():
+        assert os.path.exists(srt_path) == ('broken' not in video_url)
+    first_srt_path = next(srt_path for srt_path, video_url in srt_paths.items() if video_url == 'https://v/1')
+    with open(first_srt_path, encoding='utf-8') as file:
+        assert file.read() == ftr.format_srt([(0.0, 2.5, 'نص https://v/1'), (2.5, 3661.25, 'النهاية')])
+
+    # a rerun only retries the failed video
+    backend = _RecordingBackend()
+    outcomes = ftr.transcribe_lessons(lessons_to_transcribe, backend=backend, max_workers=2, batch_size=2)
+    assert outcomes == {'skipped': 4, 'transcribed': 0, 'failed': 1}
+    assert backend.batches == [['https://v/broken']]
+
+    # a deleted .srt file is restored from another lesson with the same video (without transcribing it again)
+    os.remove(first_srt_path)
+    outcomes = ftr.transcribe_lessons([(video_url, srt_path) for video_url, srt_path in lessons_to_transcribe if 'broken' not in video_url],
+                                    backend=ftr.StubTranscriptionBackend())
+    assert outcomes == {'skipped': 4, 'transcribed': 0, 'failed': 0}
+    assert os.path.exists(first_srt_path)
+
+
+def test_lessons_with_the_same_file_name_keep_their_videos() -> None:
+    forqan_lessons_info = _lessons_info({'transcription_module_c': ['https://v/5', 'https://v/6', 'https://v/5']})
+    lessons = forqan_lessons_info['module_01']['lessons']
+    lessons[0]['name'], lessons[1]['name'], lessons[2]['name'] = 'المحاضرة: 1', 'المحاضرة 1', 'المحاضرة: 1'
+
+    lessons_to_transcribe = ftr.get_lessons_to_transcribe(forqan_lessons_info)
+    assert sorted(video_url for video_url, _ in lessons_to_transcribe) == ['https://v/5', 'https://v/6']
+    assert [os.path.basename(srt_path) for video_url, srt_path in lessons_to_transcribe if video_url == 'https://v/6'] \
+        == ['المحاضرة 1 (02).srt']
+
+
+def test_incomplete_backend_fails_when_created() -> None:
+    class _IncompleteBackend(ftr.TranscriptionBackend):
+        def transcribe_batch(self, videos_urls):
+            return []
+
+    with pytest.raises(TypeError):
+        _IncompleteBackend()
+
+
+def test_get_transcription_backend(monkeypatch) -> None:
+    assert isinstance(ftr.get_transcription_backend('stub'), ftr.StubTranscriptionBackend)
+    monkeypatch.setenv('TRANSCRIPTION_BACKEND', 'stub')
+    assert isinstance(ftr.get_transcription_backend(), ftr.StubTranscriptionBackend)
+    with pytest.raises(ValueError):
+        ftr.get_transcription_backend('whisper.cpp')